@@ -0,0 +1,244 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Tuple
+
+import numpy as np
+
+from pricing_policy import MOODS, TRAFFIC_LEVELS, WEATHER
+from replay import chunk_lines
+
+# Event log lines handed to a worker at a time
+CHUNK_LINES = 20000
+
+STATUSES = ("continue", "done", "exit")
+
+# Condition columns are stored as int8 codes into these tuples
+CATEGORIES = {"traffic": TRAFFIC_LEVELS, "weather": WEATHER, "mood": MOODS, "status": STATUSES}
+_CODES = {column: {level: code for code, level in enumerate(levels)} for column, levels in CATEGORIES.items()}
+
+# Column name -> dtype of the event table. Missing prices and offers are 0,
+# a missing distance is NaN and a missing destination is -1.
+EVENT_COLUMNS = {
+    "session": np.uint64,
+    "ts": np.float64,
+    "seed": np.uint64,
+    "hour": np.int8,
+    "traffic": np.int8,
+    "weather": np.int8,
+    "mood": np.int8,
+    "destination": np.int32,
+    "distance": np.float64,
+    "quote": np.int64,
+    "minimum": np.int64,
+    "offer": np.int64,
+    "price": np.int64,
+    "rounds": np.int16,
+    "status": np.int8,
+}
+
+
+class EventColumns(NamedTuple):
+    """Turn events as one NumPy array per column, destinations as codes into `destinations`"""
+    columns: Dict[str, np.ndarray]
+    destinations: Tuple[str, ...]
+
+
+def parse_events(lines) -> EventColumns:
+    """Worker entry point: JSON event lines (events.py) to columns"""
+    destinations: Dict[str, int] = {}
+    traffic, weather, mood, status = (_CODES[c] for c in ("traffic", "weather", "mood", "status"))
+    rows = []
+    for line in lines:
+        event = json.loads(line)
+        destination = event["destination"]
+        distance = event["distance"]
+        rows.append((event["session"], event["ts"], event["seed"] or 0, event["hour"], traffic[event["traffic"]],
+                     weather[event["weather"]], mood[event["mood"]],
+                     -1 if destination is None else destinations.setdefault(destination, len(destinations)),
+                     np.nan if distance is None else distance, event["quote"] or 0, event["minimum"] or 0,
+                     event["offer"] or 0, event["price"] or 0, event["rounds"], status[event["status"]]))
+    values = zip(*rows) if rows else [()] * len(EVENT_COLUMNS)
+    columns = {name: np.array(column, dtype=dtype) for (name, dtype), column in zip(EVENT_COLUMNS.items(), values)}
+    return EventColumns(columns, tuple(destinations))
+
+
+def concat(parts) -> EventColumns:
+    """One table from several, destination codes renumbered into a shared name list"""
+    names: Dict[str, int] = {}
+    pieces = {name: [] for name in EVENT_COLUMNS}
+    for part in parts:
+        # Index -1 (no destination) picks the trailing -1 of the remap table
+        remap = np.array([names.setdefault(name, len(names)) for name in part.destinations] + [-1], dtype=np.int32)
+        for name, column in part.columns.items():
+            pieces[name].append(remap[column] if name == "destination" else column)
+    columns = {name: np.concatenate(arrays) if arrays else np.empty(0, dtype=EVENT_COLUMNS[name])
+               for name, arrays in pieces.items()}
+    return EventColumns(columns, tuple(names))
+
+
+def read_event_logs(paths, workers=None) -> EventColumns:
+    """Parse JSONL event logs into columns, chunks spread across a process pool"""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return concat(map(parse_events, chunk_lines(paths, CHUNK_LINES)))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return concat(pool.map(parse_events, chunk_lines(paths, CHUNK_LINES)))
+
+
+# Columnar files: Parquet through pyarrow when it is installed, otherwise a
+# NumPy .npz archive. Both keep the category names alongside the codes.
+def _metadata(events: EventColumns) -> str:
+    return json.dumps(dict(CATEGORIES, destination=events.destinations))
+
+
+def _restore(columns, metadata) -> EventColumns:
+    categories = json.loads(metadata)
+    for column, levels in CATEGORIES.items():
+        if tuple(categories[column]) != levels:
+            raise ValueError(f"{column} codes were written for levels {categories[column]}, expected {levels}")
+    return EventColumns({name: columns[name] for name in EVENT_COLUMNS}, tuple(categories["destination"]))
+
+
+def write_columns(path, events: EventColumns):
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("writing Parquet needs pyarrow (pip install pyarrow); use a .npz path instead")
+        table = pa.table(events.columns).replace_schema_metadata({"negotiate.categories": _metadata(events)})
+        pq.write_table(table, path)
+    elif path.endswith(".npz"):
+        np.savez(path, categories=np.array(_metadata(events)), **events.columns)
+    else:
+        raise ValueError(f"{path}: columnar output must end in .parquet or .npz")
+
+
+def read_columns(path) -> EventColumns:
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("reading Parquet needs pyarrow (pip install pyarrow)")
+        table = pq.read_table(path)
+        columns = {name: table.column(name).to_numpy() for name in EVENT_COLUMNS}
+        return _restore(columns, table.schema.metadata[b"negotiate.categories"])
+    with np.load(path) as archive:
+        return _restore(archive, str(archive["categories"]))
+
+
+def load(paths, workers=None) -> EventColumns:
+    """Events from columnar files (.parquet/.npz) and/or JSONL logs"""
+    logs = [path for path in paths if not path.endswith((".parquet", ".npz"))]
+    parts = [read_columns(path) for path in paths if path.endswith((".parquet", ".npz"))]
+    if logs:
+        parts.append(read_event_logs(logs, workers))
+    return parts[0] if len(parts) == 1 else concat(parts)
+
+
+def sessions(events: EventColumns) -> Dict[str, np.ndarray]:
+    """One row per session: its last event's columns plus `turns`, the rider turns logged
+
+    A session's first event is the start (greeting); every later one is a
+    rider turn. Events are ordered by time, ties kept in log order.
+    """
+    columns = events.columns
+    order = np.lexsort((columns["ts"], columns["session"]))
+    ids = columns["session"][order]
+    boundary = np.flatnonzero(ids[1:] != ids[:-1])
+    last = np.append(boundary, len(ids) - 1) if len(ids) else boundary
+    first = np.insert(boundary + 1, 0, 0) if len(ids) else boundary
+    table = {name: column[order[last]] for name, column in columns.items()}
+    table["turns"] = last - first
+    return table
+
+
+def scores(table) -> np.ndarray:
+    """BangaloreAutoGame.negotiation_score for every row, vectorised (only meaningful for deals)"""
+    quote, minimum, price = table["quote"], table["minimum"], table["price"]
+    spread = quote - minimum
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # A quote rounded onto the minimum scores 10 for paying it, like the scalar method
+        score = np.where(spread > 0, ((quote - price) / spread) * 10, np.where(price <= minimum, 10.0, 0.0))
+    # Same bonuses, added in the same order as the scalar method
+    score = score + np.isin(table["traffic"], [TRAFFIC_LEVELS.index("high"), TRAFFIC_LEVELS.index("very_high")])
+    score = score + np.isin(table["weather"], [WEATHER.index("rainy"), WEATHER.index("heavy_rain")])
+    score = score + ((table["hour"] < 6) | (table["hour"] >= 22))
+    score = score + 2 * (table["mood"] == MOODS.index("bad"))
+    # int() truncates toward zero
+    return np.clip(np.trunc(score), 0, 10).astype(np.int8)
+
+
+def _histogram(values, width=50) -> List[str]:
+    counts = np.bincount(values)
+    total = max(1, counts.sum())
+    return [f"  {value:>3}  {count / total:6.1%}  {'█' * int(count / total * width)}"
+            for value, count in enumerate(counts) if count]
+
+
+def report(table) -> List[str]:
+    """Deal rate, turns, rounds, discounts and scores across every session"""
+    count = len(table["session"])
+    done = table["status"] == STATUSES.index("done")
+    exited = table["status"] == STATUSES.index("exit")
+    deals = int(done.sum())
+    lines = [f"sessions:          {count:,}",
+             f"deals:             {deals:,} ({deals / max(1, count):.1%}), "
+             f"walked away: {int(exited.sum()):,}, unfinished: {count - deals - int(exited.sum()):,}"]
+    if not deals:
+        return lines
+
+    deal = {name: column[done] for name, column in table.items()}
+    discount = 1 - deal["price"] / deal["quote"]
+    over_minimum = deal["price"] / deal["minimum"]
+
+    lines.append("\nrider turns to deal:")
+    lines.extend(_histogram(deal["turns"]))
+    lines.append("\noffers weighed by the driver:")
+    lines.extend(_histogram(deal["rounds"].astype(np.int64)))
+    lines.append("\ndiscount off the opening quote / final price over the driver's minimum:")
+    for q in (10, 25, 50, 75, 90):
+        lines.append(f"  p{q:<3} {np.percentile(discount, q):6.1%}   {np.percentile(over_minimum, q):.2f}x")
+    lines.append("\nby driver mood:     deals    median discount")
+    for code, mood in enumerate(MOODS):
+        in_mood = table["mood"] == code
+        mood_deals = done & in_mood
+        median = np.median(discount[deal["mood"] == code]) if mood_deals.any() else float("nan")
+        lines.append(f"  {mood:<16} {mood_deals.sum() / max(1, in_mood.sum()):6.1%}    {median:6.1%}")
+    lines.append("\nnegotiation score:")
+    lines.extend(_histogram(scores(deal).astype(np.int64)))
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aggregate negotiation analytics over turn event logs")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert = commands.add_parser("convert", help="JSONL event logs to a columnar file")
+    convert.add_argument("logs", nargs="+", help="event logs (--events of the server, game or simulate.py)")
+    convert.add_argument("--out", required=True, help=".parquet (needs pyarrow) or .npz")
+    convert.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    summary = commands.add_parser("report", help="summarise sessions from logs or columnar files")
+    summary.add_argument("inputs", nargs="+", help="event logs, .parquet or .npz files")
+    summary.add_argument("--workers", type=int, default=None, help="processes for JSONL parsing")
+    args = parser.parse_args()
+
+    try:
+        start = time.perf_counter()
+        if args.command == "convert":
+            events = read_event_logs(args.logs, args.workers)
+            write_columns(args.out, events)
+            print(f"🗃  {len(events.columns['session']):,} events in {time.perf_counter() - start:.1f} s "
+                  f"-> {args.out} ({os.path.getsize(args.out):,} bytes)")
+        else:
+            events = load(args.inputs, args.workers)
+            loaded = time.perf_counter()
+            lines = report(sessions(events))
+            print("\n".join(lines))
+            print(f"\n⏱️ loaded {len(events.columns['session']):,} events in {loaded - start:.2f} s, "
+                  f"analysed in {time.perf_counter() - loaded:.2f} s")
+    except ValueError as e:
+        sys.exit(f"❌ {e}")
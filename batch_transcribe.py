@@ -0,0 +1,180 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, NamedTuple, Optional
+
+import numpy as np
+
+from speech_to_text import BACKENDS, DEFAULT_BACKEND, LANGUAGE, MODEL_NAME, SAMPLE_RATE, check, decode_audio, \
+    load_model, parse_backend, transcribe_audio
+
+AUDIO_EXTENSIONS = frozenset([".mp3", ".wav", ".m4a", ".ogg", ".opus", ".flac", ".aac", ".webm", ".amr"])
+
+# Whisper's fixed input window (whisper.audio.N_SAMPLES); anything longer goes
+# through model.transcribe. Spelled out so that the decode workers, which
+# import this module, never import torch.
+WINDOW_SAMPLES = 30 * SAMPLE_RATE
+
+
+class DecodedClip(NamedTuple):
+    path: str
+    samples: Optional[np.ndarray]
+    error: Optional[str] = None
+
+
+def find_clips(source) -> List[str]:
+    """Audio files under a directory, or the paths listed in a manifest (one per line, # comments)"""
+    if os.path.isdir(source):
+        clips = []
+        for root, _, files in os.walk(source):
+            clips.extend(os.path.join(root, name) for name in files
+                         if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS)
+        return sorted(clips)
+
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source, encoding="utf-8") as f:
+        lines = [line.strip() for line in f]
+    return [os.path.join(base, line) for line in lines if line and not line.startswith("#")]
+
+
+def decode_clip(path) -> DecodedClip:
+    """Worker entry point: decode one file, reporting ffmpeg failures instead of raising"""
+    try:
+        return DecodedClip(path, decode_audio(path))
+    except subprocess.CalledProcessError as e:
+        # ffmpeg puts the actual reason on the last line of its output
+        lines = e.stderr.decode(errors="replace").strip().splitlines()
+        return DecodedClip(path, None, lines[-1] if lines else str(e))
+
+
+def decoded_clips(paths, workers=None, ahead=64) -> Iterator[DecodedClip]:
+    """Decode in a process pool, in order, keeping at most `ahead` clips in flight.
+
+    The pool keeps decoding while the caller runs the model on what it already
+    got, and the bound stops tens of thousands of decoded clips piling up in
+    memory when the model is the slower side.
+    """
+    paths = iter(paths)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque(pool.submit(decode_clip, path) for path in _take(paths, ahead))
+        while pending:
+            clip = pending.popleft().result()
+            for path in _take(paths, 1):
+                pending.append(pool.submit(decode_clip, path))
+            yield clip
+
+
+def _take(iterator, count):
+    for _ in range(count):
+        item = next(iterator, None)
+        if item is None:
+            return
+        yield item
+
+
+def _record(clip, text, language, batch_size):
+    return {"path": clip.path, "duration": round(len(clip.samples) / SAMPLE_RATE, 3),
+            "text": text.strip(), "language": language, "batch": batch_size}
+
+
+def transcribe_batch(model, clips, language=LANGUAGE):
+    """One padded 30 s mel batch through whisper.decode; every clip must fit the window"""
+    import torch
+    import whisper
+    mels = torch.stack([whisper.log_mel_spectrogram(whisper.pad_or_trim(clip.samples), model.dims.n_mels)
+                        for clip in clips]).to(model.device)
+    options = whisper.DecodingOptions(language=language, without_timestamps=True,
+                                      fp16=model.device.type == "cuda")
+    results = whisper.decode(model, mels, options)
+    return [_record(clip, result.text, language, len(clips)) for clip, result in zip(clips, results)]
+
+
+def _flush(model, clips, language, batch_size):
+    # Long clips need Whisper's sliding window, so they go one at a time
+    for clip in clips:
+        if len(clip.samples) > WINDOW_SAMPLES:
+            yield _record(clip, transcribe_audio(model, clip.samples, language)["text"], language, 1)
+
+    # The rest are sorted by length so a batch decodes about as many tokens
+    # per clip and short clips do not wait on a long one to finish
+    short = sorted((clip for clip in clips if len(clip.samples) <= WINDOW_SAMPLES), key=lambda c: len(c.samples))
+    for start in range(0, len(short), batch_size):
+        yield from transcribe_batch(model, short[start:start + batch_size], language)
+
+
+def transcribe_clips(model, paths, language=LANGUAGE, batch_size=16, decode_workers=None, window=None):
+    """Yield one result dict per clip (in batch order, not input order); failures carry "error"
+
+    Clips are gathered `window` at a time (default four batches), grouped by
+    length and decoded in batches of `batch_size`.
+    """
+    window = window or batch_size * 4
+    buffered: List[DecodedClip] = []
+    for clip in decoded_clips(paths, decode_workers, ahead=window * 2):
+        if clip.error is not None:
+            yield {"path": clip.path, "error": clip.error}
+            continue
+        buffered.append(clip)
+        if len(buffered) >= window:
+            yield from _flush(model, buffered, language, batch_size)
+            buffered = []
+    yield from _flush(model, buffered, language, batch_size)
+
+
+def cpu_seconds():
+    """User + system CPU time of this process and its finished children (the decode pool)"""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Transcribe a directory or manifest of audio files to JSONL")
+    parser.add_argument("source", help="directory to scan, or a manifest with one audio path per line")
+    parser.add_argument("--out", default="transcripts.jsonl")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--language", default=LANGUAGE)
+    parser.add_argument("--backend", type=parse_backend, default=DEFAULT_BACKEND,
+                        help=f"KIND[:THREADS[:INTEROP]], KIND one of {', '.join(BACKENDS)}")
+    parser.add_argument("--batch-size", type=int, default=16, help="clips per padded mel batch")
+    parser.add_argument("--decode-workers", type=int, default=None, help="ffmpeg processes (default: all cores)")
+    parser.add_argument("--check", action="store_true",
+                        help="check every clip, ffmpeg and Whisper without loading the model, then exit")
+    args = parser.parse_args(argv)
+
+    paths = find_clips(args.source)
+    print(f"Found {len(paths):,} clips")
+    if args.check:
+        return 1 if check(paths, args.model) else 0
+    print("Loading Whisper model...")
+    model = load_model(args.model, args.backend)
+
+    start, cpu_start = time.perf_counter(), cpu_seconds()
+    done = errors = 0
+    audio_seconds = 0.0
+    with open(args.out, "w", encoding="utf-8") as out:
+        for record in transcribe_clips(model, paths, args.language, args.batch_size, args.decode_workers):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            done += 1
+            if "error" in record:
+                errors += 1
+            else:
+                audio_seconds += record["duration"]
+            if done % 100 == 0:
+                out.flush()
+                print(f"  {done:,}/{len(paths):,} clips", end="\r")
+    wall = time.perf_counter() - start
+    cpu = cpu_seconds() - cpu_start
+
+    print(f"\nTranscribed {done - errors:,} clips ({errors:,} failed to decode) in {wall:.1f} s")
+    print(f"Throughput: {audio_seconds / wall:.1f} audio-hours per wall-clock hour")
+    print(f"CPU utilisation: {cpu / wall / (os.cpu_count() or 1):.0%} of {os.cpu_count()} cores")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
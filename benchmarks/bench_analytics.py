@@ -0,0 +1,129 @@
+"""Session analytics at scale: event logging cost, JSONL -> columns, and the vectorised report
+
+Simulates --simulate sessions with turn events logged (timing the logging
+overhead against the same run without it), converts the log to columns and
+round-trips them through .npz (and Parquet when pyarrow is installed). The
+parsed events are then replicated under fresh session ids up to --sessions
+and the whole report (per-session reduction, scores, distributions) is
+timed. Vectorised scores are checked against negotiation_score called once
+per session.
+
+Run from the repository root:
+    python -m benchmarks.bench_analytics --sessions 2000000
+"""
+import argparse
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+from analytics import CATEGORIES, STATUSES, EventColumns, read_columns, read_event_logs, report, scores, sessions, \
+    write_columns
+from game import BangaloreAutoGame
+from simulate import simulate
+
+
+def replicate(events: EventColumns, copies) -> EventColumns:
+    """The same events `copies` times over, each copy under its own session ids"""
+    _, inverse = np.unique(events.columns["session"], return_inverse=True)
+    count = inverse.max() + 1
+    columns = {name: np.tile(column, copies) for name, column in events.columns.items()}
+    offsets = np.repeat(np.arange(copies, dtype=np.uint64) * np.uint64(count), len(inverse))
+    columns["session"] = np.tile(inverse.astype(np.uint64), copies) + offsets
+    return EventColumns(columns, events.destinations)
+
+
+def looped_scores(table):
+    """negotiation_score once per row, the way a per-session loop would do it"""
+    traffic, weather, mood = CATEGORIES["traffic"], CATEGORIES["weather"], CATEGORIES["mood"]
+    out = []
+    for row in zip(table["quote"].tolist(), table["minimum"].tolist(), table["price"].tolist(),
+                   table["traffic"].tolist(), table["weather"].tolist(), table["hour"].tolist(),
+                   table["mood"].tolist()):
+        session = SimpleNamespace(base_price=row[0], min_price=row[1], current_price=row[2],
+                                  traffic_level=traffic[row[3]], weather=weather[row[4]], time=row[5],
+                                  driver_mood=mood[row[6]])
+        out.append(BangaloreAutoGame.negotiation_score(session))
+    return np.array(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--simulate", type=int, default=20000, help="sessions actually played and logged")
+    parser.add_argument("--sessions", type=int, default=2000000, help="sessions in the replicated table")
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        log = os.path.join(directory, "events.jsonl")
+        start = time.perf_counter()
+        simulate(args.simulate, workers=args.workers)
+        plain = time.perf_counter() - start
+        start = time.perf_counter()
+        simulate(args.simulate, workers=args.workers, events=log)
+        logged = time.perf_counter() - start
+        log_bytes = os.path.getsize(log)
+
+        start = time.perf_counter()
+        events = read_event_logs([log], args.workers)
+        parse = time.perf_counter() - start
+        count = len(events.columns["session"])
+
+        formats = [".npz"]
+        try:
+            import pyarrow  # noqa: F401
+            formats.append(".parquet")
+        except ImportError:
+            pass
+        round_trips = []
+        for extension in formats:
+            path = os.path.join(directory, "events" + extension)
+            start = time.perf_counter()
+            write_columns(path, events)
+            written = time.perf_counter() - start
+            start = time.perf_counter()
+            back = read_columns(path)
+            read = time.perf_counter() - start
+            same = all(np.array_equal(back.columns[name], column, equal_nan=column.dtype.kind == "f")
+                       for name, column in events.columns.items()) and back.destinations == events.destinations
+            round_trips.append((extension, os.path.getsize(path), written, read, same))
+
+    table = sessions(events)
+    deals = {name: column[table["status"] == STATUSES.index("done")] for name, column in table.items()}
+    start = time.perf_counter()
+    expected = looped_scores(deals)
+    looped = time.perf_counter() - start
+    start = time.perf_counter()
+    vectorised = scores(deals)
+    vector = time.perf_counter() - start
+    wrong = int((expected != vectorised).sum())
+
+    copies = max(1, args.sessions // len(table["session"]))
+    big = replicate(events, copies)
+    start = time.perf_counter()
+    big_table = sessions(big)
+    reduce = time.perf_counter() - start
+    start = time.perf_counter()
+    report(big_table)
+    summarise = time.perf_counter() - start
+
+    per_event = (logged - plain) / count
+    print(f"simulated:              {args.simulate:,} sessions, {count:,} events, {log_bytes / count:.0f} B/event")
+    print(f"event logging:          {per_event * 1e6:.1f} µs/event ({logged / plain - 1:+.0%} on the simulation)")
+    print(f"JSONL -> columns:       {count / parse:,.0f} events/s")
+    for extension, size, written, read, same in round_trips:
+        print(f"{extension:<8} round trip:       {size / count:.1f} B/event, write {written * 1e3:.0f} ms, "
+              f"read {read * 1e3:.0f} ms{'' if same else '  MISMATCH'}")
+    print(f"score, per-session loop: {len(expected) / looped:12,.0f} sessions/s")
+    print(f"score, vectorised:       {len(expected) / vector:12,.0f} sessions/s  ({looped / vector:,.0f}x)")
+    print(f"score mismatches:       {wrong} of {len(expected):,}")
+    print(f"at scale:               {len(big_table['session']):,} sessions / {len(big.columns['session']):,} events: "
+          f"reduce {reduce:.2f} s, report {summarise:.2f} s")
+    if wrong or not all(same for *_, same in round_trips):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Whisper inference backends on the CPU: word error rate and real-time factor
+
+Every clip is decoded once, then transcribed by each --backends spec in turn
+(see speech_to_text.BACKENDS: fp32, int8, traced, with optional thread
+counts). For each backend the script reports the model load time, the
+real-time factor (transcription seconds per second of audio, lower is
+faster), the speed-up over the first backend and the word error rate.
+
+References come from --references, a JSONL file of {"path", "text"} such as
+a hand-corrected batch_transcribe.py output. Without it the first backend's
+transcripts are the reference, so the WER column shows how far the others
+drift from it. Inter-op threads can only be set once per process, so give
+every spec the same INTEROP count, or run one backend per invocation.
+
+Run from the repository root (needs whisper and ffmpeg):
+    python -m benchmarks.bench_backends recordings/ --backends fp32 int8:8 traced:8
+"""
+import argparse
+import json
+import os
+import re
+import time
+
+from batch_transcribe import find_clips
+from speech_to_text import LANGUAGE, SAMPLE_RATE, decode_audio, load_model, parse_backend, transcribe_audio
+
+_WORD = re.compile(r"[\w']+")
+
+
+def words(text):
+    """Lower-case words without punctuation, the usual normalisation before WER"""
+    return _WORD.findall(text.lower())
+
+
+def edit_distance(reference, hypothesis):
+    """Word substitutions + deletions + insertions turning `reference` into `hypothesis`"""
+    previous = list(range(len(hypothesis) + 1))
+    for i, word in enumerate(reference, 1):
+        current = [i]
+        for j, other in enumerate(hypothesis, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (word != other)))
+        previous = current
+    return previous[-1]
+
+
+def word_error_rate(references, hypotheses):
+    """Corpus WER: total edits over total reference words"""
+    edits = sum(edit_distance(words(ref), words(hyp)) for ref, hyp in zip(references, hypotheses))
+    return edits / max(1, sum(len(words(ref)) for ref in references))
+
+
+def read_references(path):
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()]
+    return {os.path.abspath(record["path"]): record["text"] for record in records}
+
+
+def run(spec, clips, language):
+    """(load seconds, transcription seconds, transcripts) for one backend"""
+    start = time.perf_counter()
+    model = load_model(backend=spec)
+    loaded = time.perf_counter() - start
+    # The first call sets up kernels (and traces the encoder); keep it out of the timing
+    transcribe_audio(model, clips[0][1], language)
+    start = time.perf_counter()
+    texts = [transcribe_audio(model, samples, language)["text"] for _, samples in clips]
+    return loaded, time.perf_counter() - start, texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="directory or manifest of clips")
+    parser.add_argument("--backends", nargs="+", default=["fp32", "int8", "traced"],
+                        help="KIND[:THREADS[:INTEROP]] specs; the first is the baseline")
+    parser.add_argument("--references", default=None, help="JSONL of {path, text} reference transcripts")
+    parser.add_argument("--language", default=LANGUAGE)
+    parser.add_argument("--max-wer-increase", type=float, default=None,
+                        help="fail if a backend's WER exceeds the baseline's by more than this (e.g. 0.02)")
+    args = parser.parse_args()
+    try:
+        specs = [parse_backend(spec) for spec in args.backends]
+    except ValueError as e:
+        raise SystemExit(f"❌ {e}")
+
+    clips = [(path, decode_audio(path)) for path in find_clips(args.source)]
+    if not clips:
+        raise SystemExit(f"no audio clips in {args.source}")
+    audio_seconds = sum(len(samples) for _, samples in clips) / SAMPLE_RATE
+    references = None
+    if args.references:
+        known = read_references(args.references)
+        missing = [path for path, _ in clips if os.path.abspath(path) not in known]
+        if missing:
+            raise SystemExit(f"no reference transcript for {len(missing)} clips, e.g. {missing[0]}")
+        references = [known[os.path.abspath(path)] for path, _ in clips]
+    print(f"{len(clips)} clips, {audio_seconds:.1f} s of audio; WER against "
+          f"{'--references' if references else 'the ' + args.backends[0] + ' transcripts'}\n")
+
+    print(f"{'backend':<16}{'load':>9}{'RTF':>9}{'speed-up':>10}{'WER':>8}")
+    results = []
+    for label, spec in zip(args.backends, specs):
+        loaded, seconds, texts = run(spec, clips, args.language)
+        if references is None:
+            references = texts
+        wer = word_error_rate(references, texts)
+        results.append((label, seconds, wer))
+        print(f"{label:<16}{loaded:>7.1f} s{seconds / audio_seconds:>9.3f}{results[0][1] / seconds:>9.2f}x"
+              f"{wer:>8.1%}")
+
+    if args.max_wer_increase is not None:
+        worse = [label for label, _, wer in results[1:] if wer - results[0][2] > args.max_wer_increase]
+        for label in worse:
+            print(f"❌ {label} loses more than {args.max_wer_increase:.1%} WER against {results[0][0]}")
+        if worse:
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""One process per file vs batch_transcribe.py on the same clips
+
+Old: `python speech_to_text.py CLIP` per file, one after another, which
+loads the model and decodes audio serially every time. New: a single
+process, a decode pool overlapping with padded 30 s mel batches. Both are
+reported as audio-hours per wall-clock hour and CPU utilisation.
+
+Run from the repository root (needs whisper and ffmpeg):
+    python -m benchmarks.bench_batch_transcribe recordings/ --baseline-clips 20
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+from batch_transcribe import cpu_seconds, find_clips, transcribe_clips
+from speech_to_text import SAMPLE_RATE, decode_audio, load_model
+
+
+def report(label, audio_seconds, wall, cpu):
+    cores = os.cpu_count() or 1
+    print(f"{label:<20} {audio_seconds / wall:8.1f} audio-h/h   {wall:8.1f} s wall   "
+          f"CPU {cpu / wall / cores:5.0%} of {cores} cores")
+
+
+def per_process(paths):
+    audio_seconds = sum(len(decode_audio(path)) for path in paths) / SAMPLE_RATE
+    start, cpu_start = time.perf_counter(), cpu_seconds()
+    for path in paths:
+        subprocess.run([sys.executable, "speech_to_text.py", path], check=True, stdout=subprocess.DEVNULL)
+    return audio_seconds, time.perf_counter() - start, cpu_seconds() - cpu_start
+
+
+def batched(paths, batch_size, decode_workers):
+    # The model load is counted, as it is for every run of the old way
+    start, cpu_start = time.perf_counter(), cpu_seconds()
+    model = load_model()
+    audio_seconds = sum(record.get("duration", 0.0)
+                        for record in transcribe_clips(model, paths, batch_size=batch_size,
+                                                       decode_workers=decode_workers))
+    return audio_seconds, time.perf_counter() - start, cpu_seconds() - cpu_start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="directory or manifest of clips")
+    parser.add_argument("--baseline-clips", type=int, default=20, help="clips for the slow per-process run")
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--decode-workers", type=int, default=None)
+    args = parser.parse_args()
+
+    paths = find_clips(args.source)
+    print(f"{len(paths):,} clips; per-process baseline on the first {min(args.baseline_clips, len(paths)):,}")
+    report("per process", *per_process(paths[:args.baseline_clips]))
+    report("batch", *batched(paths, args.batch_size, args.decode_workers))
+
+
+if __name__ == "__main__":
+    main()
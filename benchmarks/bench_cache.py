@@ -0,0 +1,68 @@
+"""Repeated clip: full decode + transcribe vs each transcription cache tier
+
+Times the server's per-request path for test.mp3 when it has to run the
+model, and when the same clip comes again as an identical upload (memory
+tier, no ffmpeg). It also times the same audio re-encoded, where the decoded
+samples match (decode + hash), and a fresh process finding the result on
+disk.
+
+Run from the repository root (needs whisper and ffmpeg):
+    python -m benchmarks.bench_cache --clip test.mp3
+"""
+import argparse
+import statistics
+import tempfile
+import time
+
+from speech_to_text import MODEL_NAME, decode_audio, load_model, transcribe_audio
+from transcription_cache import TranscriptionCache, cache_key, transcribe_cached
+
+
+def timed(function, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def show(label, seconds, baseline=None):
+    speedup = f"  {baseline / seconds:,.0f}x" if baseline else ""
+    print(f"{label:<28} {seconds * 1e6:14,.1f} µs{speedup}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clip", default="test.mp3")
+    parser.add_argument("--runs", type=int, default=1000, help="repetitions of each cached lookup")
+    args = parser.parse_args()
+
+    with open(args.clip, "rb") as f:
+        audio = f.read()
+    model = load_model()
+    transcribe_audio(model, decode_audio(audio)[:16000])
+
+    cold = timed(lambda: transcribe_audio(model, decode_audio(audio)), 3)
+    show("decode + transcribe", cold)
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TranscriptionCache(directory)
+        upload = cache_key(audio, MODEL_NAME, kind="upload")
+        result, _, _ = transcribe_cached(cache, model, decode_audio(audio))
+        cache.put(upload, result)
+
+        show("memory hit (same upload)", timed(lambda: cache.get(cache_key(audio, MODEL_NAME, kind="upload")),
+                                               args.runs), cold)
+        samples = decode_audio(audio)
+        show("hash decoded samples", timed(lambda: cache_key(samples), args.runs), cold)
+        show("decode + sample hit", timed(lambda: transcribe_cached(cache, model, decode_audio(audio)), 20), cold)
+
+        def disk_hit():
+            TranscriptionCache(directory, memory_entries=0).get(upload)
+        show("disk hit (fresh process)", timed(disk_hit, args.runs // 10 or 1), cold)
+        print(cache.stats())
+
+
+if __name__ == "__main__":
+    main()
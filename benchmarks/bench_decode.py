@@ -0,0 +1,76 @@
+"""Audio decode per clip: temp WAV round trip vs in-memory ffmpeg pipe
+
+Old: ffmpeg writes a 16 kHz WAV to disk, Whisper's loader runs ffmpeg on it
+again, then the file is removed. New: one ffmpeg run piping PCM straight
+into a float32 array (speech_to_text.decode_audio), from a path or from bytes
+as the server receives them. All three must produce the same samples.
+
+Run from the repository root (needs ffmpeg):
+    python -m benchmarks.bench_decode --clip test.mp3 --runs 20
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+
+from speech_to_text import decode_audio
+
+
+def temp_wav_decode(clip):
+    """The pre-pipe path: convert to a WAV on disk, decode that again, delete it"""
+    with tempfile.TemporaryDirectory() as tmp:
+        converted = os.path.join(tmp, "test_fixed.wav")
+        subprocess.run(["ffmpeg", "-y", "-i", clip, "-ar", "16000", "-ac", "1", "-c:a", "pcm_s16le", converted],
+                       check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        # What whisper.load_audio does with the path it is given
+        samples = decode_audio(converted)
+        os.remove(converted)
+    return samples
+
+
+def timed(function, argument, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        samples = function(argument)
+        timings.append(time.perf_counter() - start)
+    return timings, samples
+
+
+def summary(label, timings):
+    print(f"{label:<22} mean {statistics.mean(timings) * 1000:7.1f} ms   "
+          f"p50 {statistics.median(timings) * 1000:7.1f} ms   min {min(timings) * 1000:7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clip", default="test.mp3")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    with open(args.clip, "rb") as f:
+        audio = f.read()
+
+    old, expected = timed(temp_wav_decode, args.clip, args.runs)
+    from_path, actual_path = timed(decode_audio, args.clip, args.runs)
+    from_bytes, actual_bytes = timed(decode_audio, audio, args.runs)
+
+    print(f"clip: {args.clip} ({len(expected) / 16000:.1f} s of audio, {len(audio):,} bytes)")
+    summary("temp WAV round trip", old)
+    summary("pipe from path", from_path)
+    summary("pipe from bytes", from_bytes)
+    saved = statistics.mean(old) - statistics.mean(from_path)
+    print(f"saved per clip:        {saved * 1000:.1f} ms ({statistics.mean(old) / statistics.mean(from_path):.1f}x)")
+
+    same = np.array_equal(expected, actual_path) and np.array_equal(expected, actual_bytes)
+    print(f"identical samples:     {same}")
+    if not same:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
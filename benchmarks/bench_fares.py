@@ -0,0 +1,63 @@
+"""Batch fare quoting: scalar calculate_price loop vs fares.quote_batch
+
+Run from the repository root:
+    python -m benchmarks.bench_fares
+
+Every quote is also checked for exact agreement between the two paths.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from fares import all_conditions, quote_batch
+from game import BANGALORE, BangaloreAutoGame
+
+
+def scalar_quotes(origins, destinations, conditions):
+    """The same grid of quotes through one session's calculate_price"""
+    game = BangaloreAutoGame()
+    areas = BANGALORE.areas
+    quoted = np.empty((len(origins), len(destinations), len(conditions)), dtype=np.int64)
+    minimum = np.empty_like(quoted)
+    for k, condition in enumerate(conditions):
+        game.traffic_level = condition.traffic
+        game.weather = condition.weather
+        game.driver_mood = condition.mood
+        game.time = 23 if condition.night else 12
+        for i, origin in enumerate(origins):
+            for j, destination in enumerate(destinations):
+                distance = game.calculate_distance(areas[origin], areas[destination])
+                quoted[i, j, k], minimum[i, j, k] = game.calculate_price(distance)
+    return quoted, minimum
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    areas = list(BANGALORE.areas)
+    conditions = all_conditions()
+    quotes = len(areas) ** 2 * len(conditions)
+
+    start = time.perf_counter()
+    expected = scalar_quotes(areas, areas, conditions)
+    scalar = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        actual = quote_batch(areas, areas, conditions)
+    batch = (time.perf_counter() - start) / args.repeat
+
+    mismatches = int((expected[0] != actual[0]).sum() + (expected[1] != actual[1]).sum())
+    print(f"quotes per grid:   {quotes:,} ({len(areas)} × {len(areas)} × {len(conditions)} conditions)")
+    print(f"scalar loop:       {scalar * 1000:.1f} ms  ({quotes / scalar:,.0f} quotes/s)")
+    print(f"quote_batch:       {batch * 1000:.1f} ms  ({quotes / batch:,.0f} quotes/s)")
+    print(f"mismatches:        {mismatches}")
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Fleet matching under load: k-nearest driver quotes while drivers keep moving
+
+Scatters --drivers drivers over the city and checks, for a sample of
+pickups, that Fleet.nearest finds the same drivers as a scan over all of
+them, and that every quote equals BangaloreAutoGame.calculate_price for a
+driver in that mood. A background thread then moves drivers continuously
+(--moves per second, random walks of a few hundred metres) while the main
+thread asks for --queries ranked quotes. The script reports latency
+percentiles and fails if the p99 is over --budget-ms.
+
+Run from the repository root:
+    python -m benchmarks.bench_fleet --drivers 10000 --queries 5000
+"""
+import argparse
+import math
+import random
+import statistics
+import threading
+import time
+
+from fleet import Fleet, scatter
+from game import BangaloreAutoGame, fixed_clock
+from pricing_policy import TRAFFIC_LEVELS, WEATHER
+
+
+def scan(fleet, point, k):
+    """The k nearest (km, driver) by looking at every driver"""
+    x, y = fleet._project(point)
+    found = sorted((math.hypot(fleet.x[row] - x, fleet.y[row] - y), fleet.ids[row]) for row in fleet.rows.values())
+    return found[:k]
+
+
+def check(fleet, rng, samples, k):
+    """(nearest mismatches, quote mismatches) over `samples` random trips"""
+    areas = list(fleet.city.areas)
+    wrong_nearest = wrong_quotes = 0
+    for _ in range(samples):
+        pickup, destination = rng.choice(areas), rng.choice(areas)
+        expected = [km for km, _ in scan(fleet, fleet.city.areas[pickup], k)]
+        wrong_nearest += [km for _, km in fleet.nearest(fleet.city.areas[pickup], k)] != expected
+
+        hour, traffic, weather = rng.randrange(24), rng.choice(TRAFFIC_LEVELS), rng.choice(WEATHER)
+        for quote in fleet.quotes(pickup, destination, k, traffic=traffic, weather=weather, hour=hour):
+            game = BangaloreAutoGame(fleet.city, seed=0, clock=fixed_clock(hour))
+            game.traffic_level, game.weather, game.driver_mood = traffic, weather, quote.mood
+            wrong_quotes += game.calculate_price(fleet.city.distance(pickup, destination)) != (quote.quoted,
+                                                                                               quote.minimum)
+    return wrong_nearest, wrong_quotes
+
+
+def mover(fleet, rng, per_second, stop, moved):
+    """Random-walk drivers at `per_second` moves a second until `stop` is set"""
+    drivers = list(fleet.rows)
+    scale_a, scale_b = fleet._scale
+    batch = max(1, per_second // 100)
+    while not stop.is_set():
+        started = time.perf_counter()
+        for _ in range(batch):
+            driver = rng.choice(drivers)
+            row = fleet.rows[driver]
+            point = ((fleet.x[row] + rng.gauss(0, 0.2)) / scale_a, (fleet.y[row] + rng.gauss(0, 0.2)) / scale_b)
+            fleet.update(driver, point)
+        moved[0] += batch
+        time.sleep(max(0.0, 0.01 - (time.perf_counter() - started)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--drivers", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=5000)
+    parser.add_argument("-k", type=int, default=10, help="drivers quoted per rider")
+    parser.add_argument("--moves", type=int, default=5000, help="driver position updates per second")
+    parser.add_argument("--budget-ms", type=float, default=5.0, help="p99 latency allowed per quotes() call")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    fleet = Fleet()
+    start = time.perf_counter()
+    scatter(fleet, args.drivers, rng)
+    build = time.perf_counter() - start
+    wrong_nearest, wrong_quotes = check(fleet, rng, 200, args.k)
+
+    areas = list(fleet.city.areas)
+    trips = [(rng.choice(areas), rng.choice(areas), rng.choice(TRAFFIC_LEVELS), rng.choice(WEATHER), rng.randrange(24))
+             for _ in range(args.queries)]
+    stop, moved = threading.Event(), [0]
+    thread = threading.Thread(target=mover, args=(fleet, random.Random(args.seed + 1), args.moves, stop, moved))
+    thread.start()
+    latencies = []
+    start = time.perf_counter()
+    try:
+        for pickup, destination, traffic, weather, hour in trips:
+            begun = time.perf_counter()
+            fleet.quotes(pickup, destination, args.k, traffic=traffic, weather=weather, hour=hour)
+            latencies.append(time.perf_counter() - begun)
+    finally:
+        stop.set()
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    cuts = statistics.quantiles(latencies, n=100)
+    print(f"fleet:       {len(fleet):,} drivers in {len(fleet.grid):,} cells of {fleet.cell_km} km, "
+          f"built in {build * 1e3:.0f} ms")
+    print(f"quotes():    {len(latencies) / elapsed:,.0f} calls/s with {moved[0] / elapsed:,.0f} moves/s alongside")
+    print(f"latency:     p50 {cuts[49] * 1e3:.3f} ms, p99 {cuts[98] * 1e3:.3f} ms, max {max(latencies) * 1e3:.3f} ms "
+          f"(k={args.k})")
+    print(f"mismatches:  {wrong_nearest} of 200 nearest searches, {wrong_quotes} quotes")
+    over = cuts[98] * 1e3 > args.budget_ms
+    if over:
+        print(f"❌ p99 over the {args.budget_ms} ms budget")
+    if wrong_nearest or wrong_quotes or over:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Geo data at city scale: memory and lookup latency for 50k localities
+
+Builds a synthetic city of --points localities (uniform spread plus a dense
+centre, like a real city) around Bangalore. It compares the array-backed
+GeoPoints against the same data as a dict of [lat, lon] lists, and the
+grid-indexed nearest lookup against a scan over every point. It also loads
+the points into a CityModel from CSV.
+
+Run from the repository root:
+    python -m benchmarks.bench_geo --points 50000
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.bench_places import synthetic_localities
+from game import load_city
+from geo import GeoPoints, haversine_km
+
+
+def synthetic_points(count, rng):
+    names = synthetic_localities(count, rng)
+    lats, lons = [], []
+    for i in range(count):
+        if i % 3 == 0:
+            lats.append(rng.gauss(12.97, 0.02))
+            lons.append(rng.gauss(77.59, 0.02))
+        else:
+            lats.append(12.75 + rng.random() * 0.45)
+            lons.append(77.35 + rng.random() * 0.5)
+    return names, lats, lons
+
+
+def allocated(build):
+    tracemalloc.start()
+    value = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size
+
+
+def per_call(function, queries):
+    start = time.perf_counter()
+    for query in queries:
+        function(*query)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    names, lats, lons = synthetic_points(args.points, rng)
+
+    as_dict, dict_bytes = allocated(lambda: {name: [lat, lon] for name, lat, lon in zip(names, lats, lons)})
+    points, geo_bytes = allocated(lambda: GeoPoints(names, lats, lons))
+    start = time.perf_counter()
+    GeoPoints(names, lats, lons)
+    build = time.perf_counter() - start
+
+    queries = [(12.75 + rng.random() * 0.45, 77.35 + rng.random() * 0.5) for _ in range(args.queries)]
+    pairs = [(rng.choice(names), rng.choice(names)) for _ in range(args.queries)]
+
+    def scan(lat, lon):
+        return min(as_dict, key=lambda name: haversine_km(lat, lon, *as_dict[name]))
+
+    wrong = sum(points.nearest(lat, lon)[0].name != scan(lat, lon) for lat, lon in queries[:200])
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "synthetic.csv")
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["name", "lat", "lon"])
+            writer.writerows(zip(names, lats, lons))
+        start = time.perf_counter()
+        city = load_city(path)
+        city_load = time.perf_counter() - start
+
+    print(f"points:                 {args.points:,}")
+    print(f"dict of [lat, lon]:     {dict_bytes / 1e6:6.1f} MB ({dict_bytes / args.points:.0f} B/point, names shared)")
+    print(f"GeoPoints:              {geo_bytes / 1e6:6.1f} MB ({geo_bytes / args.points:.0f} B/point incl. name "
+          f"table; arrays + grid {points.nbytes() / 1e6:.1f} MB), built in {build * 1000:.0f} ms")
+    print(f"grid:                   {points.rows} × {points.cols} cells of {points.cell_km * 1000:.0f} m")
+    print(f"nearest, grid:          {per_call(points.nearest, queries):8.1f} µs")
+    print(f"nearest, full scan:     {per_call(scan, queries[:200]):8.1f} µs  (200 queries)")
+    print(f"nearest mismatches:     {wrong} of 200")
+    print(f"distance_km by name:    {per_call(points.distance_km, pairs):8.1f} µs")
+    print(f"CSV -> CityModel:       {city_load:.2f} s (incl. the place-name index, {len(city.areas):,} areas)")
+    if wrong:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Cold-start cost of the entry points, from python -X importtime
+
+Each entry module is imported in a fresh interpreter --runs times. The
+script reports the median cumulative import time -X importtime gives for
+the module and the median wall time of the whole process over a bare
+`python -c pass`. It lists the heaviest imports underneath and flags any
+entry point that drags in torch or Whisper at import. It also times
+`speech_to_text.py --check` on a missing file, which must fail fast.
+
+Run from the repository root:
+    python -m benchmarks.bench_import --runs 5
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+ENTRY_POINTS = ("game", "negotiation_server", "replay", "simulate", "analytics",
+                "speech_to_text", "transcription_server", "streaming", "batch_transcribe", "voice_pipeline")
+
+# Imported by inference only; an entry point that loads these at import is a regression
+HEAVY = ("torch", "whisper")
+
+
+def importtime(module):
+    """(cumulative µs of `module`, {imported name: self µs}) from one fresh interpreter"""
+    run = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                         capture_output=True, text=True)
+    if run.returncode != 0:
+        raise RuntimeError((run.stderr.strip().splitlines() or ["import failed"])[-1])
+    cumulative, self_times = None, {}
+    for line in run.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        self_times[name.strip()] = int(self_us)
+        if name.strip() == module and not name[1:].startswith(" "):
+            cumulative = int(cumulative_us)
+    return cumulative, self_times
+
+
+def wall(command):
+    start = time.perf_counter()
+    subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--modules", nargs="+", default=ENTRY_POINTS)
+    parser.add_argument("--top", type=int, default=3, help="heaviest imports to list per entry point")
+    args = parser.parse_args()
+
+    bare = statistics.median(wall([sys.executable, "-c", "pass"]) for _ in range(args.runs))
+    print(f"bare interpreter: {bare * 1e3:.0f} ms\n")
+    print(f"{'entry point':<22}{'importtime':>12}{'process':>12}   heaviest imports (self)")
+    slow_heavy = []
+    for module in args.modules:
+        try:
+            samples = [importtime(module) for _ in range(args.runs)]
+        except RuntimeError as e:
+            print(f"{module:<22}{'failed':>12}{'':>12}   {e}")
+            continue
+        cumulative = statistics.median(sample[0] for sample in samples)
+        process = statistics.median(wall([sys.executable, "-c", f"import {module}"]) for _ in range(args.runs))
+        self_times = samples[-1][1]
+        heaviest = sorted(self_times.items(), key=lambda item: -item[1])[:args.top]
+        print(f"{module:<22}{cumulative / 1e3:>9.1f} ms{(process - bare) * 1e3:>9.0f} ms   "
+              + ", ".join(f"{name} {us / 1e3:.1f}" for name, us in heaviest))
+        loaded = [name for name in HEAVY if name in self_times]
+        if loaded:
+            slow_heavy.append(f"{module} imports {', '.join(loaded)}")
+
+    check = statistics.median(wall([sys.executable, "speech_to_text.py", "--check", "missing.wav"])
+                              for _ in range(args.runs))
+    print(f"\nspeech_to_text.py --check missing.wav: {check * 1e3:.0f} ms")
+    for problem in slow_heavy:
+        print(f"❌ {problem} at import")
+    if slow_heavy:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Intent classifier micro-benchmark on recorded rider utterances
+
+Run from the repository root:
+    python -m benchmarks.bench_intent --rounds 2000
+"""
+import argparse
+import os
+import re
+import time
+
+from game import BangaloreAutoGame
+from intent import classify
+
+CORPUS = os.path.join(os.path.dirname(__file__), "data", "utterances.txt")
+
+
+def load_corpus(path=CORPUS):
+    """Non-empty, non-comment lines of the utterance corpus"""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith("#")]
+
+
+def legacy_classify(user_input):
+    """The per-turn regex construction process_negotiation used before the compiled classifier"""
+    price_match = re.search(r'(\d+)', user_input)
+    user_price = int(price_match.group(1)) if price_match else None
+    disagreement_words = ["nahi", "no", "not", "illogical", "expensive", "costly", "zyada", "bahut", "too much", "cab", "uber", "ola"]
+    disagreement_pattern = r'\b(?:' + '|'.join([re.escape(w) for w in disagreement_words]) + r')\b'
+    agreement_words = ["ok", "okay", "theek", "thik", "thike", "done", "fine",
+                       "agree", "chalo", "let's go", "deal", "chalega"]
+    agreement_pattern = r'\b(?:' + '|'.join([re.escape(w) for w in agreement_words]) + r')\b'
+    if re.search(disagreement_pattern, user_input, flags=re.IGNORECASE):
+        return "disagree", user_price
+    if re.search(agreement_pattern, user_input, flags=re.IGNORECASE):
+        return "agree", user_price
+    return ("price" if user_price is not None else "none"), user_price
+
+
+def utterances_per_second(fn, corpus, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for utterance in corpus:
+            fn(utterance)
+    return rounds * len(corpus) / (time.perf_counter() - start)
+
+
+def turns_per_second(corpus, rounds):
+    """Full process_negotiation turns, restarting the haggle each round"""
+    game = BangaloreAutoGame()
+    game.process_destination("koramangala")
+    opening = game.current_price
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for utterance in corpus:
+            game.current_price = opening
+            game.negotiation_rounds = 0
+            game.process_negotiation(utterance)
+    return rounds * len(corpus) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=2000, help="passes over the corpus")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    legacy = utterances_per_second(legacy_classify, corpus, args.rounds)
+    compiled = utterances_per_second(classify, corpus, args.rounds)
+    print(f"corpus:                {len(corpus)} utterances")
+    print(f"legacy classify/sec:   {legacy:,.0f}")
+    print(f"compiled classify/sec: {compiled:,.0f}  ({compiled / legacy:.1f}x)")
+    print(f"negotiation turns/sec: {turns_per_second(corpus, args.rounds // 4 or 1):,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Place resolver benchmark over a synthetic city of 10k localities
+
+Run from the repository root:
+    python -m benchmarks.bench_places --localities 10000 --queries 2000
+"""
+import argparse
+import random
+import time
+
+from game import BANGALORE_AREAS
+from places import PlaceIndex
+
+SYLLABLES = ("ko", "ra", "man", "ga", "la", "in", "di", "ra", "ja", "ya", "ba", "na", "shan", "ka",
+             "ri", "ma", "tha", "hal", "li", "ye", "la", "han", "de", "va", "pee", "nya", "vi",
+             "su", "chi", "pu", "ta", "mal", "les", "wa", "ram", "bel", "lan", "dur", "kun")
+SUFFIXES = ("", " nagar", " layout", "halli", "pura", "palya", " road", " cross", " extension")
+
+
+def synthetic_localities(count, rng):
+    """The real area names plus generated locality names until there are `count` of them"""
+    names = set(BANGALORE_AREAS)
+    while len(names) < count:
+        stem = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        names.add(stem + rng.choice(SUFFIXES))
+    return sorted(names)
+
+
+def misspell(name, rng):
+    """Drop, double or swap one letter the way transcripts usually get place names wrong"""
+    i = rng.randrange(1, len(name) - 1)
+    edit = rng.choice(("drop", "double", "swap"))
+    if edit == "drop":
+        return name[:i] + name[i + 1:]
+    if edit == "double":
+        return name[:i] + name[i] + name[i:]
+    return name[:i - 1] + name[i] + name[i - 1] + name[i + 1:]
+
+
+def linear_resolve(names, user_input):
+    """The scan process_destination/find_closest_area did before the index"""
+    for area in names:
+        if area in user_input:
+            return area
+    for word in user_input.split():
+        if len(word) > 3:
+            for area in names:
+                if word in area or area in word:
+                    return area
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--localities", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    names = synthetic_localities(args.localities, rng)
+
+    start = time.perf_counter()
+    index = PlaceIndex(names)
+    build = time.perf_counter() - start
+
+    targets = [rng.choice(names) for _ in range(args.queries)]
+    exact_queries = [f"{name} jana hai" for name in targets]
+    typo_queries = [f"{misspell(name, rng)} jana hai" for name in targets]
+
+    print(f"localities:            {len(names):,}")
+    print(f"index build:           {build * 1000:.0f} ms")
+    for label, queries in (("exact", exact_queries), ("misspelled", typo_queries)):
+        start = time.perf_counter()
+        found = [index.best(q) for q in queries]
+        indexed = len(queries) / (time.perf_counter() - start)
+        hits = sum(f == t for f, t in zip(found, targets))
+
+        start = time.perf_counter()
+        found = [linear_resolve(names, q) for q in queries[:200]]
+        linear = min(200, len(queries)) / (time.perf_counter() - start)
+        linear_hits = sum(f == t for f, t in zip(found, targets))
+
+        print(f"{label + ' queries':<22} indexed {indexed:>9,.0f}/s  top-1 {hits / len(queries):6.1%}"
+              f"   |  linear scan {linear:>7,.0f}/s  top-1 {linear_hits / len(found):6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Compiled pricing policy vs the hard-coded arithmetic it replaced
+
+The legacy functions below are the fare and acceptance-chance code that used
+to live in game.py, reading session properties the way it did. The script
+checks that the policy compiled from data/pricing_policy.json gives the same
+quotes and chances over every condition, hour, round and a range of
+distances and offers, then times both per call. It also times compiling a
+rules file and a hot reload through PolicyFile.
+
+Run from the repository root:
+    python -m benchmarks.bench_pricing_policy --calls 200000
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from itertools import product
+
+from game import BANGALORE, BangaloreAutoGame, fixed_clock
+from pricing_policy import DEFAULT_POLICY, MOODS, TRAFFIC_LEVELS, WEATHER, PolicyFile, load_policy
+
+
+def legacy_price(game, distance):
+    raw_price = game.base_fare + (distance * game.rate_per_km)
+    raw_price *= game.city.night_multiplier if game.time < 6 or game.time >= 22 else 1.0
+    raw_price *= game.traffic_multiplier
+    raw_price *= game.weather_multiplier
+    raw_price *= game.city.mood_multipliers[game.driver_mood]
+    quoted_price = raw_price * game.haggling_factor
+    quoted_price = round(quoted_price / 10) * 10
+    if quoted_price % 10 != 0 and quoted_price % 5 != 0:
+        quoted_price = round(quoted_price / 5) * 5
+    min_price = max(game.base_fare, round(raw_price / 10) * 10)
+    return int(quoted_price), int(min_price)
+
+
+def legacy_acceptance(game, price_ratio):
+    if game.negotiation_rounds <= 1:
+        acceptance_chance = 0
+    elif game.negotiation_rounds == 2:
+        acceptance_chance = 0.1
+    else:
+        acceptance_chance = 0.3
+    if game.driver_mood == 'good':
+        acceptance_chance += 0.15
+    elif game.driver_mood == 'bad':
+        acceptance_chance -= 0.15
+    if game.traffic_level in ['high', 'very_high']:
+        acceptance_chance -= 0.1
+    if game.weather in ['rainy', 'heavy_rain']:
+        acceptance_chance -= 0.1
+    if price_ratio >= 0.95:
+        acceptance_chance += 0.2
+    elif price_ratio <= 0.7:
+        acceptance_chance -= 0.2
+    if game.negotiation_rounds >= 5:
+        acceptance_chance += 0.3
+    if game.negotiation_rounds >= 8:
+        acceptance_chance += 0.2
+    return acceptance_chance
+
+
+def sessions(city):
+    """One session per hour × traffic × weather × mood"""
+    out = []
+    for hour, traffic, weather, mood in product(range(24), TRAFFIC_LEVELS, WEATHER, MOODS):
+        game = BangaloreAutoGame(city, seed=0, clock=fixed_clock(hour))
+        game.traffic_level, game.weather, game.driver_mood = traffic, weather, mood
+        out.append(game)
+    return out
+
+
+def per_call(function, calls):
+    start = time.perf_counter()
+    for args in calls:
+        function(*args)
+    return (time.perf_counter() - start) / len(calls) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rules", default=os.path.join("data", "pricing_policy.json"))
+    parser.add_argument("--calls", type=int, default=200000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    policy = load_policy(args.rules)
+    compile_ms = (time.perf_counter() - start) * 1e3
+    if policy.digest != DEFAULT_POLICY.digest:
+        raise SystemExit(f"{args.rules} is not the default policy; the legacy code only knows the defaults")
+
+    games = sessions(BANGALORE.with_policy(policy))
+    distances = [i / 4 for i in range(121)]
+    ratios = [i / 100 for i in range(40, 121)]
+
+    wrong_quotes = sum(legacy_price(game, km) != policy.quote(km, game.time, game.traffic_level, game.weather,
+                                                              game.driver_mood)
+                       for game in games for km in distances)
+    wrong_chances = 0
+    for game, rounds in product(games[::24], range(12)):
+        game.negotiation_rounds = rounds
+        wrong_chances += sum(legacy_acceptance(game, ratio) != policy.acceptance(
+            rounds, game.driver_mood, game.traffic_level, game.weather, ratio) for ratio in ratios)
+
+    rng = random.Random(3)
+    picks = [(rng.choice(games), rng.choice(distances), rng.choice(ratios)) for _ in range(args.calls)]
+    for game, _, _ in picks:
+        game.negotiation_rounds = 4
+    quote = policy.quote
+    acceptance = policy.acceptance
+    legacy_quote_ns = per_call(legacy_price, [(game, km) for game, km, _ in picks])
+    policy_quote_ns = per_call(quote, [(km, game.time, game.traffic_level, game.weather, game.driver_mood)
+                                       for game, km, _ in picks])
+    method_ns = per_call(BangaloreAutoGame.calculate_price, [(game, km) for game, km, _ in picks])
+    legacy_chance_ns = per_call(legacy_acceptance, [(game, ratio) for game, _, ratio in picks])
+    policy_chance_ns = per_call(acceptance, [(4, game.driver_mood, game.traffic_level, game.weather, ratio)
+                                             for game, _, ratio in picks])
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "rules.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"fare": {"base": 50}}, f)
+        live = PolicyFile(path, interval=0)
+        idle = per_call(live.current, [()] * 10000)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"fare": {"base": 60, "per_km": 20}}, f)
+        start = time.perf_counter()
+        changed = live.reload()
+        reload_ms = (time.perf_counter() - start) * 1e3
+
+    print(f"compile {args.rules}: {compile_ms:.2f} ms; hot reload of a changed file: {reload_ms:.2f} ms "
+          f"({'applied' if changed else 'NOT applied'}); current() with nothing changed: {idle / 1e3:.1f} µs")
+    print(f"quote, hard-coded:       {legacy_quote_ns:7.0f} ns")
+    print(f"quote, compiled policy:  {policy_quote_ns:7.0f} ns  ({legacy_quote_ns / policy_quote_ns:.2f}x), "
+          f"{method_ns:.0f} ns through calculate_price")
+    print(f"acceptance, hard-coded:  {legacy_chance_ns:7.0f} ns")
+    print(f"acceptance, compiled:    {policy_chance_ns:7.0f} ns  ({legacy_chance_ns / policy_chance_ns:.2f}x)")
+    print(f"mismatches:              {wrong_quotes} of {len(games) * len(distances):,} quotes, "
+          f"{wrong_chances} of {len(games[::24]) * 12 * len(ratios):,} chances")
+    if wrong_quotes or wrong_chances or not changed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""Reply rendering per language: catalogue load cost, render throughput and memory per session
+
+For every message file in responses.LANGUAGES the script times the first
+load_locale (read and compile, as the first session in that language pays
+it) and the memory the compiled catalogue holds. It then renders every
+template of the catalogue under every traffic, weather and condition
+combination, failing if any placeholder is left in a reply, and reports:
+- the render rate, with the slot values already made;
+- the respond() rate of a session, which picks a template and makes the
+  values as well;
+- safe_format on the same templates, for comparison.
+Last, it checks that a session holds no more memory in one language than
+in another.
+
+Run from the repository root:
+    python -m benchmarks.bench_render --replies 200000
+"""
+import argparse
+import gc
+import itertools
+import time
+import tracemalloc
+
+from game import BangaloreAutoGame, fixed_clock
+from pricing_policy import TRAFFIC_LEVELS, WEATHER
+from responses import LANGUAGES, load_locale
+
+
+def timed_load(language):
+    """(seconds, traced bytes) for reading and compiling one catalogue from scratch"""
+    load_locale.cache_clear()
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    locale = load_locale(language)
+    elapsed = time.perf_counter() - start
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return locale, elapsed, held
+
+
+def leftovers(locale):
+    """Replies that still contain a brace after rendering, over every template and condition"""
+    bad = []
+    for picker in locale.catalog.values():
+        for template, traffic, weather, condition in itertools.product(picker.templates, TRAFFIC_LEVELS, WEATHER,
+                                                                      ("traffic", "weather")):
+            text = template.render(locale.values(180, condition, traffic, weather))
+            if "{" in text or "}" in text:
+                bad.append(text)
+    return bad
+
+
+def rate(func, items, count):
+    start = time.perf_counter()
+    for item in itertools.islice(itertools.cycle(items), count):
+        func(item)
+    return count / (time.perf_counter() - start)
+
+
+def bytes_per_session(language, count):
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    sessions = [BangaloreAutoGame(seed=i, clock=fixed_clock(9), language=language) for i in range(count)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del sessions
+    return (after - before) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--replies", type=int, default=200000, help="replies rendered per language and path")
+    parser.add_argument("--sessions", type=int, default=5000, help="sessions kept alive per language")
+    args = parser.parse_args()
+
+    loaded = {language: timed_load(language) for language in LANGUAGES}
+    failed = False
+    print(f"{'language':<10}{'templates':>10}{'load':>9}{'held':>9}{'render/s':>12}{'respond/s':>12}"
+          f"{'safe_format/s':>15}")
+    for language in LANGUAGES:
+        locale, elapsed, held = loaded[language]
+        templates = [template for picker in locale.catalog.values() for template in picker.templates]
+        bad = leftovers(locale)
+        if bad:
+            failed = True
+            print(f"❌ {language}: {len(bad)} replies with placeholders left, e.g. {bad[0]!r}")
+
+        values = locale.values(180, "traffic", "high", "rainy")
+        named = dict(zip(("price", "condition", "traffic", "weather"), values))
+        session = BangaloreAutoGame(seed=1, clock=fixed_clock(9), language=language)
+        reply_types = list(locale.catalog)
+        render = rate(lambda template: template.render(values), templates, args.replies)
+        respond = rate(lambda reply_type: session.respond(reply_type, price=180, condition="weather"), reply_types,
+                       args.replies)
+        legacy = rate(lambda template: session.safe_format(template.text, **named), templates, args.replies)
+        print(f"{language:<10}{len(templates):>10}{elapsed * 1e3:>7.1f}ms{held / 1024:>7.0f}KB"
+              f"{render:>12,.0f}{respond:>12,.0f}{legacy:>15,.0f}")
+
+    per_session = {language: bytes_per_session(language, args.sessions) for language in LANGUAGES}
+    print("\nbytes per session: " + ", ".join(f"{language} {size:.0f}" for language, size in per_session.items()))
+    if max(per_session.values()) - min(per_session.values()) > 16:
+        failed = True
+        print("❌ sessions in some languages hold more memory than others")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Reply rendering: list-history picker + safe_format vs compiled picker + templates
+
+Run from the repository root:
+    python -m benchmarks.bench_responses --replies 1000000
+
+Both paths draw from identically seeded generators, and every rendered reply
+is checked to be the same.
+"""
+import argparse
+import re
+import time
+
+from game import BANGALORE, SessionRandom
+from responses import SLOTS, ResponsePicker, Template
+
+VALUES = {"price": 180, "condition": "traffic high", "traffic": "high", "weather": "rainy"}
+# The same values as compiled templates take them, one string per slot
+SLOT_VALUES = tuple(str(VALUES[slot]) for slot in SLOTS)
+
+
+class LegacyResponder:
+    """get_unique_response and safe_format as they were before the compiled catalogue"""
+
+    def __init__(self, responses, rng):
+        self.responses = responses
+        self.rng = rng
+        self.used_responses = {}
+
+    def safe_format(self, text, **kwargs):
+        if not text:
+            return text
+        placeholders = re.findall(r'\{([^\}]+)\}', text)
+        safe_kwargs = {k: v for k, v in kwargs.items() if k in placeholders}
+        if safe_kwargs:
+            try:
+                return text.format(**safe_kwargs)
+            except KeyError:
+                return text
+        return text
+
+    def get_unique_response(self, response_type):
+        if response_type not in self.used_responses:
+            self.used_responses[response_type] = []
+        available_responses = self.responses.get(response_type, [])
+        if not available_responses:
+            return "I don't understand."
+        if len(self.used_responses[response_type]) >= len(available_responses) - 1:
+            self.used_responses[response_type] = []
+        unused_responses = [r for r in available_responses if r not in self.used_responses[response_type]]
+        if not unused_responses:
+            response = self.rng.choice(available_responses)
+        else:
+            response = self.rng.choice(unused_responses)
+        self.used_responses[response_type].append(response)
+        max_history = min(3, len(available_responses) - 1)
+        if max_history > 0 and len(self.used_responses[response_type]) > max_history:
+            self.used_responses[response_type] = self.used_responses[response_type][-max_history:]
+        return response
+
+    def respond(self, response_type, **values):
+        return self.safe_format(self.get_unique_response(response_type), **values)
+
+
+class CompiledResponder:
+    """The session's pick_template/respond on their own, over the city's compiled catalogue"""
+
+    def __init__(self, catalog, rng):
+        self.catalog = catalog
+        self.rng = rng
+        self.response_states = {}
+
+    def respond(self, response_type, **values):
+        picker = self.catalog[response_type]
+        state = self.response_states.get(response_type, 0)
+        index = self.rng.choice(picker.options[state])
+        self.response_states[response_type] = picker.transitions[state][index]
+        return picker.templates[index].render(SLOT_VALUES)
+
+
+def render_all(responder, types, count):
+    out = []
+    for i in range(count):
+        out.append(responder.respond(types[i % len(types)], **VALUES))
+    return out
+
+
+def check_small_catalogues():
+    """Short template lists hit the reset and no-history corner cases of the old picker"""
+    for size in range(1, 8):
+        texts = tuple(f"reply {i} ₹{{price}}" for i in range(size))
+        legacy = LegacyResponder({"t": texts}, SessionRandom(size))
+        compiled = CompiledResponder({"t": ResponsePicker(texts)}, SessionRandom(size))
+        if render_all(legacy, ["t"], 5000) != render_all(compiled, ["t"], 5000):
+            raise SystemExit(f"picker mismatch for {size} templates")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--replies", type=int, default=1000000)
+    args = parser.parse_args()
+
+    check_small_catalogues()
+    types = list(BANGALORE.responses)
+
+    start = time.perf_counter()
+    expected = render_all(LegacyResponder(BANGALORE.responses, SessionRandom(1)), types, args.replies)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = render_all(CompiledResponder(BANGALORE.catalog, SessionRandom(1)), types, args.replies)
+    compiled = time.perf_counter() - start
+
+    # Template rendering alone, without picking
+    template = Template(BANGALORE.responses["price_low"][2])
+    start = time.perf_counter()
+    for _ in range(args.replies):
+        template.render(SLOT_VALUES)
+    render_only = time.perf_counter() - start
+
+    print(f"replies:              {args.replies:,}")
+    print(f"legacy pick+format:   {legacy:.2f} s  ({args.replies / legacy:,.0f}/s)")
+    print(f"compiled pick+render: {compiled:.2f} s  ({args.replies / compiled:,.0f}/s)  {legacy / compiled:.1f}x")
+    print(f"template render:      {render_only:.2f} s  ({args.replies / render_only:,.0f}/s)")
+    print(f"identical output:     {expected == actual}")
+    if expected != actual:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Road distances: Dijkstra per request vs the precomputed, memory-mapped matrix
+
+Builds a synthetic road grid (--junctions² nodes, random segment lengths)
+with --areas of its junctions as named areas. It times the offline build,
+then compares answering trips with one Dijkstra each against looking them up
+in the mapped matrix. It also times opening the matrix in a fresh process,
+which is the startup cost a new worker pays.
+
+Run from the repository root:
+    python -m benchmarks.bench_roads --junctions 120 --areas 500
+"""
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+from road_matrix import RoadMatrix, build_matrix, shortest_paths, write_matrix
+
+
+def grid_graph(size, rng):
+    graph = {f"j{r}.{c}": [] for r in range(size) for c in range(size)}
+    for r in range(size):
+        for c in range(size):
+            for dr, dc in ((0, 1), (1, 0)):
+                if r + dr < size and c + dc < size:
+                    km = round(rng.uniform(0.2, 1.0), 2)
+                    graph[f"j{r}.{c}"].append((f"j{r + dr}.{c + dc}", km))
+                    graph[f"j{r + dr}.{c + dc}"].append((f"j{r}.{c}", km))
+    return graph
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--junctions", type=int, default=120, help="grid side; the graph has this squared nodes")
+    parser.add_argument("--areas", type=int, default=500)
+    parser.add_argument("--trips", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    graph = grid_graph(args.junctions, rng)
+    areas = rng.sample(sorted(graph), args.areas)
+    trips = [(rng.choice(areas), rng.choice(areas)) for _ in range(args.trips)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "roads.rdm")
+        start = time.perf_counter()
+        write_matrix(path, areas, build_matrix(graph, areas, args.workers))
+        build = time.perf_counter() - start
+
+        dijkstra_trips = trips[:200]
+        start = time.perf_counter()
+        for origin, destination in dijkstra_trips:
+            shortest_paths(graph, origin)[destination]
+        per_dijkstra = (time.perf_counter() - start) / len(dijkstra_trips)
+
+        start = time.perf_counter()
+        matrix = RoadMatrix(path)
+        open_in_process = time.perf_counter() - start
+        start = time.perf_counter()
+        for origin, destination in trips:
+            matrix.distance(origin, destination)
+        per_lookup = (time.perf_counter() - start) / len(trips)
+
+        wrong = sum(abs(matrix.distance(o, d) - shortest_paths(graph, o)[d]) > 1e-3 for o, d in trips[:50])
+
+        probe = "import sys, time; t = time.perf_counter(); from road_matrix import RoadMatrix; " \
+                "RoadMatrix(sys.argv[1]); print(time.perf_counter() - t)"
+        fresh = float(subprocess.run([sys.executable, "-c", probe, path], check=True,
+                                     capture_output=True, text=True).stdout)
+        size = os.path.getsize(path)
+
+    print(f"road graph:            {len(graph):,} junctions, {args.areas:,} areas")
+    print(f"offline build:         {build:.2f} s -> {size / 1e6:.1f} MB matrix")
+    print(f"Dijkstra per trip:     {per_dijkstra * 1e3:10.2f} ms")
+    print(f"mapped lookup:         {per_lookup * 1e6:10.2f} µs  ({per_dijkstra / per_lookup:,.0f}x)")
+    print(f"open matrix:           {open_in_process * 1e3:10.2f} ms here, "
+          f"{fresh * 1e3:.2f} ms in a fresh process (incl. import)")
+    print(f"wrong distances:       {wrong} of 50")
+    if wrong:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Session save/load latency per backend, and the record size against pickle
+
+Sessions are taken mid-negotiation (destination set, a couple of offers
+made), in every language. For every backend the script times dump+save and load+rebuild as a
+worker handing a session over would do them, and reports p50/p99. Each
+rebuilt session must match the original record byte for byte.
+
+Run from the repository root:
+    python -m benchmarks.bench_session_store --sessions 5000
+"""
+import argparse
+import os
+import pickle
+import random
+import tempfile
+import time
+
+from game import BangaloreAutoGame, fixed_clock, greet, step
+from responses import LANGUAGES
+from session_store import FileSessionStore, MemorySessionStore, SqliteSessionStore, dump_session, load_session
+
+
+def mid_negotiation(count, rng):
+    sessions = []
+    languages = (None,) + LANGUAGES
+    for i in range(count):
+        session = BangaloreAutoGame(seed=rng.getrandbits(64), clock=fixed_clock(rng.randrange(24)),
+                                    language=languages[i % len(languages)])
+        greet(session)
+        for text in ("airport", "too much", str(rng.randrange(100, 400, 10))):
+            step(session, text)
+        sessions.append(session)
+    return sessions
+
+
+def timings(function, items):
+    out = []
+    for item in items:
+        start = time.perf_counter_ns()
+        function(item)
+        out.append((time.perf_counter_ns() - start) / 1000)
+    out.sort()
+    return out
+
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def show(label, values):
+    print(f"{label:<26} p50 {percentile(values, 0.5):8.1f} µs   p99 {percentile(values, 0.99):8.1f} µs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=5000)
+    args = parser.parse_args()
+
+    sessions = mid_negotiation(args.sessions, random.Random(2))
+    state = {key: getattr(sessions[0], key) for key in BangaloreAutoGame.__slots__ if key not in ("city", "locale")}
+    print(f"record: {len(dump_session(sessions[0]))} bytes "
+          f"(pickle of the same attributes: {len(pickle.dumps(state))} bytes)")
+    show("dump_session", timings(dump_session, sessions))
+    records = [dump_session(session) for session in sessions]
+    show("load_session", timings(load_session, records))
+
+    with tempfile.TemporaryDirectory() as directory:
+        backends = (("memory", MemorySessionStore()),
+                    ("sqlite", SqliteSessionStore(os.path.join(directory, "sessions.db"))),
+                    ("files", FileSessionStore(os.path.join(directory, "sessions"))))
+        for name, store in backends:
+            numbered = list(enumerate(sessions))
+            show(f"{name}: save", timings(lambda item: store.save(*item), numbered))
+            show(f"{name}: load", timings(lambda item: store.load(item[0]), numbered))
+            wrong = sum(dump_session(store.load(i)) != record for i, record in enumerate(records))
+            if wrong:
+                raise SystemExit(f"{name}: {wrong} sessions changed on the way through")
+            store.close()
+
+
+if __name__ == "__main__":
+    main()
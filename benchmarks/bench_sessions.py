@@ -0,0 +1,88 @@
+"""Session creation benchmark: sessions per second and bytes per session, before and after slotting
+
+The "before" row is DictSession below, a stand-in with the session layout
+game.py had before the city tables were shared: every instance builds its
+own __dict__ with a copy of the area coordinates, the reply templates, the
+used-reply lists and the fare constants. The "after" row is today's
+BangaloreAutoGame, which keeps only per-session state in __slots__.
+
+Run from the repository root:
+    python -m benchmarks.bench_sessions --sessions 20000
+"""
+import argparse
+import gc
+import random
+import time
+import tracemalloc
+from datetime import datetime
+
+from game import BANGALORE_AREAS, DRIVER_RESPONSES, BangaloreAutoGame
+
+
+class DictSession:
+    """Per-instance tables, as every BangaloreAutoGame used to build them in __init__"""
+
+    def __init__(self):
+        self.used_responses = {reply_type: [] for reply_type in ('ask_destination', 'unknown_place', 'price_high',
+                                                                 'price_medium', 'price_low', 'too_low', 'agreement')}
+        self.bangalore_areas = {name: list(point) for name, point in BANGALORE_AREAS.items()}
+        self.current_location = "majestic"
+        self.destination = None
+        self.distance = None
+        self.base_price = None
+        self.min_price = None
+        self.current_price = None
+        self.time = datetime.now().hour
+        self.traffic_level = random.choice(['low', 'medium', 'high', 'very_high'])
+        self.weather = random.choice(['clear', 'rainy', 'heavy_rain'])
+        self.driver_mood = random.choice(['good', 'neutral', 'bad'])
+        self.base_fare = 40
+        self.rate_per_km = 18
+        self.night_multiplier = 1.5 if self.time < 6 or self.time >= 22 else 1.0
+        self.traffic_multiplier = {'low': 1.0, 'medium': 1.2, 'high': 1.4, 'very_high': 1.6}[self.traffic_level]
+        self.weather_multiplier = {'clear': 1.0, 'rainy': 1.3, 'heavy_rain': 1.5}[self.weather]
+        self.haggling_factor = 1.6
+        self.responses = {reply_type: list(texts) for reply_type, texts in DRIVER_RESPONSES.items()}
+
+
+def sessions_per_second(factory, count):
+    """Create `count` sessions back to back and return the creation rate"""
+    gc.collect()
+    start = time.perf_counter()
+    for _ in range(count):
+        factory()
+    elapsed = time.perf_counter() - start
+    return count / elapsed
+
+
+def bytes_per_session(factory, count):
+    """Keep `count` sessions alive and return the traced bytes each one holds"""
+    gc.collect()
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    sessions = [factory() for _ in range(count)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # The list holding the sessions is not part of a session's footprint
+    overhead = len(sessions) * 8
+    return (after - before - overhead) / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20000)
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'layout':<24}{'sessions/sec':>14}{'bytes/session':>15}")
+    for label, factory in (("before (dict, copies)", DictSession), ("after (slots, shared)", BangaloreAutoGame)):
+        rate = sessions_per_second(factory, args.sessions)
+        size = bytes_per_session(factory, args.sessions)
+        results[label] = rate, size
+        print(f"{label:<24}{rate:>14,.0f}{size:>15,.0f}")
+    (old_rate, old_size), (new_rate, new_size) = results.values()
+    print(f"\n{new_rate / old_rate:.1f}x the sessions per second, {old_size / new_size:.1f}x less memory per session")
+
+
+if __name__ == "__main__":
+    main()
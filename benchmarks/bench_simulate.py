@@ -0,0 +1,33 @@
+"""Simulator scaling: episodes/sec as the process pool grows
+
+Run from the repository root:
+    python -m benchmarks.bench_simulate --episodes 200000
+"""
+import argparse
+import os
+import time
+
+from simulate import simulate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--episodes", type=int, default=200000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    counts = sorted({1, 2, 4, 8, args.max_workers} & set(range(1, args.max_workers + 1)))
+    baseline = None
+    print(f"{'workers':>7}  {'episodes/s':>12}  {'speedup':>8}  {'efficiency':>10}")
+    for workers in counts:
+        start = time.perf_counter()
+        simulate(args.episodes, workers=workers, seed=1, chunk_size=args.chunk_size)
+        rate = args.episodes / (time.perf_counter() - start)
+        baseline = baseline or rate
+        speedup = rate / baseline
+        print(f"{workers:>7}  {rate:>12,.0f}  {speedup:>7.2f}x  {speedup / workers:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Driver strategies head to head: the legacy random counters vs the opponent-model table
+
+Every rider policy of simulate.py plays --episodes negotiations against
+each strategy, from the same seeds. For each pairing the script reports
+the deal rate, the median final price over the driver's minimum and the
+driver's margin per episode (price over minimum, averaged over every
+episode, walk-aways counting 0), which is what the table maximises. It
+also times one decision of each strategy and what a pricing hot-reload
+that moves the haggling factor costs the opponent model: re-solving its
+table for the new policy.
+
+Run from the repository root:
+    python -m benchmarks.bench_strategies --episodes 20000
+"""
+import argparse
+import time
+
+from game import BANGALORE, BangaloreAutoGame, fixed_clock, step
+from simulate import RATIO_BUCKET, RIDER_POLICIES, quantile, simulate
+from pricing_policy import PricingPolicy
+from strategies import load_strategy
+
+STRATEGIES = ("legacy", "opponent")
+
+
+def margin(result):
+    """Average (final price / minimum - 1) per episode, from the ratio histogram"""
+    return sum(count * (bucket * RATIO_BUCKET - 1) for bucket, count in result.ratio_buckets.items()) \
+        / max(1, result.episodes)
+
+
+def decision_ns(strategy, calls):
+    """Time per strategy.counter call on sessions that have had two offers counted"""
+    city = BANGALORE.with_strategy(strategy)
+    sessions = []
+    for seed in range(200):
+        session = BangaloreAutoGame(city, seed=seed, clock=fixed_clock(seed % 24))
+        step(session, "whitefield jana hai")
+        session.negotiation_rounds = 3
+        session.last_offer = int(session.base_price * 0.65)
+        sessions.append((session, int(session.base_price * 0.7)))
+    start = time.perf_counter()
+    for i in range(calls):
+        session, offer = sessions[i % len(sessions)]
+        strategy.counter(session, offer, offer / session.base_price)
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--episodes", type=int, default=20000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--calls", type=int, default=200000, help="decisions timed per strategy")
+    args = parser.parse_args()
+
+    print(f"{'rider':<10}{'strategy':<10}{'deals':>8}{'median':>9}{'margin':>9}")
+    totals = dict.fromkeys(STRATEGIES, 0.0)
+    for rider in sorted(RIDER_POLICIES):
+        margins = {}
+        for strategy in STRATEGIES:
+            result = simulate(args.episodes, rider, args.workers, seed=1, strategy=strategy)
+            margins[strategy] = margin(result)
+            totals[strategy] += margins[strategy]
+            median = quantile(result.ratio_buckets, 0.5) if result.deals else None
+            print(f"{rider:<10}{strategy:<10}{result.deals / result.episodes:>8.1%}"
+                  f"{'-' if median is None else f'{median * RATIO_BUCKET:.2f}x':>9}{margins[strategy]:>9.3f}")
+        print(f"{'':<10}{'':<10}{'':>8}{'':>9}{margins['opponent'] - margins['legacy']:>+9.3f}\n")
+    print("margin summed over riders: " + ", ".join(f"{name} {total:.3f}" for name, total in totals.items()))
+
+    reloaded = PricingPolicy({"fare": {"haggling_factor": BANGALORE.haggling_factor + 0.1}})
+    start = time.perf_counter()
+    load_strategy("opponent").for_policy(reloaded)
+    refit_ms = (time.perf_counter() - start) * 1e3
+    legacy, opponent = (decision_ns(load_strategy(name), args.calls) for name in STRATEGIES)
+    print(f"decision:  legacy {legacy:.0f} ns, opponent table lookup {opponent:.0f} ns; "
+          f"table re-solved for a new haggling factor in {refit_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
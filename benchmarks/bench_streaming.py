@@ -0,0 +1,77 @@
+"""End-of-speech to text latency: streaming utterances vs whole-file transcription
+
+test.mp3 is replayed at real-time speed: each 20 ms chunk becomes available
+only when it would have been spoken. Chunks that arrive while the model is
+busy queue up, as they would from a microphone. For every final transcript
+the latency is the time from the end of that utterance's speech to the
+transcript being emitted. The whole-file baseline cannot start until the
+recording ends, so each utterance waits for the rest of the file plus one
+full transcription.
+
+Run from the repository root (needs whisper and ffmpeg):
+    python -m benchmarks.bench_streaming --clip test.mp3
+"""
+import argparse
+import statistics
+import time
+
+from speech_to_text import SAMPLE_RATE, decode_audio, load_model, transcribe_audio
+from streaming import FRAME_MS, StreamingTranscriber
+
+
+def replay_realtime(transcriber, samples):
+    """Feed samples as they become due on the wall clock; return (transcript, emitted at) pairs"""
+    chunk = SAMPLE_RATE * FRAME_MS // 1000
+    emitted = []
+    start = time.perf_counter()
+    fed = 0
+    while fed < len(samples):
+        due = min(len(samples), int((time.perf_counter() - start) * SAMPLE_RATE))
+        if due - fed < chunk and due < len(samples):
+            time.sleep(max(0.0, (fed + chunk) / SAMPLE_RATE - (time.perf_counter() - start)))
+            continue
+        for transcript in transcriber.feed(samples[fed:due]):
+            emitted.append((transcript, time.perf_counter() - start))
+        fed = due
+    for transcript in transcriber.flush():
+        emitted.append((transcript, time.perf_counter() - start))
+    return emitted
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clip", default="test.mp3")
+    parser.add_argument("--no-partials", action="store_true")
+    args = parser.parse_args()
+
+    samples = decode_audio(args.clip)
+    duration = len(samples) / SAMPLE_RATE
+    model = load_model()
+    transcribe_audio(model, samples[:SAMPLE_RATE])  # warm up, as a live server would be
+
+    start = time.perf_counter()
+    transcribe_audio(model, samples)
+    whole_file = time.perf_counter() - start
+
+    transcriber = StreamingTranscriber(model, partial_every=0 if args.no_partials else 1.0)
+    emitted = replay_realtime(transcriber, samples)
+
+    print(f"clip: {args.clip} ({duration:.1f} s), whole-file transcription {whole_file * 1000:.0f} ms")
+    latencies, baseline = [], []
+    for transcript, at in emitted:
+        if transcript.kind == "final":
+            latencies.append(at - transcript.end)
+            baseline.append(duration - transcript.end + whole_file)
+        print(f"  {transcript.kind:<7} speech {transcript.start:6.2f}-{transcript.end:6.2f} s  "
+              f"emitted at {at:6.2f} s  {transcript.text}")
+    if not latencies:
+        raise SystemExit("no utterances detected")
+    print(f"utterances:              {len(latencies)}")
+    print(f"streaming latency:       p50 {statistics.median(latencies) * 1000:7.0f} ms   "
+          f"max {max(latencies) * 1000:7.0f} ms")
+    print(f"whole-file latency:      p50 {statistics.median(baseline) * 1000:7.0f} ms   "
+          f"max {max(baseline) * 1000:7.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Cold start vs warm transcription latency
+
+Cold: a fresh `python speech_to_text.py CLIP` per request, which loads the
+model every time (the old way). Warm: POSTs to a running
+transcription_server.py, which this script starts and waits for.
+
+Run from the repository root (needs whisper and ffmpeg):
+    python -m benchmarks.bench_transcription_server --clip test.mp3 --requests 10
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+
+def cold_latencies(clip, runs):
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "speech_to_text.py", clip], check=True, stdout=subprocess.DEVNULL)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def wait_until_ready(url, process, timeout=600):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise SystemExit("transcription server exited during startup")
+        try:
+            with urllib.request.urlopen(url + "/health", timeout=1) as response:
+                if json.load(response)["ready"]:
+                    return
+        except (urllib.error.URLError, ConnectionError):
+            pass
+        time.sleep(0.2)
+    raise SystemExit("transcription server did not become ready")
+
+
+def warm_latencies(url, clip, runs):
+    with open(clip, "rb") as f:
+        audio = f.read()
+    latencies, server_timings = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        request = urllib.request.Request(url + "/transcribe", data=audio, method="POST")
+        with urllib.request.urlopen(request) as response:
+            payload = json.load(response)
+        latencies.append(time.perf_counter() - start)
+        server_timings.append(payload["timings_ms"])
+    return latencies, server_timings
+
+
+def summary(label, latencies):
+    print(f"{label:<22} mean {statistics.mean(latencies) * 1000:8.0f} ms   "
+          f"p50 {statistics.median(latencies) * 1000:8.0f} ms   max {max(latencies) * 1000:8.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clip", default="test.mp3")
+    parser.add_argument("--requests", type=int, default=10, help="warm requests")
+    parser.add_argument("--cold-runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    summary("cold (per process)", cold_latencies(args.clip, args.cold_runs))
+
+    url = f"http://127.0.0.1:{args.port}"
+    start = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "transcription_server.py", "--port", str(args.port),
+                               "--workers", str(args.workers)], stdout=subprocess.DEVNULL)
+    try:
+        wait_until_ready(url, server)
+        print(f"{'server startup':<22} {time.perf_counter() - start:8.1f} s (paid once)")
+        latencies, timings = warm_latencies(url, args.clip, args.requests)
+        summary("warm (server)", latencies)
+        for stage in ("queue", "decode", "transcribe"):
+            print(f"  server {stage:<13} mean {statistics.mean(t[stage] for t in timings):8.0f} ms")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Load generator: turns/sec and turn latency for many concurrent negotiations
+
+Run from the repository root:
+    python -m benchmarks.load_negotiation --sessions 10000
+    python -m benchmarks.load_negotiation --sessions 2000 --tcp
+    python -m benchmarks.load_negotiation --sessions 10000 --connect 127.0.0.1:8765
+
+Latency is measured from the moment a rider *intended* to speak (end of its
+think time) to the moment the reply arrives, so event-loop lag under load is
+counted instead of hidden. Over TCP, a reply that takes longer than
+--timeout to arrive (a connection the server never accepted, say) stops
+the run with an error instead of leaving it waiting forever.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+
+from game import BANGALORE
+from negotiation_server import NegotiationHub, serve
+
+# Every scripted rider ends with an unconditional "ok", which always closes the deal
+SCRIPT_TAIL = ("100", "nahi", "120", "130", "140", "150", "ok")
+
+
+def rider_script(rng):
+    """Utterances for one rider: a known destination followed by a haggle"""
+    destination = rng.choice(list(BANGALORE.areas))
+    return (f"{destination} jana hai",) + SCRIPT_TAIL
+
+
+async def inproc_rider(hub, rng, think, latencies):
+    session_id, _ = hub.open()
+    for utterance in rider_script(rng):
+        intended = time.perf_counter() + rng.uniform(0, think)
+        await asyncio.sleep(intended - time.perf_counter())
+        reply = hub.turn(session_id, utterance)
+        latencies.append(time.perf_counter() - intended)
+        if reply.status != "continue":
+            break
+
+
+async def read_reply(reader, timeout, what):
+    try:
+        line = await asyncio.wait_for(reader.readline(), timeout)
+    except asyncio.TimeoutError:
+        raise TimeoutError(f"no {what} from the server within {timeout:g} s") from None
+    if not line:
+        raise ConnectionError(f"server closed the connection before the {what}")
+    return json.loads(line)
+
+
+async def tcp_rider(host, port, rng, think, latencies, timeout):
+    reader, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    try:
+        await read_reply(reader, timeout, "opening line")
+        for utterance in rider_script(rng):
+            intended = time.perf_counter() + rng.uniform(0, think)
+            await asyncio.sleep(intended - time.perf_counter())
+            writer.write((json.dumps({"text": utterance}) + "\n").encode())
+            await writer.drain()
+            reply = await read_reply(reader, timeout, "reply")
+            latencies.append(time.perf_counter() - intended)
+            if reply["status"] != "continue":
+                break
+    finally:
+        writer.close()
+
+
+def raise_fd_limit(needed):
+    """Lift the soft open-file limit toward `needed`; raises OSError if the hard limit is too low"""
+    try:
+        import resource
+    except ImportError:  # Not on Unix: nothing to adjust
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard != resource.RLIM_INFINITY and needed > hard:
+        raise OSError(f"{needed:,} open files needed but the limit is {hard:,}: "
+                      "run fewer sessions, or the server in its own process (--connect)")
+    if needed > soft:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (needed, hard))
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run(args):
+    rng = random.Random(args.seed)
+    latencies = []
+    server = None
+
+    if args.connect or args.tcp:
+        # One socket per rider, and one more on the server side when it runs here
+        raise_fd_limit(args.sessions * (2 if args.tcp else 1) + 64)
+    if args.connect:
+        host, port = args.connect.rsplit(":", 1)
+        port = int(port)
+    elif args.tcp:
+        server = await serve("127.0.0.1", 0)
+        host, port = server.sockets[0].getsockname()[:2]
+    else:
+        hub = NegotiationHub(transcript_log=args.transcript_log)
+
+    riders = []
+    for _ in range(args.sessions):
+        rider_rng = random.Random(rng.getrandbits(64))
+        if args.connect or args.tcp:
+            riders.append(tcp_rider(host, port, rider_rng, args.think, latencies, args.timeout))
+        else:
+            riders.append(inproc_rider(hub, rider_rng, args.think, latencies))
+
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*riders)
+    finally:
+        if server is not None:
+            server.close()
+            await server.wait_closed()
+    elapsed = time.perf_counter() - start
+    return latencies, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10000, help="concurrent rider sessions")
+    parser.add_argument("--think", type=float, default=4.0, help="max rider think time per turn (s)")
+    parser.add_argument("--tcp", action="store_true", help="go through an in-process TCP server")
+    parser.add_argument("--connect", metavar="HOST:PORT", help="drive an already running server")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds to wait for a TCP reply before failing")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--transcripts", metavar="PATH", help="log in-process sessions for replay.py")
+    args = parser.parse_args()
+
+    args.transcript_log = open(args.transcripts, "w", encoding="utf-8") if args.transcripts else None
+    try:
+        latencies, elapsed = asyncio.run(run(args))
+    except (OSError, asyncio.TimeoutError) as e:
+        sys.exit(f"❌ {e or type(e).__name__}")
+    finally:
+        if args.transcript_log is not None:
+            args.transcript_log.close()
+    latencies.sort()
+    transport = "tcp" if (args.tcp or args.connect) else "in-process"
+    print(f"transport:         {transport}")
+    print(f"sessions:          {args.sessions:,}")
+    print(f"turns:             {len(latencies):,}")
+    print(f"wall time:         {elapsed:.2f} s")
+    print(f"turns/sec:         {len(latencies) / elapsed:,.0f}")
+    for pct in (50, 95, 99):
+        print(f"p{pct} latency:       {percentile(latencies, pct) * 1000:.2f} ms")
+    print(f"max latency:       {latencies[-1] * 1000 if latencies else 0:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""Regression gate for the negotiation hot path: turn latency and memory against stored baselines
+
+The recorded dialogue corpus (benchmarks/data/dialogues.jsonl, sessions in
+replay.py's transcript format, in every language) is replayed turn by turn, and every reply
+must still match the recording. Cases:
+
+    destination          a rider's first utterance (process_destination)
+    negotiation          every later turn (process_negotiation)
+    session              a whole session: new game, greeting and every turn
+    safe_format          one reply template filled in
+    get_unique_response  one fresh reply picked
+    session_peak_bytes   most memory a session has allocated at once (tracemalloc)
+
+Each time is a mean per call over the fastest of --repeats runs in each of
+--processes fresh interpreters: per session for the corpus cases, per
+burst of 1000 calls for the others, so that a moment of load on the
+machine only spoils what it hit. A case
+fails when it is more than --threshold (memory: --memory-threshold) over
+its baseline; on a busy shared machine, raise --repeats before trusting
+a failure. Baselines are committed in benchmarks/data/baselines.json and
+are best compared on the machine that saved them: save them again (--update)
+on a new machine or after an intended change in speed. A missing baselines
+file, or a case it has no baseline for, fails the run unless --update is
+given. --record rebuilds the corpus from the simulated riders and the
+free-form utterances in benchmarks/data/utterances.txt.
+
+The gate is also a pytest test (tests/test_regress.py), skipped unless
+NEGOTIATE_REGRESS is set, since it takes minutes and wants a quiet machine.
+
+Run from the repository root:
+    python -m benchmarks.regress
+    python -m benchmarks.regress --update
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import random
+import time
+import tracemalloc
+
+from game import BANGALORE, BangaloreAutoGame, fixed_clock, greet, step
+from negotiation_server import NegotiationHub
+from profile_corpus import DEFAULT_CORPUS, read_corpus
+from responses import LANGUAGES
+from simulate import MAX_TURNS, RIDER_POLICIES, ScriptedRider
+
+DATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+BASELINES = os.path.join(DATA, "baselines.json")
+UTTERANCES = os.path.join(DATA, "utterances.txt")
+
+VALUES = {"price": 180, "condition": "traffic high", "traffic": "high", "weather": "rainy"}
+
+
+def record(path, sessions, seed):
+    """Write a corpus of `sessions` dialogues: each simulated rider policy in turn, plus free-form chatter,
+    in every language"""
+    with open(UTTERANCES, encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    rng = random.Random(seed)
+    policies = sorted(RIDER_POLICIES) + ["chatter"]
+    with open(path, "w", encoding="utf-8") as log:
+        hub = NegotiationHub(transcript_log=log)
+        for i in range(sessions):
+            policy = policies[i % len(policies)]
+            rider = RIDER_POLICIES.get(policy) or ScriptedRider(rng.choices(lines, k=rng.randint(2, 8)))
+            session_id, _ = hub.open(LANGUAGES[i % len(LANGUAGES)])
+            session = hub.sessions[session_id]
+            destination = rng.choice([area for area in BANGALORE.areas if area != session.current_location])
+            reply = hub.turn(session_id, f"{destination} jana hai")
+            turn = 0
+            while reply.status == "continue" and turn < MAX_TURNS:
+                reply = hub.turn(session_id, rider.respond(session, turn))
+                turn += 1
+            hub.close(session_id)
+
+
+def time_sessions(records):
+    """[destination turn ns, later turns ns, whole session ns] per session, and replies that differ from the corpus"""
+    perf = time.perf_counter_ns
+    timings = []
+    wrong = 0
+    for record in records:
+        begun = perf()
+        session = BangaloreAutoGame(seed=record["seed"], clock=fixed_clock(record["hour"]),
+                                    language=record.get("language"))
+        wrong += greet(session).text != record["greeting"]
+        first = later = 0
+        for user_text, expected in record["turns"]:
+            is_first = not session.destination
+            start = perf()
+            text = step(session, user_text).text
+            took = perf() - start
+            wrong += text != expected
+            if is_first:
+                first += took
+            else:
+                later += took
+        timings.append([first, later, perf() - begun])
+    return timings, wrong
+
+
+def time_calls(func, calls, burst=1000):
+    """ns per call of the fastest burst of `burst` calls"""
+    best = None
+    for _ in range(max(1, calls // burst)):
+        start = time.perf_counter_ns()
+        for _ in range(burst):
+            func()
+        took = time.perf_counter_ns() - start
+        best = took if best is None else min(best, took)
+    return best / burst
+
+
+def session_peak_bytes(records):
+    """Mean over the corpus of the peak bytes traced while one session plays out"""
+    total = 0
+    tracemalloc.start()
+    try:
+        for record in records:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            session = BangaloreAutoGame(seed=record["seed"], clock=fixed_clock(record["hour"]),
+                                        language=record.get("language"))
+            greet(session)
+            for user_text, _ in record["turns"]:
+                step(session, user_text)
+            _, peak = tracemalloc.get_traced_memory()
+            total += peak - before
+            del session
+    finally:
+        tracemalloc.stop()
+    return total / max(1, len(records))
+
+
+def measure(records, repeats, calls):
+    """Every case's value for this run, and the number of replies that differ from the corpus"""
+    session = BangaloreAutoGame(seed=1, clock=fixed_clock(9))
+    template = next(text for text in BANGALORE.responses["price_medium"] if "{price}" in text)
+    time_sessions(records[:10])  # Warm up caches and first-call paths
+    # Each session keeps its fastest run, so a burst of load on the machine
+    # only spoils the sessions it hit in one of the runs
+    fastest, wrong = time_sessions(records)
+    best = {"safe_format": time_calls(lambda: session.safe_format(template, **VALUES), calls),
+            "get_unique_response": time_calls(lambda: session.get_unique_response("price_medium"), calls)}
+    for _ in range(repeats - 1):
+        gc.collect()
+        timings, _ = time_sessions(records)
+        for kept, timing in zip(fastest, timings):
+            kept[:] = map(min, kept, timing)
+        best["safe_format"] = min(best["safe_format"],
+                                  time_calls(lambda: session.safe_format(template, **VALUES), calls))
+        best["get_unique_response"] = min(best["get_unique_response"],
+                                          time_calls(lambda: session.get_unique_response("price_medium"), calls))
+    first_turns = sum(bool(record["turns"]) for record in records)
+    later_turns = sum(len(record["turns"]) for record in records) - first_turns
+    best["destination"] = sum(timing[0] for timing in fastest) / max(1, first_turns)
+    best["negotiation"] = sum(timing[1] for timing in fastest) / max(1, later_turns)
+    best["session"] = sum(timing[2] for timing in fastest) / max(1, len(records))
+    best["session_peak_bytes"] = session_peak_bytes(records)
+    return best, wrong
+
+
+def measure_in_fresh_process(corpus, repeats, calls):
+    # Pool worker: the corpus is read where it is replayed
+    return measure(read_corpus(corpus), repeats, calls)
+
+
+def machine():
+    return f"{platform.machine()} {platform.processor() or platform.system()} python {platform.python_version()}"
+
+
+def compare(results, baselines, threshold, memory_threshold):
+    """Report lines for every case and the names of those over their allowed change or without a baseline
+
+    `baselines` is the "cases" table of a baselines file, or None to only
+    list the results. Memory cases (names ending in _bytes) get
+    `memory_threshold`, time cases `threshold`.
+    """
+    failed = []
+    lines = [f"{'case':<22}{'now':>12}{'baseline':>12}{'change':>9}"]
+    for name, value in results.items():
+        unit, allowed = ("B", memory_threshold) if name.endswith("_bytes") else ("ns", threshold)
+        line = f"{name:<22}{value:>10,.0f}{unit:>2}"
+        base = baselines.get(name) if baselines is not None else None
+        if base:
+            change = value / base - 1
+            line += f"{base:>10,.0f}{unit:>2}{change:>+9.1%}"
+            if change > allowed:
+                failed.append(name)
+                line += f"  ❌ over +{allowed:.0%}"
+        elif baselines is not None:
+            failed.append(name)
+            line += "  ❌ no baseline"
+        lines.append(line)
+    return lines, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--baselines", default=BASELINES)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--processes", type=int, default=3, help="fresh interpreters the runs are spread over")
+    parser.add_argument("--calls", type=int, default=100000, help="calls per run of the single-function cases")
+    parser.add_argument("--threshold", type=float, default=0.1, help="allowed slow-down over a baseline time")
+    parser.add_argument("--memory-threshold", type=float, default=0.05, help="allowed growth of session memory")
+    parser.add_argument("--update", "--save", action="store_true",
+                        help="store this run as the baselines instead of checking against them")
+    parser.add_argument("--record", type=int, metavar="SESSIONS", default=None,
+                        help="rebuild the corpus with this many dialogues first")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    baselines = None
+    try:
+        with open(args.baselines, encoding="utf-8") as f:
+            baselines = json.load(f)
+    except FileNotFoundError:
+        if not args.update:
+            raise SystemExit(f"❌ no baselines at {args.baselines}: run with --update to save this machine's")
+    if args.record:
+        record(args.corpus, args.record, args.seed)
+        print(f"📼 recorded {args.record} dialogues -> {args.corpus}")
+    records = read_corpus(args.corpus)
+    turns = sum(len(record["turns"]) for record in records)
+    print(f"{len(records)} sessions, {turns} rider turns from {args.corpus}\n")
+    if baselines is not None and baselines["machine"] != machine():
+        print(f"⚠️ baselines were saved on {baselines['machine']}, this is {machine()}\n")
+
+    # How fast the same code runs differs from one interpreter process to the
+    # next by more than within one, so each case keeps its best over a few
+    # fresh processes (started one at a time, not to compete with each other)
+    with multiprocessing.get_context("spawn").Pool(1, maxtasksperchild=1) as pool:
+        runs = pool.starmap(measure_in_fresh_process, [(args.corpus, args.repeats, args.calls)] * args.processes)
+    results = {name: min(run[name] for run, _ in runs) for name in runs[0][0]}
+    wrong = max(wrong for _, wrong in runs)
+
+    lines, failed = compare(results, baselines["cases"] if baselines else None, args.threshold, args.memory_threshold)
+    print("\n".join(lines))
+    if wrong:
+        print(f"\n❌ {wrong} replies differ from the recorded corpus")
+    if wrong or (failed and not args.update):
+        raise SystemExit(1)
+    if args.update:
+        with open(args.baselines, "w", encoding="utf-8") as f:
+            json.dump({"machine": machine(), "cases": {name: round(value) for name, value in results.items()}}, f,
+                      indent=2)
+            f.write("\n")
+        print(f"\n💾 baselines saved to {args.baselines}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import json
+import os
+import re
+import time
+from functools import lru_cache
+from typing import Optional
+
+from intent import classify
+
+# One JSON object per line, one line per turn (the greeting included), with
+# the session's conditions repeated on every line so that any event can be
+# analysed on its own and the log maps straight onto columns (analytics.py).
+#   session   id the server gave the session (the seed for simulated ones)
+#   ts        wall-clock seconds when the turn was played
+#   seed, hour, traffic, weather, mood             conditions, fixed per session
+#   destination, distance, quote, minimum          null until a destination is known
+#   offer     amount the rider named this turn, if any
+#   price     driver's price after the turn
+#   rounds    offers the driver has weighed so far
+#   status    "continue", "done" or "exit"
+
+
+# Conditions and statuses are fixed identifiers, so the line is filled in
+# from a template instead of going through json.dumps, at a third of the cost
+_TEMPLATE = ('{{"session":{},"ts":{:.3f},"seed":{},"hour":{},"traffic":"{}","weather":"{}","mood":"{}",'
+             '"destination":{},"distance":{},"quote":{},"minimum":{},"offer":{},"price":{},"rounds":{},'
+             '"status":"{}"}}')
+
+# Amounts always contain a digit; most utterances can skip the intent pattern
+_DIGIT = re.compile(r"\d")
+
+
+@lru_cache(maxsize=65536)
+def _string(text):
+    return json.dumps(text, ensure_ascii=False)
+
+
+# Offers repeat a lot ("300", "250 ok"), so their parses are worth keeping
+@lru_cache(maxsize=4096)
+def _offer(text):
+    return classify(text).amount if _DIGIT.search(text) else None
+
+
+def _value(value):
+    return "null" if value is None else value
+
+
+def encode_turn(session_id, session, user_text=None, status="continue", ts=None) -> str:
+    """The JSON line for one turn of `session`, read off its state after the turn"""
+    offer = _offer(user_text) if user_text else None
+    return _TEMPLATE.format(
+        session_id, time.time() if ts is None else ts, _value(session.seed), session.time, session.traffic_level,
+        session.weather, session.driver_mood,
+        "null" if session.destination is None else _string(session.destination),
+        "null" if session.distance is None else f"{session.distance:.3f}",
+        _value(session.base_price), _value(session.min_price), _value(offer), _value(session.current_price),
+        session.negotiation_rounds, status)
+
+
+# Append-only event log. Events are encoded as they come but written in
+# batches: one write(2) per `buffer_events` events on an O_APPEND descriptor,
+# so several processes can share one file and lines never interleave. A crash
+# loses at most the unflushed batch.
+class EventLog:
+    def __init__(self, path, buffer_events=512):
+        self.path = path
+        self.buffer_events = buffer_events
+        self._fd: Optional[int] = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._lines = []
+        self.written = 0
+
+    def turn(self, session_id, session, user_text=None, status="continue"):
+        """Log a turn (user_text None for the greeting) once step() has applied it"""
+        self._lines.append(encode_turn(session_id, session, user_text, status))
+        if len(self._lines) >= self.buffer_events:
+            self.flush()
+
+    def flush(self):
+        if self._lines:
+            data = ("\n".join(self._lines) + "\n").encode("utf-8")
+            self.written += len(self._lines)
+            self._lines = []
+            view = memoryview(data)
+            while view:
+                view = view[os.write(self._fd, view):]
+
+    def close(self):
+        if self._fd is not None:
+            self.flush()
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,113 @@
+from itertools import product
+from typing import List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from game import BANGALORE
+from geo import EARTH_RADIUS_KM
+
+
+class FareConditions(NamedTuple):
+    """Everything besides distance that moves a quote"""
+    traffic: str
+    weather: str
+    mood: str
+    night: bool = False
+
+
+def all_conditions(city=BANGALORE) -> List[FareConditions]:
+    """Every traffic × weather × mood × day/night combination the city model knows"""
+    return [FareConditions(*combo) for combo in product(city.traffic_multipliers,
+                                                         city.weather_multipliers,
+                                                         city.mood_multipliers,
+                                                         (False, True))]
+
+
+def _derived(city, key, build):
+    """city.derived[key], built on first use; cities cloned with another policy or strategy share it"""
+    value = city.derived.get(key)
+    if value is None:
+        value = city.derived[key] = build(city)
+    return value
+
+
+def distance_matrix(city=BANGALORE):
+    """Area-to-area distances in city.areas order for a grid city, computed once per set of areas
+
+    Geo and road cities have no such matrix: ask pair_distances for the
+    pairs you need instead.
+    """
+    if city.geo is not None or city.roads is not None:
+        raise ValueError(f"{city.name} has geo or road distances; use pair_distances")
+    return _derived(city, "distance_matrix", _grid_matrix)
+
+
+def _grid_matrix(city):
+    coords = np.array(list(city.areas.values()), dtype=np.float64)
+    delta = coords[:, None, :] - coords[None, :, :]
+    # Same operations as calculate_distance so both paths agree bit for bit
+    matrix = np.sqrt(delta[..., 0] ** 2 + delta[..., 1] ** 2)
+    matrix.setflags(write=False)
+    return matrix
+
+
+def _area_index(city):
+    if city.geo is not None:
+        return city.geo.index
+    return _derived(city, "area_index", lambda city: {name: i for i, name in enumerate(city.areas)})
+
+
+def _road_order(city):
+    return _derived(city, "road_order",
+                    lambda city: np.array([city.roads.index[name] for name in city.areas], dtype=np.intp))
+
+
+def pair_distances(city, rows, cols) -> np.ndarray:
+    """rows × cols distances; geo and road cities are computed per pair, never as a full n × n matrix"""
+    if city.roads is not None:
+        # Straight off the mapped file, rows/cols translated to the matrix's own order
+        order = _road_order(city)
+        return city.roads.array()[np.ix_(order[rows], order[cols])].astype(np.float64)
+    if city.geo is None:
+        return distance_matrix(city)[np.ix_(rows, cols)]
+    lat = np.radians(np.frombuffer(city.geo.lat, dtype=np.float64))
+    lon = np.radians(np.frombuffer(city.geo.lon, dtype=np.float64))
+    # geo.haversine_km, vectorised with the same operations
+    phi1, phi2 = lat[rows][:, None], lat[cols][None, :]
+    a = (np.sin((phi2 - phi1) / 2) ** 2
+         + np.cos(phi1) * np.cos(phi2) * np.sin((lon[cols][None, :] - lon[rows][:, None]) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def quote_batch(origins: Sequence[str], destinations: Sequence[str],
+                conditions: Sequence[FareConditions], city=BANGALORE) -> Tuple[np.ndarray, np.ndarray]:
+    """Quoted and minimum prices for every origin × destination × condition
+
+    Both arrays have shape (len(origins), len(destinations), len(conditions))
+    and hold exactly what BangaloreAutoGame.calculate_price returns for the
+    same trip, including its rounding to multiples of 10.
+    """
+    index = _area_index(city)
+    rows = np.array([index[name] for name in origins], dtype=np.intp)
+    cols = np.array([index[name] for name in destinations], dtype=np.intp)
+    distance = pair_distances(city, rows, cols)[..., None]
+
+    night = np.array([city.night_multiplier if c.night else 1.0 for c in conditions])
+    traffic = np.array([city.traffic_multipliers[c.traffic] for c in conditions])
+    weather = np.array([city.weather_multipliers[c.weather] for c in conditions])
+    mood = np.array([city.mood_multipliers[c.mood] for c in conditions])
+
+    # Multiply in the same order as the scalar path; float rounding depends on it
+    raw_price = city.base_fare + (distance * city.rate_per_km)
+    raw_price = raw_price * night
+    raw_price = raw_price * traffic
+    raw_price = raw_price * weather
+    raw_price = raw_price * mood
+
+    # np.round rounds half to even, exactly like Python's round()
+    quoted = np.round(raw_price * city.haggling_factor / 10) * 10
+    off_grid = (quoted % 10 != 0) & (quoted % 5 != 0)
+    quoted = np.where(off_grid, np.round(quoted / 5) * 5, quoted)
+    minimum = np.maximum(city.base_fare, np.round(raw_price / 10) * 10)
+
+    return quoted.astype(np.int64), minimum.astype(np.int64)
@@ -0,0 +1,231 @@
+import argparse
+import math
+import random
+import sys
+import threading
+from array import array
+from datetime import datetime
+from typing import Dict, Hashable, List, NamedTuple, Set, Tuple
+
+from game import BANGALORE
+from geo import KM_PER_DEGREE
+from pricing_policy import MOODS, TRAFFIC_LEVELS, WEATHER
+
+
+class DriverQuote(NamedTuple):
+    """One nearby driver's price for the rider's trip"""
+    driver: Hashable
+    pickup_km: float
+    mood: str
+    quoted: int
+    minimum: int
+
+
+# Drivers on the move, bucketed into a grid of `cell_km` squares.
+#
+# Positions are given in the city's own coordinates ((x, y) on the toy grid,
+# (lat, lon) for geo data) and projected to flat km when they are set; over
+# a city the projection is off by well under 1%. Driver state is stored
+# column-wise by row (rows of drivers that leave are reused), and cells are
+# dict entries holding sets of rows, so drivers can roam anywhere and a move
+# touches at most the two cells involved. One lock makes updates and
+# queries safe to run from several threads.
+class Fleet:
+    def __init__(self, city=BANGALORE, cell_km=0.5, clock=datetime.now):
+        self.city = city
+        self.cell_km = cell_km
+        self.clock = clock
+        if city.geo is not None:
+            middle = math.radians((city.geo.min_lat + city.geo.max_lat) / 2)
+            self._scale = (KM_PER_DEGREE, KM_PER_DEGREE * math.cos(middle))
+        else:
+            self._scale = (1.0, 1.0)
+        self.x = array('d')
+        self.y = array('d')
+        self.ids: List[Hashable] = []
+        self.moods: List[str] = []
+        self.cells: List[Tuple[int, int]] = []
+        self.rows: Dict[Hashable, int] = {}
+        self.grid: Dict[Tuple[int, int], Set[int]] = {}
+        # Cell index range ever occupied; bounds a search with no radius
+        self._bounds = None
+        self._free: List[int] = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, driver):
+        return driver in self.rows
+
+    def _project(self, point):
+        return point[0] * self._scale[0], point[1] * self._scale[1]
+
+    def _cell(self, x, y):
+        return int(x // self.cell_km), int(y // self.cell_km)
+
+    def update(self, driver, point, mood=None):
+        """Add a driver or move one to `point`; a mood left out stays as it was ("neutral" for new drivers)"""
+        if mood is not None and mood not in MOODS:
+            raise ValueError(f"unknown mood {mood!r}; expected one of {', '.join(MOODS)}")
+        x, y = self._project(point)
+        cell = self._cell(x, y)
+        with self._lock:
+            row = self.rows.get(driver)
+            if row is None:
+                if self._free:
+                    row = self._free.pop()
+                    self.x[row], self.y[row] = x, y
+                    self.ids[row], self.moods[row], self.cells[row] = driver, mood or "neutral", cell
+                else:
+                    row = len(self.ids)
+                    self.x.append(x)
+                    self.y.append(y)
+                    self.ids.append(driver)
+                    self.moods.append(mood or "neutral")
+                    self.cells.append(cell)
+                self.rows[driver] = row
+            else:
+                self.x[row], self.y[row] = x, y
+                if mood is not None:
+                    self.moods[row] = mood
+                if self.cells[row] == cell:
+                    return
+                self._leave(row)
+                self.cells[row] = cell
+            self.grid.setdefault(cell, set()).add(row)
+            if self._bounds is None:
+                self._bounds = [cell[0], cell[0], cell[1], cell[1]]
+            else:
+                bounds = self._bounds
+                bounds[0], bounds[1] = min(bounds[0], cell[0]), max(bounds[1], cell[0])
+                bounds[2], bounds[3] = min(bounds[2], cell[1]), max(bounds[3], cell[1])
+
+    def place(self, driver, area, mood=None):
+        """Put a driver at a named area of the city"""
+        self.update(driver, self.city.areas[area], mood)
+
+    def remove(self, driver):
+        """Take a driver off the map (gone offline or hired); unknown drivers are ignored"""
+        with self._lock:
+            row = self.rows.pop(driver, None)
+            if row is not None:
+                self._leave(row)
+                self.ids[row] = None
+                self._free.append(row)
+
+    def _leave(self, row):
+        members = self.grid[self.cells[row]]
+        members.discard(row)
+        if not members:
+            del self.grid[self.cells[row]]
+
+    def _search(self, point, k, radius_km) -> List[Tuple[float, int]]:
+        # Ring search outwards from the query's cell, as in GeoPoints.nearest.
+        # Call with the lock held.
+        x, y = self._project(point)
+        row, col = self._cell(x, y)
+        if self._bounds is None or k <= 0:
+            return []
+        low_row, high_row, low_col, high_col = self._bounds
+        last = max(row - low_row, high_row - row, col - low_col, high_col - col, 0)
+        if radius_km is not None:
+            last = min(last, int(radius_km // self.cell_km) + 1)
+        limit = math.inf if radius_km is None else radius_km
+        xs, ys, grid = self.x, self.y, self.grid
+        best: List[Tuple[float, int]] = []
+        for ring in range(last + 1):
+            for cell in _ring(row, col, ring):
+                members = grid.get(cell)
+                if members:
+                    for driver in members:
+                        km = math.hypot(xs[driver] - x, ys[driver] - y)
+                        if km <= limit:
+                            best.append((km, driver))
+            if len(best) >= k:
+                best.sort()
+                del best[k:]
+                # Drivers beyond this ring are at least `ring` whole cells away
+                if best[-1][0] <= ring * self.cell_km:
+                    break
+        best.sort()
+        return best[:k]
+
+    def nearest(self, point, k=10, radius_km=None) -> List[Tuple[Hashable, float]]:
+        """(driver, km) for the k drivers closest to `point`, nearest first"""
+        with self._lock:
+            return [(self.ids[row], km) for km, row in self._search(point, k, radius_km)]
+
+    def quotes(self, pickup, destination, k=10, radius_km=None, traffic="medium", weather="clear",
+               hour=None) -> List[DriverQuote]:
+        """Quotes from the k drivers nearest to the pickup area for one trip, cheapest first
+
+        Every price is what BangaloreAutoGame.calculate_price gives a driver
+        in that mood under the same conditions. Ties go to the closer driver.
+        """
+        city = self.city
+        for area in (pickup, destination):
+            if area not in city.areas:
+                raise ValueError(f"unknown area: {area!r}")
+        if traffic not in TRAFFIC_LEVELS or weather not in WEATHER:
+            raise ValueError(f"unknown conditions: traffic {traffic!r}, weather {weather!r}")
+        hour = self.clock().hour if hour is None else hour
+        distance = city.distance(pickup, destination)
+        # The trip and conditions are the same for everyone, so drivers only
+        # differ by mood: the policy is evaluated once per mood, not per driver
+        prices = {mood: city.policy.quote(distance, hour, traffic, weather, mood) for mood in MOODS}
+        with self._lock:
+            found = [(self.ids[row], km, self.moods[row])
+                     for km, row in self._search(city.areas[pickup], k, radius_km)]
+        ranked = [DriverQuote(driver, km, mood, *prices[mood]) for driver, km, mood in found]
+        ranked.sort(key=lambda quote: (quote.quoted, quote.pickup_km))
+        return ranked
+
+
+def _ring(row, col, ring):
+    # Cells at Chebyshev distance `ring` from (row, col); the grid is unbounded
+    if ring == 0:
+        yield row, col
+        return
+    for c in range(col - ring, col + ring + 1):
+        yield row - ring, c
+        yield row + ring, c
+    for r in range(row - ring + 1, row + ring):
+        yield r, col - ring
+        yield r, col + ring
+
+
+def scatter(fleet: Fleet, count, rng: random.Random, spread_km=1.0):
+    """Add `count` drivers ("driver-0", ...) around random areas of the fleet's city, in random moods"""
+    areas = list(fleet.city.areas)
+    scale_a, scale_b = fleet._scale
+    for i in range(count):
+        a, b = fleet.city.areas[rng.choice(areas)]
+        point = (a + rng.gauss(0, spread_km) / scale_a, b + rng.gauss(0, spread_km) / scale_b)
+        fleet.update(f"driver-{i}", point, rng.choice(MOODS))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quote a trip from the drivers nearest to the rider")
+    parser.add_argument("pickup")
+    parser.add_argument("destination")
+    parser.add_argument("--drivers", type=int, default=2000, help="drivers scattered over the city")
+    parser.add_argument("-k", type=int, default=10, help="drivers to ask")
+    parser.add_argument("--radius", type=float, default=None, help="only drivers within this many km")
+    parser.add_argument("--traffic", default="medium", choices=TRAFFIC_LEVELS)
+    parser.add_argument("--weather", default="clear", choices=WEATHER)
+    parser.add_argument("--hour", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    fleet = Fleet()
+    scatter(fleet, args.drivers, random.Random(args.seed))
+    try:
+        quotes = fleet.quotes(args.pickup, args.destination, args.k, args.radius, args.traffic, args.weather,
+                              args.hour)
+    except ValueError as e:
+        sys.exit(f"❌ {e}")
+    print(f"🛺 {len(quotes)} of {len(fleet):,} drivers near {args.pickup}, going to {args.destination}:")
+    for rank, quote in enumerate(quotes, 1):
+        print(f"  {rank:>2}. {quote.driver:<12} {quote.pickup_km:5.2f} km away  ₹{quote.quoted:<5} "
+              f"(mood {quote.mood}, will go down to ₹{quote.minimum})")
@@ -1,289 +1,374 @@
-import random
+import argparse
 import re
 import math
+import os
+import secrets
 from datetime import datetime
-from typing import Optional, Dict, List, Tuple
+from types import MappingProxyType
+from typing import Optional, Dict, List, Tuple, NamedTuple
+
+from geo import GeoPoints, load_points
+from intent import classify
+from places import BANGALORE_ALIASES, PlaceIndex
+from pricing_policy import DEFAULT_POLICY, MOODS, TRAFFIC_LEVELS, WEATHER
+from profiling import timed
+from responses import DEFAULT_LANGUAGE, LANGUAGES, Locale, load_locale
+from strategies import LEGACY
+
+# Define Bangalore areas with coordinates (approximate lat/long positioning)
+# Format: area_name: (x, y) where x,y are relative positions
+BANGALORE_AREAS = {
+    # South Bangalore
+    "jayanagar": (1, -5),
+    "jp nagar": (0, -6),
+    "banashankari": (-1, -7),
+    "uttarahalli": (-2, -8),
+    "kanakapura": (-3, -12),
+    "bannerghatta": (2, -9),
+
+    # Central
+    "majestic": (0, 0),
+    "mg road": (2, 0),
+    "brigade road": (2, -1),
+    "richmond town": (1, -2),
+    "shivajinagar": (1, 1),
+    "cubbon park": (2, 0),
+    "ulsoor": (3, 1),
+
+    # East
+    "indiranagar": (5, 0),
+    "domlur": (4, -1),
+    "marathahalli": (8, -1),
+    "whitefield": (12, -2),
+
+    # North
+    "hebbal": (0, 5),
+    "yelahanka": (0, 10),
+    "devanahalli": (1, 15),
+    "airport": (2, 18),
+
+    # West
+    "rajajinagar": (-3, 2),
+    "malleswaram": (-2, 1),
+    "yeshwanthpur": (-3, 3),
+    "peenya": (-4, 5),
+
+    # South-East
+    "koramangala": (4, -3),
+    "btm layout": (3, -4),
+    "hsr layout": (5, -5),
+    "electronic city": (7, -10),
+    "silk board": (5, -6),
+
+    # South-West
+    "vijayanagar": (-4, -3),
+    "mysore road": (-5, -5),
+    "kengeri": (-7, -7),
+    "rajarajeshwari nagar": (-6, -6)
+}
+
+# Driver replies for the default language, as read from messages/hinglish.json
+DRIVER_RESPONSES = load_locale(DEFAULT_LANGUAGE).responses
+
+
+class SessionRandom:
+    """Small seedable generator (SplitMix64) with the parts of random.Random the game uses
+
+    A random.Random carries ~2.5 KB of Mersenne Twister state; this keeps a
+    single 64-bit word, so per-session generators stay cheap and the whole
+    generator state is one integer.
+    """
+
+    __slots__ = ('state',)
+
+    def __init__(self, seed=0):
+        self.state = seed & 0xFFFFFFFFFFFFFFFF
+
+    def _next(self):
+        self.state = state = (self.state + 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        state = ((state ^ (state >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+        state = ((state ^ (state >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+        return state ^ (state >> 31)
+
+    def _below(self, n):
+        # Rejection sampling on the top bits keeps every outcome equally likely
+        shift = 64 - n.bit_length()
+        value = self._next() >> shift
+        while value >= n:
+            value = self._next() >> shift
+        return value
+
+    def random(self):
+        """Float in [0.0, 1.0)"""
+        return (self._next() >> 11) * (1.0 / 9007199254740992)
+
+    def randint(self, a, b):
+        """Integer in [a, b], both ends included"""
+        return a + self._below(b - a + 1)
+
+    def choice(self, seq):
+        """Random element of a non-empty sequence"""
+        return seq[self._below(len(seq))]
+
+
+class CityModel:
+    """Immutable city data (areas, reply templates, pricing policy, driver strategy) shared by all sessions"""
+
+    __slots__ = ('name', 'areas', 'geo', 'roads', 'origin', 'places', 'locale', 'responses', 'catalog', 'policy',
+                 'strategy', 'base_fare', 'rate_per_km', 'haggling_factor', 'night_multiplier', 'traffic_multipliers',
+                 'weather_multipliers', 'mood_multipliers', 'derived')
+
+    # Fare constants read straight off the policy, for callers that price without a session
+    FARE_FIELDS = ('base_fare', 'rate_per_km', 'haggling_factor', 'night_multiplier', 'traffic_multipliers',
+                   'weather_multipliers', 'mood_multipliers')
+
+    def __init__(self, name, areas, responses, aliases=None, origin=None, policy=DEFAULT_POLICY, roads=None,
+                 strategy=LEGACY):
+        # Everything is frozen into tuples and read-only mappings so that
+        # sessions can share one instance without copying anything. Real
+        # locality data comes as GeoPoints (lat/lon arrays, already read-only)
+        # and is measured in great-circle km instead of on the toy grid.
+        # Replies come as a responses.Locale, or as a plain table of templates
+        # in the default language's words.
+        geo = areas if isinstance(areas, GeoPoints) else None
+        locale = responses if isinstance(responses, Locale) else Locale(name, responses)
+        fields = {
+            'name': name,
+            'areas': geo if geo is not None else MappingProxyType({k: tuple(v) for k, v in areas.items()}),
+            'geo': geo,
+            # Precomputed road distances (road_matrix.RoadMatrix); None means as the crow flies
+            'roads': roads,
+            # Where every ride starts
+            'origin': origin if origin is not None else next(iter(areas)),
+            # Fuzzy name index over the areas, so place lookups never scan every area
+            'places': PlaceIndex(areas, aliases),
+            # Replies of sessions that do not ask for a language: templates parsed
+            # and no-repeat pickers compiled once for every session
+            'locale': locale,
+            'responses': locale.responses,
+            'catalog': locale.catalog,
+            # Fares, multipliers and haggling behaviour, compiled from a rules file (pricing_policy.py)
+            'policy': policy,
+            # How the driver answers a rider's offer (strategies.py), fitted to the policy
+            'strategy': strategy.for_policy(policy),
+            # Lookups derived from the areas and roads on first use (fares.py,
+            # session_store.py); clones with another policy or strategy share
+            # them, so hot-reloads do not pile up copies
+            'derived': {},
+        }
+        fields.update((key, getattr(policy, key)) for key in self.FARE_FIELDS)
+        for key, value in fields.items():
+            object.__setattr__(self, key, value)
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, key):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def with_roads(self, roads):
+        """The same city (sharing its indexes and templates) priced on road distances"""
+        missing = [area for area in self.areas if area not in roads.index]
+        if missing:
+            raise ValueError(f"road matrix has no row for {', '.join(missing[:5])}")
+        city = object.__new__(CityModel)
+        for key in CityModel.__slots__:
+            object.__setattr__(city, key, getattr(self, key))
+        object.__setattr__(city, 'roads', roads)
+        object.__setattr__(city, 'derived', {})
+        return city
+
+    def with_policy(self, policy):
+        """The same city under another pricing policy; sessions already running keep the old one"""
+        city = object.__new__(CityModel)
+        for key in CityModel.__slots__:
+            object.__setattr__(city, key, getattr(self, key))
+        object.__setattr__(city, 'policy', policy)
+        for key in self.FARE_FIELDS:
+            object.__setattr__(city, key, getattr(policy, key))
+        # A strategy solved for the old fares is re-solved for the new ones
+        object.__setattr__(city, 'strategy', self.strategy.for_policy(policy))
+        return city
+
+    def with_strategy(self, strategy):
+        """The same city with the driver answering offers through another strategy, fitted to its policy"""
+        city = object.__new__(CityModel)
+        for key in CityModel.__slots__:
+            object.__setattr__(city, key, getattr(self, key))
+        object.__setattr__(city, 'strategy', strategy.for_policy(self.policy))
+        return city
+
+    def distance(self, origin, destination):
+        """Trip distance between two known areas: by road when the city has a road matrix,
+        otherwise haversine km for geo data and a straight line on the grid"""
+        if self.roads is not None:
+            return self.roads.distance(origin, destination)
+        if self.geo is not None:
+            return self.geo.distance_km(origin, destination)
+        start, end = self.areas[origin], self.areas[destination]
+        return math.sqrt((start[0] - end[0])**2 + (start[1] - end[1])**2)
+
+
+def load_city(path, name=None, responses=None, aliases=None, origin=None, policy=DEFAULT_POLICY):
+    """Build a CityModel from a CSV or GeoJSON locality file (see geo.load_points); replies default to
+    the default language's catalogue"""
+    name = name or os.path.splitext(os.path.basename(path))[0]
+    responses = load_locale(DEFAULT_LANGUAGE) if responses is None else responses
+    return CityModel(name, load_points(path), responses, aliases, origin, policy)
+
+
+# Built once at import; every game session points at this instance
+BANGALORE = CityModel("bangalore", BANGALORE_AREAS, load_locale(DEFAULT_LANGUAGE), BANGALORE_ALIASES,
+                      origin="majestic")
+
+# Words that end the conversation from the rider's side
+EXIT_WORDS = frozenset(["exit", "quit", "bye"])
+
+
+class Reply(NamedTuple):
+    """Driver reply for one turn; status is 'continue', 'done' or 'exit'"""
+    text: str
+    status: str = "continue"
+
 
 # Simple auto driver game with Bangalore area knowledge
 class BangaloreAutoGame:
-    def __init__(self):
-        # Response tracking to prevent repetition
-        self.used_responses = {
-            'ask_destination': [],
-            'unknown_place': [],
-            'price_high': [],
-            'price_medium': [],
-            'price_low': [],
-            'too_low': [],
-            'agreement': []
-        }
-        
-        # Define Bangalore areas with coordinates (approximate lat/long positioning)
-        # Format: [area_name, [x, y]] where x,y are relative positions
-        self.bangalore_areas = {
-            # South Bangalore
-            "jayanagar": [1, -5],
-            "jp nagar": [0, -6],
-            "banashankari": [-1, -7],
-            "uttarahalli": [-2, -8],
-            "kanakapura": [-3, -12],
-            "bannerghatta": [2, -9],
-            
-            # Central
-            "majestic": [0, 0],
-            "mg road": [2, 0],
-            "brigade road": [2, -1],
-            "richmond town": [1, -2],
-            "shivajinagar": [1, 1],
-            "cubbon park": [2, 0],
-            "ulsoor": [3, 1],
-            
-            # East
-            "indiranagar": [5, 0],
-            "domlur": [4, -1],
-            "marathahalli": [8, -1],
-            "whitefield": [12, -2],
-            
-            # North
-            "hebbal": [0, 5],
-            "yelahanka": [0, 10],
-            "devanahalli": [1, 15],
-            "airport": [2, 18],
-            
-            # West
-            "rajajinagar": [-3, 2],
-            "malleswaram": [-2, 1],
-            "yeshwanthpur": [-3, 3],
-            "peenya": [-4, 5],
-            
-            # South-East
-            "koramangala": [4, -3],
-            "btm layout": [3, -4],
-            "hsr layout": [5, -5],
-            "electronic city": [7, -10],
-            "silk board": [5, -6],
-            
-            # South-West
-            "vijayanagar": [-4, -3],
-            "mysore road": [-5, -5],
-            "kengeri": [-7, -7],
-            "rajarajeshwari nagar": [-6, -6]
-        }
-        
+    # Only per-session state lives on the instance; static tables stay on the city model
+    __slots__ = ('city', 'locale', 'rng', 'seed', 'response_states', 'current_location', 'destination',
+                 'distance', 'base_price', 'min_price', 'current_price', 'last_offer', 'time',
+                 'traffic_level', 'weather', 'driver_mood', 'negotiation_rounds', 'status')
+
+    def __init__(self, city=BANGALORE, rng=None, seed=None, clock=datetime.now, language=None):
+        self.city = city
+        # The driver speaks the city's language unless the rider picked one
+        # of responses.LANGUAGES; catalogues are loaded on first use and shared
+        self.locale = city.locale if language is None or language == city.locale.language else load_locale(language)
+
+        # Every random draw comes from the session's own generator; the seed is
+        # kept so a logged session can be replayed bit for bit
+        if rng is None:
+            seed = secrets.randbits(64) if seed is None else seed
+            rng = SessionRandom(seed)
+        self.rng = rng
+        self.seed = seed
+
+        # Response tracking to prevent repetition: response type -> picker state
+        self.response_states = {}
+
         # Current location parameters
-        self.current_location = "majestic"  # Default starting point
+        self.current_location = city.origin  # Default starting point
         self.destination = None
         self.distance = None
         self.base_price = None
         self.min_price = None
         self.current_price = None
-        
+        # The rider's previous counted offer, for strategies that model the rider
+        self.last_offer = None
+        self.negotiation_rounds = 0
+        self.status = "continue"
+
         # Game state and conditions
-        self.time = datetime.now().hour
-        self.traffic_level = random.choice(['low', 'medium', 'high', 'very_high'])
-        self.weather = random.choice(['clear', 'rainy', 'heavy_rain'])
-        self.driver_mood = random.choice(['good', 'neutral', 'bad'])
-        
-        # Constants for price calculation
-        self.base_fare = 40  # Increased minimum fare
-        self.rate_per_km = 18  # Increased rate per km
-        self.night_multiplier = 1.5 if self.time < 6 or self.time >= 22 else 1.0
-        self.traffic_multiplier = {
-            'low': 1.0,
-            'medium': 1.2,
-            'high': 1.4,
-            'very_high': 1.6
-        }[self.traffic_level]
-        self.weather_multiplier = {
-            'clear': 1.0,
-            'rainy': 1.3,
-            'heavy_rain': 1.5
-        }[self.weather]
-        self.haggling_factor = 1.6  # Higher initial price for harder bargaining
-        
-        # Driver responses based on mood and conditions
-        self.responses = {
-            "ask_destination": [
-                "Kahan jana hai bhai?",
-                "Where to?",
-                "Jana kahan hai? Jaldi bolo, time nahi hai.",
-                "Tell me your destination; fare will run on meter.",
-                "Kahan chaloge? {weather} mein extra lagega.",
-                "Bolo bhai, {traffic} traffic hai aaj."
-            ],
-            "unknown_place": [
-                "Woh kahan hai bhai? Koi landmark bolo.",
-                "Yeh area nahi jaanta, koi aur batao.",
-                "Naya area hai kya? Google Maps dikhao.",
-                "Yeh kahan hai? MG Road, Indiranagar jaisa batao.",
-                "Area ka naam theek se bolo, samajh nahi aa raha."
-            ],
-            "price_high": [
-                "₹{price}, {traffic} traffic hai.",
-                "₹{price} lagega, {weather} mein extra.",
-                "Raat ko ₹{price} se kam nahi.",
-                "Itna traffic hai, ₹{price} minimum.",
-                "Petrol ka rate pata hai? ₹{price} final.",
-                "CNG ka rate badh gaya, ₹{price} se start."
-            ],
-            "price_medium": [
-                "Accha ₹{price}, lekin {condition}.",
-                "₹{price} final, {traffic} traffic hai.",
-                "₹{price} se kam nahi, {weather} chal raha hai.",
-                "Bhai ₹{price}, reasonable rate hai.",
-                "Meter se bhi ₹{price} hi aayega."
-            ],
-            "price_low": [
-                "Nahi bhai, ₹{price}. {condition}",
-                "Petrol mehenga hai, ₹{price} final.",
-                "₹{price} se kam impossible, {traffic} traffic hai.",
-                "Itna kam? ₹{price}, woh bhi {weather} mein.",
-                "Bhai reasonable bolo, ₹{price} last."
-            ],
-            "too_low": [
-                "Arrey bhai, mazak mat karo! ₹{price}, {condition}",
-                "Utne mein toh petrol bhi nahi aayega. ₹{price} minimum.",
-                "Itna kam? Chalte raho bhai. ₹{price} se kam nahi.",
-                "Aaj kal ka rate pata hai? ₹{price} normal hai.",
-                "Dusra auto dekho phir, mere ko ₹{price} chahiye."
-            ],
-            "agreement": [
-                "Chalo baitho, {weather} mein jaldi chalenge.",
-                "Theek hai, par {traffic} traffic hai.",
-                "Ok done, lekin route mere hisaab se.",
-                "Haan aa jao, meter se dikha dunga same rate.",
-                "Chalo chalo, time waste mat karo."
-            ],
-            "close_distance": [
-                "Itna paas? Phir bhi ₹{price}, {condition}",
-                "Short distance ₹{price}, {traffic} traffic hai.",
-                "Minimum ₹{price}, {weather} mein extra.",
-                "Meter se ₹{price} hi aayega, check kar lo.",
-                "Paas hai par one-way hai, ₹{price} lagega."
-            ],
-            "far_distance": [
-                "Itna door? ₹{price}, woh bhi {condition}",
-                "Full Bangalore cross karna hai! ₹{price} kam hai.",
-                "Itna door {weather} mein ₹{price} reasonable hai.",
-                "Long route hai, {traffic} traffic mein ₹{price}.",
-                "Airport rate hai yeh, ₹{price} normal hai."
-            ]
-        }
-    
+        self.time = clock().hour
+        self.traffic_level = self.rng.choice(TRAFFIC_LEVELS)
+        self.weather = self.rng.choice(WEATHER)
+        self.driver_mood = self.rng.choice(MOODS)
+
+    # Read-only views of the shared city model, kept for callers of the old attributes
+    @property
+    def bangalore_areas(self):
+        return self.city.areas
+
+    @property
+    def responses(self):
+        return self.locale.responses
+
+    @property
+    def base_fare(self):
+        return self.city.base_fare
+
+    @property
+    def rate_per_km(self):
+        return self.city.rate_per_km
+
+    @property
+    def haggling_factor(self):
+        return self.city.haggling_factor
+
+    @property
+    def night_multiplier(self):
+        return self.city.policy.night[self.time]
+
+    @property
+    def traffic_multiplier(self):
+        return self.city.traffic_multipliers[self.traffic_level]
+
+    @property
+    def weather_multiplier(self):
+        return self.city.weather_multipliers[self.weather]
+
     def calculate_distance(self, point1, point2):
         """Calculate Euclidean distance between two points"""
         return math.sqrt((point1[0] - point2[0])**2 + (point1[1] - point2[1])**2)
     
+    @timed
     def find_closest_area(self, query):
-        """Find closest matching area from input"""
-        query = query.lower()
-        # Direct match
-        if query in self.bangalore_areas:
-            return query
-            
-        # Check for partial matches
-        for area in self.bangalore_areas:
-            if query in area or area in query:
-                return area
-                
-        # No match found
-        return None
-        
+        """Find closest matching area from input (exact, alias, partial or misspelled)"""
+        return self.city.places.best(query)
+
+    @timed
     def calculate_price(self, distance):
-        """Calculate fare based on distance and conditions"""
-        # Base calculation
-        raw_price = self.base_fare + (distance * self.rate_per_km)
-        
-        # Apply condition multipliers
-        raw_price *= self.night_multiplier  # Night charges
-        raw_price *= self.traffic_multiplier  # Traffic conditions
-        raw_price *= self.weather_multiplier  # Weather conditions
-        
-        # Apply mood-based variation (±10%)
-        mood_multiplier = {
-            'good': 0.9,
-            'neutral': 1.0,
-            'bad': 1.1
-        }[self.driver_mood]
-        raw_price *= mood_multiplier
-        
-        # Apply haggling factor (drivers quote higher initially)
-        quoted_price = raw_price * self.haggling_factor
-        
-        # Round to nearest 10 for quoted price (auto drivers always quote in round numbers)
-        quoted_price = round(quoted_price / 10) * 10
-        
-        # Ensure quoted price ends in 0 or 5
-        if quoted_price % 10 != 0 and quoted_price % 5 != 0:
-            quoted_price = round(quoted_price / 5) * 5
-        
-        # Round minimum price to nearest 10 internally
-        min_price = max(self.base_fare, round(raw_price / 10) * 10)
-        
-        return int(quoted_price), int(min_price)
-    
-    def start(self):
-        """Start the game"""
+        """Calculate fare based on distance and conditions: (quoted price, driver's minimum)"""
+        # Base fare plus per-km rate, times night, traffic, weather and mood
+        # multipliers; the quote is marked up by the haggling factor and both
+        # prices are rounded to multiples of 10 (see pricing_policy.py)
+        return self.city.policy.quote(distance, self.time, self.traffic_level, self.weather, self.driver_mood)
+
+    def start(self, events=None):
+        """Start the game; `events` is an optional events.EventLog that gets every turn"""
         print("🛺 You're negotiating with an auto driver in Bangalore!")
         print("🎯 Ask to go to areas like MG Road, Indiranagar, Koramangala, etc.")
         print("🗺️ The driver is currently at " + self.current_location.title())
-        print("🔍 Type 'exit' to end the conversation\n")
-        
+        print("🔍 Type 'exit' to end the conversation")
+        if self.seed is not None:
+            print(f"🎲 Session seed {self.seed}, hour {self.time} (replay with --seed/--hour)")
+        print()
+
         # First driver response
-        response = self.get_unique_response('ask_destination')
-        # Safely format the response with all possible placeholders
-        response = self.safe_format(response, weather=self.weather, traffic=self.traffic_level)
-        print(f"AI: {response}")
-        
+        print(f"AI: {greet(self).text}")
+        if events is not None:
+            events.turn(self.seed, self)
+
         # Main conversation loop
-        conversation_active = True
-        while conversation_active:
-            user_input = input("You: ").strip().lower()
-            
+        while True:
+            user_text = input("You: ")
+            reply = step(self, user_text)
+            if events is not None:
+                events.turn(self.seed, self, user_text, reply.status)
+
             # Check for exit command
-            if user_input in ["exit", "quit", "bye"]:
+            if reply.status == "exit":
                 print("Exiting conversation...")
                 return False
-            
-            # Process the conversation
-            if not self.destination:
-                self.process_destination(user_input)
-            else:
-                result = self.process_negotiation(user_input)
-                if result == "done":
-                    conversation_active = False
-        
+
+            print(f"AI: {reply.text}")
+            if reply.status == "done":
+                break
+
         # Evaluate the negotiation
         self.evaluate_negotiation()
         return True
-            
+
+    @timed
     def process_destination(self, user_input):
-        """Process user input to find destination"""
-        # Try to extract destination from user input
-        closest_area = None
-        
-        # Check each area name
-        for area in self.bangalore_areas:
-            if area in user_input:
-                closest_area = area
-                break
-                
-        # If no direct match, try to find through partial matching
-        if not closest_area:
-            words = user_input.split()
-            for word in words:
-                if len(word) > 3:  # Avoid short words
-                    closest_area = self.find_closest_area(word)
-                    if closest_area:
-                        break
-            
+        """Process user input to find destination and return the driver's reply"""
+        # Resolve the destination through the city's place index
+        closest_area = self.find_closest_area(user_input)
+
         if closest_area:
             self.destination = closest_area
             
             # Calculate distance
-            start_coords = self.bangalore_areas[self.current_location]
-            dest_coords = self.bangalore_areas[self.destination]
-            self.distance = self.calculate_distance(start_coords, dest_coords)
+            self.distance = self.city.distance(self.current_location, self.destination)
             
             # Calculate prices
             self.base_price, self.min_price = self.calculate_price(self.distance)
@@ -291,229 +376,114 @@ class BangaloreAutoGame:
             
             # Choose response based on distance
             if self.distance < 3:
-                response = self.get_unique_response('close_distance')
-                response = self.safe_format(response, price=self.current_price)
+                response = self.respond('close_distance', price=self.current_price)
             elif self.distance > 10:
-                response = self.get_unique_response('far_distance')
-                response = self.safe_format(response, price=self.current_price)
+                response = self.respond('far_distance', price=self.current_price)
             else:
-                response = self.get_unique_response('price_high')
-                response = self.safe_format(response, price=self.current_price)
-                
-            print(f"AI: {response}")
+                response = self.respond('price_high', price=self.current_price)
+
+            return Reply(response)
         else:
             # Unknown destination
-            print(f"AI: {self.get_unique_response('unknown_place')}")
+            return Reply(self.respond('unknown_place'))
     
-    def process_negotiation(self, user_input):
-        """Process negotiation after destination is set"""
-        # Extract price from user input
-        price_match = re.search(r'(\d+)', user_input)
-        user_price = int(price_match.group(1)) if price_match else None
-        
+    @timed
+    def process_negotiation(self, user_input, intent=None):
+        """Process negotiation after destination is set and return the driver's reply
+
+        `intent` is intent.classify(user_input) when the caller has already run it.
+        """
+        policy = self.city.policy
+        # Classify the utterance and extract any price in one pass
+        if intent is None:
+            intent = classify(user_input)
+        user_price = intent.amount
+
         # Get current conditions
-        condition = f"traffic {self.traffic_level}" if random.random() < 0.5 else f"weather {self.weather}"
-        
-        # Check for disagreement words first
-        disagreement_words = ["nahi", "no", "not", "illogical", "expensive", "costly", "zyada", "bahut", "too much", "cab", "uber", "ola"]
-        disagreement_pattern = r'\b(?:' + '|'.join([re.escape(w) for w in disagreement_words]) + r')\b'
-        
-        # Check for agreement words
-        agreement_words = ["ok", "okay", "theek", "thik", "thike", "done", "fine", 
-                         "agree", "chalo", "let's go", "deal", "chalega"]
-        
-        # Word-boundary match to avoid partial matches (e.g., 'only')
-        agreement_pattern = r'\b(?:' + '|'.join([re.escape(w) for w in agreement_words]) + r')\b'
-        
+        condition = "traffic" if self.rng.random() < 0.5 else "weather"
+
         # If there's a disagreement word, don't consider it an agreement
-        if re.search(disagreement_pattern, user_input, flags=re.IGNORECASE):
+        if intent.kind == "disagree":
             # User is disagreeing with the price
             # Larger reduction for explicit disagreement (in multiples of 10)
-            reduction = random.randint(2, 5) * 10
+            low, high, step = policy.disagree
+            reduction = self.rng.randint(low, high) * step
             self.current_price = max(self.min_price, self.current_price - reduction)
             # Round to nearest 10 or 5
             self.current_price = round(self.current_price / 10) * 10
             
             # Get a non-repetitive response
-            response = self.get_unique_response('price_medium')
-            # Safely format with all possible placeholders
-            response = self.safe_format(response, 
-                                        price=self.current_price,
-                                        condition=condition,
-                                        traffic=self.traffic_level,
-                                        weather=self.weather)
-            print(f"AI: {response}")
-            return "continue"
+            response = self.respond('price_medium', price=self.current_price, condition=condition)
+            return Reply(response)
         
         # No disagreement words found, check for agreement
-        elif re.search(agreement_pattern, user_input, flags=re.IGNORECASE):
+        elif intent.kind == "agree":
             if user_price:
                 if user_price >= self.min_price:
                     # User agreed to a specific price that's acceptable
                     self.current_price = user_price
-                    response = self.get_unique_response('agreement')
-                    # Safely format with all possible placeholders
-                    response = self.safe_format(response, weather=self.weather, traffic=self.traffic_level)
-                    print(f"AI: {response}")
-                    return "done"
+                    response = self.respond('agreement', price=self.current_price)
+                    return Reply(response, "done")
                 else:
                     # Too low price with agreement word
-                    response = self.get_unique_response('too_low')
-                    # Safely format with all possible placeholders
-                    response = self.safe_format(response, 
-                                              price=max(self.min_price, self.current_price - 10),
-                                              condition=condition)
+                    response = self.respond('too_low', price=max(self.min_price, self.current_price - 10),
+                                            condition=condition)
                     self.current_price = max(self.min_price, self.current_price - 10)
-                    print(f"AI: {response}")
-                    return "continue"
+                    return Reply(response)
             else:
                 # User agreed to current price
-                response = self.get_unique_response('agreement')
-                # Safely format with all possible placeholders
-                response = self.safe_format(response, weather=self.weather, traffic=self.traffic_level)
-                print(f"AI: {response}")
-                return "done"
+                response = self.respond('agreement', price=self.current_price)
+                return Reply(response, "done")
         
         # Handle user offering a price
         if user_price:
-            # User offered way too low (below 85% of minimum)
-            if user_price < self.min_price * 0.85:
-                response = self.get_unique_response('too_low')
-                # Safely format with all possible placeholders
-                response = self.safe_format(response, price=self.current_price, condition=condition)
-                print(f"AI: {response}")
-                return "continue"
+            # User offered way too low (below 85% of minimum by default)
+            if user_price < self.min_price * policy.too_low_ratio:
+                response = self.respond('too_low', price=self.current_price, condition=condition)
+                return Reply(response)
                 
             price_ratio = user_price / self.base_price
             
             # Track number of negotiation rounds
-            if not hasattr(self, 'negotiation_rounds'):
-                self.negotiation_rounds = 0
             self.negotiation_rounds += 1
             
-            # Driver's acceptance chance based on mood, conditions, and negotiation rounds
-            # Start with zero chance on first offer (auto drivers NEVER accept first offer)
-            if self.negotiation_rounds <= 1:
-                acceptance_chance = 0  # Never accept first offer
-            elif self.negotiation_rounds == 2:
-                acceptance_chance = 0.1  # Very low chance on second offer
-            else:
-                acceptance_chance = 0.3  # Base chance after multiple rounds
-            
-            # Adjust based on driver mood
-            if self.driver_mood == 'good':
-                acceptance_chance += 0.15
-            elif self.driver_mood == 'bad':
-                acceptance_chance -= 0.15
-                
-            # Adjust based on conditions
-            if self.traffic_level in ['high', 'very_high']:
-                acceptance_chance -= 0.1
-            if self.weather in ['rainy', 'heavy_rain']:
-                acceptance_chance -= 0.1
-            
-            # Adjust based on price ratio
-            if price_ratio >= 0.95:
-                acceptance_chance += 0.2  # Higher chance if close to original price
-            elif price_ratio <= 0.7:
-                acceptance_chance -= 0.2  # Lower chance if way below original price
-            
-            # Higher chance of acceptance after many rounds of negotiation
-            if self.negotiation_rounds >= 5:
-                acceptance_chance += 0.3
-            if self.negotiation_rounds >= 8:
-                acceptance_chance += 0.2
-            
-            # Only accept if price is above minimum, after multiple rounds, and probability check passes
-            if user_price >= self.min_price and self.negotiation_rounds >= 3 and random.random() < acceptance_chance:
+            # The city's strategy takes the offer (None) or names the driver's next price
+            counter = self.city.strategy.counter(self, user_price, price_ratio)
+            self.last_offer = user_price
+            if counter is None:
                 # Accept the price
                 self.current_price = user_price
-                response = self.get_unique_response('agreement').format(
-                    weather=self.weather,
-                    traffic=self.traffic_level
-                )
-                print(f"AI: {response}")
-                return "done"
+                response = self.respond('agreement', price=self.current_price)
+                return Reply(response, "done")
             else:
-                # Counter with a new price
-                # Make reductions in multiples of 5 or 10
-                if self.driver_mood == 'bad':
-                    reduction = random.choice([5, 10, 15])
-                elif self.driver_mood == 'good':
-                    reduction = random.choice([10, 20, 30])
-                else:
-                    reduction = random.choice([10, 15, 20])
-                    
-                # Never go below what the user offered
-                if user_price and self.current_price - reduction < user_price:
-                    # If user offered more than minimum, accept their price
-                    if user_price >= self.min_price:
-                        self.current_price = user_price
-                    # Otherwise counter with minimum price
-                    else:
-                        self.current_price = self.min_price
-                else:
-                    self.current_price = max(self.min_price, self.current_price - reduction)
-                    
-                # Round to nearest 10 or 5
-                self.current_price = round(self.current_price / 5) * 5
+                self.current_price = counter
                 
                 if user_price < self.min_price:
-                    response = self.get_unique_response('price_low')
-                    # Safely format with all possible placeholders
-                    response = self.safe_format(response, 
-                                              price=self.current_price,
-                                              condition=condition,
-                                              traffic=self.traffic_level,
-                                              weather=self.weather)
+                    response = self.respond('price_low', price=self.current_price, condition=condition)
                 else:
-                    response = self.get_unique_response('price_medium')
-                    # Safely format with all possible placeholders
-                    response = self.safe_format(response, 
-                                              price=self.current_price,
-                                              condition=condition,
-                                              traffic=self.traffic_level,
-                                              weather=self.weather)
-                print(f"AI: {response}")
+                    response = self.respond('price_medium', price=self.current_price, condition=condition)
+                return Reply(response)
         else:
             # General negotiation without specific price
             # Make reductions in multiples of 5 or 10
-            if self.driver_mood == 'bad':
-                reduction = random.choice([5, 10])
-            elif self.driver_mood == 'good':
-                reduction = random.choice([10, 15, 20])
-            else:
-                reduction = random.choice([5, 10, 15])
-                
+            reduction = self.rng.choice(policy.general_reductions[self.driver_mood])
+
             self.current_price = max(self.min_price, self.current_price - reduction)
             # Round to nearest 5
             self.current_price = round(self.current_price / 5) * 5
-            response = self.get_unique_response('price_medium').format(
-                price=self.current_price,
-                condition=condition,
-                traffic=self.traffic_level,
-                weather=self.weather
-            )
-            print(f"AI: {response}")
-            
-        return "continue"
+            response = self.respond('price_medium', price=self.current_price, condition=condition)
+            return Reply(response)
     
-    def evaluate_negotiation(self):
-        """Evaluate the negotiation and display results"""
-        print("\n📦 Chat ended.")
-        print(f"🚕 Destination: {self.destination.title()}")
-        print(f"🛣️ Distance: {self.distance:.1f} km (approx)")
-        print(f"⏰ Time: {'Night' if self.time < 6 or self.time >= 22 else 'Day'}")
-        print(f"🚦 Traffic: {self.traffic_level.title()}")
-        print(f"🌤️ Weather: {self.weather.title()}")
-        print(f"😊 Driver Mood: {self.driver_mood.title()}")
-        print(f"\n💰 Original quote: ₹{self.base_price}")
-        print(f"📉 Final agreed price: ₹{self.current_price}")
-        print(f"🧾 Driver's minimum: ₹{self.min_price}")
-        
+    def negotiation_score(self):
+        """Score the finished negotiation on a 0-10 scale"""
         # Calculate score based on conditions
-        base_score = ((self.base_price - self.current_price) / (self.base_price - self.min_price)) * 10
-        
+        spread = self.base_price - self.min_price
+        if spread > 0:
+            base_score = ((self.base_price - self.current_price) / spread) * 10
+        else:
+            # Short trips can round the quote down onto the minimum: then paying it is the best deal there was
+            base_score = 10 if self.current_price <= self.min_price else 0
+
         # Adjust score based on conditions
         if self.traffic_level in ['high', 'very_high']:
             base_score += 1  # Bonus for negotiating in heavy traffic
@@ -523,21 +493,43 @@ class BangaloreAutoGame:
             base_score += 1  # Bonus for night negotiation
         if self.driver_mood == 'bad':
             base_score += 2  # Extra bonus for negotiating with angry driver
-        
-        score = max(0, min(10, int(base_score)))
-        print(f"\n🧠 Negotiation rating: {score}/10")
-        
+
+        return max(0, min(10, int(base_score)))
+
+    def negotiation_report(self):
+        """Build the end-of-chat summary shown to the rider"""
+        score = self.negotiation_score()
         if score >= 9:
-            print("🔥 Legendary negotiator! Even a Bangalore auto driver couldn't resist!")
+            verdict = "🔥 Legendary negotiator! Even a Bangalore auto driver couldn't resist!"
         elif score >= 7:
-            print("💪 Solid bargaining skills! You know your way around autos.")
+            verdict = "💪 Solid bargaining skills! You know your way around autos."
         elif score >= 5:
-            print("👍 Not bad, but there's room for improvement.")
+            verdict = "👍 Not bad, but there's room for improvement."
         elif score >= 3:
-            print("😅 You got taken for a ride! Try being more assertive.")
+            verdict = "😅 You got taken for a ride! Try being more assertive."
         else:
-            print("🤦 Rookie mistake! Even tourists bargain better than this!")
+            verdict = "🤦 Rookie mistake! Even tourists bargain better than this!"
+
+        return "\n".join([
+            "\n📦 Chat ended.",
+            f"🚕 Destination: {self.destination.title()}",
+            f"🛣️ Distance: {self.distance:.1f} km (approx)",
+            f"⏰ Time: {'Night' if self.time < 6 or self.time >= 22 else 'Day'}",
+            f"🚦 Traffic: {self.traffic_level.title()}",
+            f"🌤️ Weather: {self.weather.title()}",
+            f"😊 Driver Mood: {self.driver_mood.title()}",
+            f"\n💰 Original quote: ₹{self.base_price}",
+            f"📉 Final agreed price: ₹{self.current_price}",
+            f"🧾 Driver's minimum: ₹{self.min_price}",
+            f"\n🧠 Negotiation rating: {score}/10",
+            verdict,
+        ])
+
+    def evaluate_negotiation(self):
+        """Evaluate the negotiation and display results"""
+        print(self.negotiation_report())
 
+    @timed
     def safe_format(self, text, **kwargs):
         """Safely format a string with only the placeholders it contains"""
         if not text:
@@ -558,40 +550,101 @@ class BangaloreAutoGame:
                 return text
         return text
     
+    def pick_template(self, response_type):
+        """Compiled template that hasn't been used recently, or None for an unknown type"""
+        picker = self.locale.catalog.get(response_type)
+        if picker is None:
+            return None
+
+        # Pick among the templates the history allows and advance the history state
+        state = self.response_states.get(response_type, 0)
+        index = self.rng.choice(picker.options[state])
+        self.response_states[response_type] = picker.transitions[state][index]
+        return picker.templates[index]
+
+    @timed
     def get_unique_response(self, response_type):
         """Get a response that hasn't been used recently"""
-        # Initialize if not already in the tracking dict
-        if response_type not in self.used_responses:
-            self.used_responses[response_type] = []
-            
-        available_responses = self.responses.get(response_type, [])
-        if not available_responses:
+        template = self.pick_template(response_type)
+        return template.text if template is not None else "I don't understand."
+
+    @timed
+    def respond(self, response_type, price=None, condition="traffic"):
+        """Pick a fresh response of this type and fill in its placeholders
+
+        `condition` is which of the traffic and the weather the driver brings
+        up. Every template's placeholders were checked against the slots of
+        its reply type when the catalogue was compiled, so all of them get a
+        value here.
+        """
+        template = self.pick_template(response_type)
+        if template is None:
             return "I don't understand."
-            
-        # If we've used all responses or almost all, reset the tracking
-        if len(self.used_responses[response_type]) >= len(available_responses) - 1:
-            self.used_responses[response_type] = []
-            
-        # Filter out recently used responses
-        unused_responses = [r for r in available_responses if r not in self.used_responses[response_type]]
-        
-        # If all have been used, just pick a random one
-        if not unused_responses:
-            response = random.choice(available_responses)
-        else:
-            response = random.choice(unused_responses)
-            
-        # Track this response
-        self.used_responses[response_type].append(response)
-        
-        # Keep track of only the last few responses to allow eventual reuse
-        max_history = min(3, len(available_responses) - 1)
-        if max_history > 0 and len(self.used_responses[response_type]) > max_history:
-            self.used_responses[response_type] = self.used_responses[response_type][-max_history:]
-            
-        return response
+        return template.render(self.locale.values(price, condition, self.traffic_level, self.weather))
+
+
+def fixed_clock(hour):
+    """Clock for sessions that must start at a known hour (simulation, replay)"""
+    moment = datetime(2000, 1, 1, hour)
+    return lambda: moment
+
+
+def greet(session):
+    """Opening line the driver says before the rider has spoken"""
+    return Reply(session.respond('ask_destination'))
+
+
+@timed
+def step(session, user_text, intent=None):
+    """Advance a session by one rider utterance and return the driver's reply (no I/O)
+
+    A caller that has already classified the utterance (stripped and
+    lower-cased) passes the result as `intent`, so it is not classified twice.
+    """
+    if session.status != "continue":
+        return Reply("", session.status)
+
+    user_input = user_text.strip().lower()
+
+    # Check for exit command
+    if user_input in EXIT_WORDS:
+        reply = Reply("", "exit")
+    elif not session.destination:
+        reply = session.process_destination(user_input)
+    else:
+        reply = session.process_negotiation(user_input, intent)
+
+    session.status = reply.status
+    return reply
+
 
 # Run the game
 if __name__ == "__main__":
-    game = BangaloreAutoGame()
-    game.start()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Negotiate with a Bangalore auto driver")
+    parser.add_argument("--seed", type=int, default=None, help="replay a session with this seed")
+    parser.add_argument("--hour", type=int, default=None, help="pretend the session starts at this hour")
+    parser.add_argument("--roads", metavar="MATRIX", help="price on road distances (road_matrix.py build)")
+    parser.add_argument("--pricing", metavar="RULES", help="pricing rules file (pricing_policy.py)")
+    parser.add_argument("--strategy", default="legacy",
+                        help="driver strategy: legacy, opponent, or a table built with strategies.py build")
+    parser.add_argument("--events", metavar="PATH", help="append one JSON event per turn here (events.py)")
+    parser.add_argument("--language", default=None, choices=LANGUAGES, help="language the driver speaks")
+    args = parser.parse_args()
+    clock = fixed_clock(args.hour) if args.hour is not None else datetime.now
+    city = BANGALORE
+    if args.roads:
+        from road_matrix import RoadMatrix
+        city = city.with_roads(RoadMatrix(args.roads))
+    if args.pricing:
+        from pricing_policy import load_policy
+        city = city.with_policy(load_policy(args.pricing))
+    if args.strategy != "legacy":
+        from strategies import load_strategy
+        city = city.with_strategy(load_strategy(args.strategy))
+    game = BangaloreAutoGame(city, seed=args.seed, clock=clock, language=args.language)
+    if args.events:
+        from events import EventLog
+        with EventLog(args.events) as events:
+            game.start(events)
+    else:
+        game.start()
\ No newline at end of file
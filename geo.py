@@ -0,0 +1,230 @@
+import csv
+import json
+import math
+import os
+from array import array
+from collections.abc import Mapping
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+# Accepted CSV column names, most specific first
+LAT_COLUMNS = ("lat", "latitude", "y")
+LON_COLUMNS = ("lon", "lng", "longitude", "long", "x")
+
+
+class Nearby(NamedTuple):
+    """A known locality and how far it is from the query point"""
+    name: str
+    km: float
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in kilometres between two points given in degrees"""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin((math.radians(lon2) - math.radians(lon1)) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+# Named points stored column-wise: latitudes and longitudes in two contiguous
+# array('d') buffers, names in a tuple and a name -> row dict. Reads like a
+# read-only {name: (lat, lon)} mapping, so it can stand in for a city's areas.
+#
+# Nearest-point queries go through a uniform grid in CSR form: points are
+# sorted by cell, `cell_starts[c]:cell_starts[c + 1]` is the slice of
+# `cell_points` in cell c, and cells are sized to hold a few points each and
+# to be roughly square on the ground.
+class GeoPoints(Mapping):
+    def __init__(self, names: Iterable[str], lats: Iterable[float], lons: Iterable[float], points_per_cell=4):
+        self.names = tuple(names)
+        self.lat = array('d', lats)
+        self.lon = array('d', lons)
+        if not (len(self.names) == len(self.lat) == len(self.lon)):
+            raise ValueError("names, latitudes and longitudes differ in length")
+        if not self.names:
+            raise ValueError("no points")
+        self.index: Dict[str, int] = {}
+        for row, name in enumerate(self.names):
+            if name in self.index:
+                raise ValueError(f"duplicate place name: {name!r}")
+            self.index[name] = row
+        self._build_grid(points_per_cell)
+
+    def _build_grid(self, points_per_cell):
+        self.min_lat, self.max_lat = min(self.lat), max(self.lat)
+        self.min_lon, self.max_lon = min(self.lon), max(self.lon)
+        # Longitude degrees shrink away from the equator; widen cells to match
+        squeeze = max(math.cos(math.radians(max(abs(self.min_lat), abs(self.max_lat)))), 1e-6)
+        height_km = max((self.max_lat - self.min_lat) * KM_PER_DEGREE, 1e-3)
+        width_km = max((self.max_lon - self.min_lon) * KM_PER_DEGREE * squeeze, 1e-3)
+        cells = max(1, len(self.names) // points_per_cell)
+        self.cell_km = math.sqrt(height_km * width_km / cells)
+        self.cell_lat = self.cell_km / KM_PER_DEGREE
+        self.cell_lon = self.cell_lat / squeeze
+        self.rows = int((self.max_lat - self.min_lat) / self.cell_lat) + 1
+        self.cols = int((self.max_lon - self.min_lon) / self.cell_lon) + 1
+
+        cell_of = [self._cell(lat, lon) for lat, lon in zip(self.lat, self.lon)]
+        counts = [0] * (self.rows * self.cols + 1)
+        for cell in cell_of:
+            counts[cell + 1] += 1
+        for cell in range(1, len(counts)):
+            counts[cell] += counts[cell - 1]
+        self.cell_starts = array('I', counts)
+        placed = array('I', [0]) * len(cell_of)
+        cursor = list(counts)
+        for row, cell in enumerate(cell_of):
+            placed[cursor[cell]] = row
+            cursor[cell] += 1
+        self.cell_points = placed
+
+    def _grid_position(self, lat, lon) -> Tuple[int, int]:
+        return int((lat - self.min_lat) // self.cell_lat), int((lon - self.min_lon) // self.cell_lon)
+
+    def _cell(self, lat, lon):
+        row, col = self._grid_position(lat, lon)
+        return min(max(row, 0), self.rows - 1) * self.cols + min(max(col, 0), self.cols - 1)
+
+    # Mapping interface: name -> (lat, lon)
+    def __getitem__(self, name):
+        row = self.index[name]
+        return self.lat[row], self.lon[row]
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.index
+
+    def distance_km(self, origin, destination):
+        """Haversine distance between two named points"""
+        a, b = self.index[origin], self.index[destination]
+        return haversine_km(self.lat[a], self.lon[a], self.lat[b], self.lon[b])
+
+    def nearest(self, lat, lon, k=1) -> List[Nearby]:
+        """The k named points closest to (lat, lon), nearest first"""
+        k = min(k, len(self.names))
+        row, col = self._grid_position(lat, lon)
+        # Grid cells the query lies outside of still have to be crossed; the
+        # ring bound below only holds from inside the grid
+        outside = max(-row, row - self.rows + 1, -col, col - self.cols + 1, 0)
+        row = min(max(row, 0), self.rows - 1)
+        col = min(max(col, 0), self.cols - 1)
+
+        best: List[Tuple[float, int]] = []
+        for ring in range(max(self.rows, self.cols)):
+            for cell in self._ring(row, col, ring):
+                for start in range(self.cell_starts[cell], self.cell_starts[cell + 1]):
+                    point = self.cell_points[start]
+                    best.append((haversine_km(lat, lon, self.lat[point], self.lon[point]), point))
+            if len(best) >= k:
+                best.sort()
+                del best[k:]
+                # Anything in a further ring is at least `ring` whole cells away;
+                # the margin covers the grid being flat while the earth is not
+                if ring > outside and best[-1][0] <= (ring - outside) * self.cell_km * 0.99:
+                    break
+        return [Nearby(self.names[point], km) for km, point in sorted(best)]
+
+    def _ring(self, row, col, ring):
+        # Cells at Chebyshev distance `ring` from (row, col), clipped to the grid
+        if ring == 0:
+            yield row * self.cols + col
+            return
+        top, bottom, left, right = row - ring, row + ring, col - ring, col + ring
+        for c in range(max(left, 0), min(right, self.cols - 1) + 1):
+            if top >= 0:
+                yield top * self.cols + c
+            if bottom < self.rows:
+                yield bottom * self.cols + c
+        for r in range(max(top + 1, 0), min(bottom - 1, self.rows - 1) + 1):
+            if left >= 0:
+                yield r * self.cols + left
+            if right < self.cols:
+                yield r * self.cols + right
+
+    def nbytes(self):
+        """Bytes held by the coordinate arrays and the grid (names and the name table excluded)"""
+        return sum(a.itemsize * len(a) for a in (self.lat, self.lon, self.cell_starts, self.cell_points))
+
+
+def _column(fieldnames, wanted, path):
+    lower = {name.strip().lower(): name for name in fieldnames}
+    for candidate in wanted:
+        if candidate in lower:
+            return lower[candidate]
+    raise ValueError(f"{path}: no column named any of {', '.join(wanted)}")
+
+
+def _unique(rows, path) -> GeoPoints:
+    # Real datasets repeat names (a locality listed once per ward, say); the first entry wins
+    seen = {}
+    for name, lat, lon in rows:
+        if name and name not in seen:
+            seen[name] = (lat, lon)
+    if not seen:
+        raise ValueError(f"{path}: no named points")
+    return GeoPoints(seen, (lat for lat, _ in seen.values()), (lon for _, lon in seen.values()))
+
+
+def load_csv(path, name_column="name") -> GeoPoints:
+    """Points from a CSV with a name column and lat/lon (or latitude/longitude, lng) columns"""
+    rows = []
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        fields = reader.fieldnames or []
+        name_key = _column(fields, (name_column,), path)
+        lat_key = _column(fields, LAT_COLUMNS, path)
+        lon_key = _column(fields, LON_COLUMNS, path)
+        for record in reader:
+            rows.append((" ".join(record[name_key].lower().split()),
+                         float(record[lat_key]), float(record[lon_key])))
+    return _unique(rows, path)
+
+
+def _representative_point(geometry):
+    # Polygons are reduced to the mean of their outer ring, which is plenty for fares
+    kind, coords = geometry["type"], geometry["coordinates"]
+    if kind == "Point":
+        return coords[1], coords[0]
+    if kind == "MultiPoint":
+        ring = coords
+    elif kind == "Polygon":
+        ring = coords[0]
+    elif kind == "MultiPolygon":
+        ring = max((polygon[0] for polygon in coords), key=len)
+    else:
+        raise ValueError(f"unsupported geometry type: {kind}")
+    if len(ring) > 1 and ring[0] == ring[-1]:
+        ring = ring[:-1]  # closed rings repeat their first vertex
+    return sum(p[1] for p in ring) / len(ring), sum(p[0] for p in ring) / len(ring)
+
+
+def load_geojson(path, name_property="name") -> GeoPoints:
+    """Points from a GeoJSON FeatureCollection; features without a name are skipped"""
+    with open(path, encoding="utf-8") as f:
+        collection = json.load(f)
+    rows = []
+    for feature in collection["features"]:
+        name = (feature.get("properties") or {}).get(name_property)
+        if not name or not feature.get("geometry"):
+            continue
+        lat, lon = _representative_point(feature["geometry"])
+        rows.append((" ".join(str(name).lower().split()), lat, lon))
+    return _unique(rows, path)
+
+
+def load_points(path, name_field="name") -> GeoPoints:
+    """Load a locality dataset, picking the reader from the file extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".geojson", ".json"):
+        return load_geojson(path, name_field)
+    if extension in (".csv", ".txt"):
+        return load_csv(path, name_field)
+    raise ValueError(f"{path}: expected a .csv or .geojson file")
@@ -0,0 +1,66 @@
+import re
+from typing import NamedTuple, Optional
+
+# Words that mean the rider is pushing back on the price
+DISAGREEMENT_WORDS = ("nahi", "no", "not", "illogical", "expensive", "costly", "zyada", "bahut",
+                      "too much", "cab", "uber", "ola")
+
+# Words that mean the rider accepts (the current price or the one they name)
+AGREEMENT_WORDS = ("ok", "okay", "theek", "thik", "thike", "done", "fine",
+                   "agree", "chalo", "let's go", "deal", "chalega")
+
+# Spoken multipliers that can follow a number ("2 hundred", "3 sau", "2k")
+SCALE_WORDS = {"hundred": 100, "sau": 100, "thousand": 1000, "hazaar": 1000, "k": 1000}
+
+
+def _alternation(words):
+    # Longest first so "too much" wins over any shorter word it starts with
+    return "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+
+# One compiled pattern for the whole utterance; each match is exactly one of
+# a disagreement word, an agreement word or an amount. Word boundaries avoid
+# partial matches (e.g. 'ok' inside 'took', 'no' inside 'only').
+INTENT_PATTERN = re.compile(
+    r"\b(?P<disagree>" + _alternation(DISAGREEMENT_WORDS) + r")\b"
+    r"|\b(?P<agree>" + _alternation(AGREEMENT_WORDS) + r")\b"
+    # Amounts: a currency marker or a word boundary ("ok2" is no offer),
+    # digits, an optional spoken scale word and an optional "/-" suffix.
+    # Commas group digits only in the Indian (1,50,000) or the multi-comma
+    # Western (1,500,000) style; anything else ("150,200") is two numbers
+    r"|(?:(?:₹|\brs\.?|\binr)\s*|\b)"
+    r"(?P<amount>(?:\d{1,2}(?:,\d{2})*,\d{3}|\d{1,3}(?:,\d{3}){2,})(?!,?\d)|\d+)"
+    r"(?:\s*(?P<scale>" + _alternation(SCALE_WORDS) + r")\b)?(?:\s*/-)?",
+    re.IGNORECASE,
+)
+
+
+class Intent(NamedTuple):
+    """What the rider meant: kind is 'disagree', 'agree', 'price' or 'none'"""
+    kind: str
+    amount: Optional[int] = None
+
+
+def classify(text):
+    """Classify an utterance in a single pass and extract the first amount mentioned"""
+    disagree = agree = False
+    amount = None
+    for match in INTENT_PATTERN.finditer(text):
+        disagree_word, agree_word, digits, scale = match.groups()
+        if disagree_word:
+            disagree = True
+        elif agree_word:
+            agree = True
+        elif amount is None:
+            amount = int(digits.replace(",", ""))
+            if scale:
+                amount *= SCALE_WORDS[scale.lower()]
+
+    # Disagreement wins over agreement ("ok but too much"), then a bare amount
+    if disagree:
+        return Intent("disagree", amount)
+    if agree:
+        return Intent("agree", amount)
+    if amount is not None:
+        return Intent("price", amount)
+    return Intent("none")
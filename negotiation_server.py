@@ -0,0 +1,250 @@
+import argparse
+import asyncio
+import itertools
+import json
+import secrets
+from typing import Dict, Optional, Tuple
+
+from events import EventLog
+from game import BANGALORE, BangaloreAutoGame, CityModel, Reply, greet, step
+from pricing_policy import PolicyFile
+from responses import LANGUAGES
+from road_matrix import RoadMatrix
+from session_store import SessionStore, open_store
+from strategies import load_strategy
+
+
+# Many negotiation sessions multiplexed on one asyncio event loop
+class NegotiationHub:
+    def __init__(self, city=BANGALORE, transcript_log=None, store: Optional[SessionStore] = None,
+                 pricing: Optional[PolicyFile] = None, events: Optional[EventLog] = None, language=None):
+        self.city = city
+        # Language of sessions whose rider does not pick one (None: the city's own)
+        self.language = language
+        # Rules file watched for changes; new sessions are priced on its latest
+        # good version, running ones finish on the policy they started with.
+        # Sessions resumed from the store are loaded against the city of the
+        # policy they were saved under, looked up here by digest.
+        self.pricing = pricing
+        self.cities: Dict[str, CityModel] = {city.policy.digest: city}
+        self.sessions: Dict[int, BangaloreAutoGame] = {}
+
+        # With a store, every turn is saved so another worker (or this one
+        # after a restart) can pick the session up; ids must then be unique
+        # across workers rather than counted per process
+        self.store = store
+        self._ids = itertools.count(1) if store is None else iter(lambda: secrets.randbits(62) + 1, None)
+
+        # Optional text file that receives one JSON line per finished session,
+        # with everything replay.py needs to reproduce it
+        self.transcript_log = transcript_log
+        self.transcripts: Dict[int, dict] = {}
+
+        # Optional structured log with one event per turn, for analytics.py
+        self.events = events
+
+    def open(self, language=None) -> Tuple[int, Reply]:
+        """Create a session and return its id with the driver's opening line
+
+        `language` is one of responses.LANGUAGES; by default the hub's.
+        Raises ValueError for any other.
+        """
+        session_id = next(self._ids)
+        if self.pricing is not None:
+            policy = self.pricing.current()
+            if policy is not self.city.policy:
+                known = self.cities.get(policy.digest)
+                self.city = known if known is not None else self.city.with_policy(policy)
+                self.cities[policy.digest] = self.city
+        session = BangaloreAutoGame(self.city, language=language or self.language)
+        self.sessions[session_id] = session
+        reply = greet(session)
+        if self.transcript_log is not None:
+            self.transcripts[session_id] = {"seed": session.seed, "hour": session.time,
+                                            "pricing": self.city.policy.digest,
+                                            "strategy": self.city.strategy.name,
+                                            "language": session.locale.language, "greeting": reply.text, "turns": []}
+        if self.events is not None:
+            self.events.turn(session_id, session)
+        self._save(session_id, session)
+        return session_id, reply
+
+    def resume(self, session_id) -> Optional[BangaloreAutoGame]:
+        """The session with this id, loaded from the store if this hub does not hold it"""
+        session = self.sessions.get(session_id)
+        if session is None and self.store is not None:
+            session = self.store.load(session_id, self.city, self.cities)
+            if session is not None:
+                self.sessions[session_id] = session
+        return session
+
+    def turn(self, session_id, user_text) -> Reply:
+        """Play one rider utterance; finished sessions are dropped from the hub"""
+        session = self.resume(session_id)
+        if session is None:
+            raise KeyError(session_id)
+        reply = step(session, user_text)
+        if session_id in self.transcripts:
+            self.transcripts[session_id]["turns"].append((user_text, reply.text))
+        if self.events is not None:
+            self.events.turn(session_id, session, user_text, reply.status)
+        if reply.status != "continue":
+            self.close(session_id)
+            if self.store is not None:
+                self.store.delete(session_id)
+        else:
+            self._save(session_id, session)
+        return reply
+
+    def _save(self, session_id, session):
+        if self.store is None:
+            return
+        try:
+            self.store.save(session_id, session)
+        except ValueError:
+            # State the record cannot hold (an absurd price, say): the session
+            # carries on here, it just cannot move to another worker
+            pass
+
+    def close(self, session_id):
+        """Forget a session here (no-op if it is already gone); a stored copy stays resumable"""
+        self.sessions.pop(session_id, None)
+        transcript = self.transcripts.pop(session_id, None)
+        if transcript is not None:
+            self.transcript_log.write(json.dumps(transcript, ensure_ascii=False) + "\n")
+
+    def discard(self, session_id):
+        """Forget a session everywhere, including the store"""
+        self.close(session_id)
+        if self.store is not None:
+            self.store.delete(session_id)
+
+    async def handle_client(self, reader, writer):
+        """JSON-lines protocol: the rider sends {"text": ...}, the driver answers {"text", "status", "session"}
+
+        Sending {"resume": id} instead continues a stored session from another
+        connection or worker; the answer is an empty text with its status.
+        Sending {"language": code} before the first utterance starts the
+        session over in that language; the answer is the new opening line.
+        """
+        session_id, reply = self.open()
+        spoken = False
+        try:
+            writer.write(_encode(reply, session_id))
+            await writer.drain()
+            while reply.status == "continue":
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    if "resume" in message:
+                        resumed = int(message["resume"])
+                        session = self.resume(resumed)
+                        if session is None:
+                            writer.write(b'{"error": "unknown session"}\n')
+                        else:
+                            self.discard(session_id)
+                            session_id, reply = resumed, Reply("", session.status)
+                            spoken = True
+                            writer.write(_encode(reply, session_id))
+                        await writer.drain()
+                        continue
+                    if "language" in message:
+                        if spoken:
+                            writer.write(b'{"error": "language can only be picked before the first utterance"}\n')
+                        elif message["language"] not in LANGUAGES:
+                            writer.write(b'{"error": "unknown language"}\n')
+                        else:
+                            fresh, reply = self.open(message["language"])
+                            # The session given up on was only ever greeted: keep it out of the transcripts
+                            self.transcripts.pop(session_id, None)
+                            self.discard(session_id)
+                            session_id = fresh
+                            writer.write(_encode(reply, session_id))
+                        await writer.drain()
+                        continue
+                    user_text = message["text"]
+                    if not isinstance(user_text, str):
+                        raise TypeError(user_text)
+                except (ValueError, KeyError, TypeError):
+                    writer.write(b'{"error": "expected {\\"text\\": ...}"}\n')
+                    await writer.drain()
+                    continue
+                reply = self.turn(session_id, user_text)
+                spoken = True
+                writer.write(_encode(reply, session_id))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.close(session_id)
+            writer.close()
+
+
+def _encode(reply, session_id):
+    return (json.dumps({"text": reply.text, "status": reply.status, "session": session_id},
+                       ensure_ascii=False) + "\n").encode()
+
+
+# Connections the kernel may queue before the server accepts them. A burst
+# of riders connecting at once overflows the default of 100: the kernel then
+# drops their handshakes while the clients already think they are connected.
+# The kernel caps this at net.core.somaxconn.
+BACKLOG = 4096
+
+
+async def serve(host="127.0.0.1", port=8765, hub=None, backlog=BACKLOG):
+    """Start the TCP front end and return the asyncio server"""
+    hub = hub or NegotiationHub()
+    return await asyncio.start_server(hub.handle_client, host, port, limit=4096, backlog=backlog)
+
+
+async def _main(host, port, transcript_log, city=BANGALORE, store=None, pricing=None, events=None, language=None,
+                backlog=BACKLOG):
+    server = await serve(host, port, NegotiationHub(city, transcript_log, store, pricing, events, language), backlog)
+    addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+    print(f"🛺 Negotiation server listening on {addresses}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve auto negotiations over JSON lines on TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--backlog", type=int, default=BACKLOG,
+                        help="connections queued before they are accepted (capped by net.core.somaxconn)")
+    parser.add_argument("--transcripts", metavar="PATH", help="append finished sessions here for replay.py")
+    parser.add_argument("--roads", metavar="MATRIX", help="price on road distances (road_matrix.py build)")
+    parser.add_argument("--sessions", metavar="STORE", default=None,
+                        help="persist in-flight sessions: memory, sqlite:PATH or files:DIRECTORY")
+    parser.add_argument("--pricing", metavar="RULES", help="pricing rules file, reloaded when it changes")
+    parser.add_argument("--events", metavar="PATH", help="append one JSON event per turn here for analytics.py")
+    parser.add_argument("--strategy", default="legacy",
+                        help="driver strategy: legacy, opponent, or a table built with strategies.py build")
+    parser.add_argument("--language", default=None, choices=LANGUAGES,
+                        help="language of sessions that do not pick one (default: the city's)")
+    args = parser.parse_args()
+    city = BANGALORE.with_roads(RoadMatrix(args.roads)) if args.roads else BANGALORE
+    if args.strategy != "legacy":
+        try:
+            city = city.with_strategy(load_strategy(args.strategy))
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+    pricing = PolicyFile(args.pricing) if args.pricing else None
+    store = open_store(args.sessions) if args.sessions else None
+    transcript_log = open(args.transcripts, "a", encoding="utf-8") if args.transcripts else None
+    events = EventLog(args.events) if args.events else None
+    try:
+        asyncio.run(_main(args.host, args.port, transcript_log, city, store, pricing, events, args.language,
+                          args.backlog))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if transcript_log is not None:
+            transcript_log.close()
+        if store is not None:
+            store.close()
+        if events is not None:
+            events.close()
@@ -0,0 +1,201 @@
+import re
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional
+
+# Common spellings and nicknames riders use for known areas
+BANGALORE_ALIASES = {
+    "ecity": "electronic city",
+    "e city": "electronic city",
+    "electronics city": "electronic city",
+    "m g road": "mg road",
+    "mahatma gandhi road": "mg road",
+    "kempegowda bus stand": "majestic",
+    "majestic bus stand": "majestic",
+    "kia": "airport",
+    "kempegowda airport": "airport",
+    "btm": "btm layout",
+    "hsr": "hsr layout",
+    "rr nagar": "rajarajeshwari nagar",
+    "malleshwaram": "malleswaram",
+    "yeshwantpur": "yeshwanthpur",
+    "silkboard": "silk board",
+    "shivaji nagar": "shivajinagar",
+    "jp nagara": "jp nagar",
+}
+
+_NON_WORD = re.compile(r"[^a-z0-9 ]+")
+
+# Keys this short ("kia", "btm", "hsr") only match exactly: one edit away
+# from them is an everyday word ("kiya", "bhi"), not a typo
+EXACT_ONLY_LENGTH = 4
+
+
+class PlaceMatch(NamedTuple):
+    """A candidate place with a confidence score between 0 and 1"""
+    name: str
+    score: float
+
+
+def normalize(text):
+    """Lowercase and reduce punctuation to spaces so names compare word by word"""
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+
+def _deletes(key):
+    # The key itself plus every spelling with one character removed
+    return {key} | {key[:i] + key[i + 1:] for i in range(len(key))}
+
+
+def _trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def char_masks(pattern):
+    """Bit mask of the positions of each character, for the bit-parallel distance"""
+    masks: Dict[str, int] = {}
+    for i, char in enumerate(pattern):
+        masks[char] = masks.get(char, 0) | (1 << i)
+    return masks
+
+
+def masked_distance(masks, length, text):
+    """Optimal string alignment distance between a pattern (given as char_masks) and text
+
+    Bit-parallel (Myers/Hyyrö): one column of the DP matrix per character of
+    text, held as bit vectors of vertical deltas, so the cost is a handful of
+    integer operations per character instead of a loop over the pattern.
+    """
+    if length == 0:
+        return len(text)
+    full = (1 << length) - 1
+    last = 1 << (length - 1)
+    positive, negative, score = full, 0, length
+    diagonal = previous_match = 0
+    for char in text:
+        match = masks.get(char, 0)
+        # Swapped neighbours ("whitefeild") count as a single edit
+        swapped = (((~diagonal) & match) << 1) & previous_match
+        diagonal = ((((match & positive) + positive) ^ positive) | match | negative | swapped) & full
+        horizontal_pos = negative | (~(diagonal | positive) & full)
+        horizontal_neg = diagonal & positive
+        if horizontal_pos & last:
+            score += 1
+        elif horizontal_neg & last:
+            score -= 1
+        horizontal_pos = ((horizontal_pos << 1) | 1) & full
+        horizontal_neg = (horizontal_neg << 1) & full
+        positive = horizontal_neg | (~(diagonal | horizontal_pos) & full)
+        negative = horizontal_pos & diagonal
+        previous_match = match
+    return score
+
+
+# Resolves free text to known place names without scanning every place
+class PlaceIndex:
+    def __init__(self, names, aliases=None, min_score=0.75, max_candidates=20):
+        self.names = tuple(names)
+        self.min_score = min_score
+        self.max_candidates = max_candidates
+
+        # Every searchable spelling (canonical names and aliases) maps to its canonical name
+        self.lookup: Dict[str, str] = {normalize(name): name for name in self.names}
+        known = set(self.names)
+        for alias, name in (aliases or {}).items():
+            if name in known:
+                self.lookup.setdefault(normalize(alias), name)
+        self.keys = sorted(self.lookup)
+        fuzzy = [(key_id, key) for key_id, key in enumerate(self.keys) if len(key) > EXACT_ONLY_LENGTH]
+        self.max_words = max((key.count(" ") + 1 for key in self.keys), default=1)
+
+        # One-deletion neighbourhoods: a single typo in the query ("koramangla")
+        # shares a deletion with the key, so it is found with a few dict lookups
+        self.deletions: Dict[str, List[int]] = {}
+        for key_id, key in fuzzy:
+            for variant in _deletes(key):
+                self.deletions.setdefault(variant, []).append(key_id)
+
+        # Trigram postings for worse misspellings; very common trigrams ("nag", "gar")
+        # are skipped at query time so a lookup never degrades into a full scan
+        self.postings: Dict[str, List[int]] = {}
+        for key_id, key in fuzzy:
+            for gram in _trigrams(key):
+                self.postings.setdefault(gram, []).append(key_id)
+        self.max_postings = max(64, len(self.keys) // 20)
+
+    def _spans(self, words):
+        # Every run of up to max_words consecutive words, longest first
+        for size in range(min(self.max_words, len(words)), 0, -1):
+            for start in range(len(words) - size + 1):
+                yield " ".join(words[start:start + size])
+
+    def _prefix_matches(self, span):
+        # Keys that start with the span ("indira" -> "indiranagar"), found by bisection
+        position = bisect_left(self.keys, span)
+        end = min(len(self.keys), position + self.max_candidates)
+        while position < end and self.keys[position].startswith(span):
+            key = self.keys[position]
+            yield self.lookup[key], 0.5 + 0.5 * len(span) / len(key)
+            position += 1
+
+    def _scored(self, span, key_ids):
+        # Confidence from the edit distance, for the candidates close enough to count
+        masks = char_masks(span)
+        for key_id in key_ids:
+            key = self.keys[key_id]
+            longest = max(len(key), len(span))
+            limit = int(longest * (1 - self.min_score))
+            if abs(len(key) - len(span)) > limit:
+                continue
+            distance = masked_distance(masks, len(span), key)
+            if distance <= limit:
+                yield self.lookup[key], 1 - distance / longest
+
+    def _near_matches(self, span):
+        key_ids = set()
+        for variant in _deletes(span):
+            key_ids.update(self.deletions.get(variant, ()))
+        return self._scored(span, key_ids)
+
+    def _far_matches(self, span):
+        grams = sorted((g for g in _trigrams(span) if g in self.postings),
+                       key=lambda g: len(self.postings[g]))
+        usable = [g for g in grams if len(self.postings[g]) <= self.max_postings] or grams[:2]
+
+        shared = Counter()
+        for gram in usable:
+            shared.update(self.postings[gram])
+        return self._scored(span, (key_id for key_id, _ in shared.most_common(self.max_candidates)))
+
+    def resolve(self, text, limit=5) -> List[PlaceMatch]:
+        """Rank the known places mentioned in text, best first"""
+        words = normalize(text).split()
+        scores: Dict[str, float] = {}
+
+        # Exact names and aliases anywhere in the utterance
+        for span in self._spans(words):
+            name = self.lookup.get(span)
+            if name is not None and name not in scores:
+                scores[name] = 1.0
+        if scores:
+            return [PlaceMatch(name, score) for name, score in scores.items()][:limit]
+
+        # Partial names and single typos first, then worse misspellings only if
+        # nothing closer turned up; short words ("se", "jp") are too ambiguous
+        spans = [span for span in self._spans(words) if len(span) > 3]
+        for matcher in ((self._prefix_matches, self._near_matches), (self._far_matches,)):
+            for span in spans:
+                for match in matcher:
+                    for name, score in match(span):
+                        scores[name] = max(score, scores.get(name, 0))
+            if scores:
+                break
+
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        return [PlaceMatch(name, round(score, 3)) for name, score in ranked[:limit]]
+
+    def best(self, text) -> Optional[str]:
+        """Most likely place mentioned in text, or None"""
+        matches = self.resolve(text, limit=1)
+        return matches[0].name if matches else None
@@ -0,0 +1,365 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import sys
+import time
+from types import MappingProxyType
+from typing import Optional
+
+# Condition levels sessions are drawn from; every policy has to price all of them
+TRAFFIC_LEVELS = ("low", "medium", "high", "very_high")
+WEATHER = ("clear", "rainy", "heavy_rain")
+MOODS = ("good", "neutral", "bad")
+
+# The game's pricing as data. A rules file only needs the settings it
+# changes: it is merged over these key by key (lists are replaced whole).
+DEFAULT_RULES = {
+    "fare": {
+        "base": 40,  # minimum fare
+        "per_km": 18,
+        "haggling_factor": 1.6,  # drivers open this far above their real price
+    },
+    # Hours from from_hour up to (not including) until_hour; may wrap past midnight
+    "night": {"multiplier": 1.5, "from_hour": 22, "until_hour": 6},
+    "multipliers": {
+        "traffic": {"low": 1.0, "medium": 1.2, "high": 1.4, "very_high": 1.6},
+        "weather": {"clear": 1.0, "rainy": 1.3, "heavy_rain": 1.5},
+        "mood": {"good": 0.9, "neutral": 1.0, "bad": 1.1},
+    },
+    # Chance the driver takes an offer at or above his minimum, summed in this order
+    "acceptance": {
+        "min_rounds": 3,  # no offer is ever taken before this round
+        "by_round": [0, 0, 0.1, 0.3],  # by negotiation round; the last entry holds from then on
+        "mood": {"good": 0.15, "bad": -0.15},
+        "traffic": {"high": -0.1, "very_high": -0.1},
+        "weather": {"rainy": -0.1, "heavy_rain": -0.1},
+        # offer / opening quote; the first matching rule applies
+        "price_ratio": [{"at_least": 0.95, "add": 0.2}, {"at_most": 0.7, "add": -0.2}],
+        # every rule whose round has been reached applies
+        "after_rounds": [{"rounds": 5, "add": 0.3}, {"rounds": 8, "add": 0.2}],
+    },
+    "counter": {
+        "too_low_ratio": 0.85,  # offers below this share of the minimum are refused outright
+        "disagree": {"min": 20, "max": 50, "step": 10},  # cut after a plain "no"
+        "offer": {"good": [10, 20, 30], "neutral": [10, 15, 20], "bad": [5, 10, 15]},  # cut after an offer
+        "general": {"good": [10, 15, 20], "neutral": [5, 10, 15], "bad": [5, 10]},  # cut after haggling talk
+    },
+}
+
+# Tables keyed by condition level rather than by fixed setting names
+_LEVELS = {
+    "multipliers.traffic": TRAFFIC_LEVELS,
+    "multipliers.weather": WEATHER,
+    "multipliers.mood": MOODS,
+    "acceptance.traffic": TRAFFIC_LEVELS,
+    "acceptance.weather": WEATHER,
+    "acceptance.mood": MOODS,
+    "counter.offer": MOODS,
+    "counter.general": MOODS,
+}
+
+
+def _merge(base, override, where=""):
+    if not isinstance(override, dict):
+        raise ValueError(f"{where or 'rules'}: expected an object")
+    allowed = _LEVELS.get(where, base)
+    merged = dict(base)
+    for key, value in override.items():
+        name = f"{where}.{key}" if where else key
+        if key not in allowed:
+            raise ValueError(f"{name}: unknown setting")
+        merged[key] = _merge(base.get(key, {}), value, name) if isinstance(base.get(key), dict) else value
+    return merged
+
+
+def _number(value, where, minimum=None, above=None):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"{where}: expected a number, got {value!r}")
+    if minimum is not None and value < minimum:
+        raise ValueError(f"{where}: must be at least {minimum}")
+    if above is not None and value <= above:
+        raise ValueError(f"{where}: must be greater than {above}")
+    return value
+
+
+def _integer(value, where, minimum=0, maximum=None):
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"{where}: expected a whole number, got {value!r}")
+    if value < minimum or (maximum is not None and value > maximum):
+        raise ValueError(f"{where}: must be between {minimum} and {maximum}" if maximum is not None
+                         else f"{where}: must be at least {minimum}")
+    return value
+
+
+def _list(value, where, empty=False):
+    if not isinstance(value, list) or not (value or empty):
+        raise ValueError(f"{where}: expected a {'' if empty else 'non-empty '}list")
+    return value
+
+
+def validate(rules=None) -> dict:
+    """The defaults overridden by `rules`, checked; raises ValueError naming the first bad setting"""
+    merged = _merge(DEFAULT_RULES, rules or {})
+
+    _number(merged["fare"]["base"], "fare.base", above=0)
+    _number(merged["fare"]["per_km"], "fare.per_km", minimum=0)
+    # At 1 or below the opening quote is the driver's minimum: nothing left to haggle over
+    _number(merged["fare"]["haggling_factor"], "fare.haggling_factor", above=1)
+    _number(merged["night"]["multiplier"], "night.multiplier", above=0)
+    _integer(merged["night"]["from_hour"], "night.from_hour", maximum=24)
+    _integer(merged["night"]["until_hour"], "night.until_hour", maximum=24)
+    for table, levels in (("traffic", TRAFFIC_LEVELS), ("weather", WEATHER), ("mood", MOODS)):
+        for level in levels:
+            _number(merged["multipliers"][table][level], f"multipliers.{table}.{level}", above=0)
+
+    acceptance = merged["acceptance"]
+    _integer(acceptance["min_rounds"], "acceptance.min_rounds")
+    for i, chance in enumerate(_list(acceptance["by_round"], "acceptance.by_round")):
+        _number(chance, f"acceptance.by_round[{i}]")
+    for table in ("mood", "traffic", "weather"):
+        for level, add in acceptance[table].items():
+            _number(add, f"acceptance.{table}.{level}")
+    for i, rule in enumerate(_list(acceptance["price_ratio"], "acceptance.price_ratio", empty=True)):
+        where = f"acceptance.price_ratio[{i}]"
+        if not isinstance(rule, dict) or set(rule) not in ({"at_least", "add"}, {"at_most", "add"}):
+            raise ValueError(f"{where}: expected {{\"at_least\" or \"at_most\": ratio, \"add\": chance}}")
+        for key, value in rule.items():
+            _number(value, f"{where}.{key}")
+    for i, rule in enumerate(_list(acceptance["after_rounds"], "acceptance.after_rounds", empty=True)):
+        where = f"acceptance.after_rounds[{i}]"
+        if not isinstance(rule, dict) or set(rule) != {"rounds", "add"}:
+            raise ValueError(f"{where}: expected {{\"rounds\": n, \"add\": chance}}")
+        _integer(rule["rounds"], f"{where}.rounds")
+        _number(rule["add"], f"{where}.add")
+
+    counter = merged["counter"]
+    _number(counter["too_low_ratio"], "counter.too_low_ratio", minimum=0)
+    disagree = counter["disagree"]
+    step = _integer(disagree["step"], "counter.disagree.step", minimum=1)
+    low = _integer(disagree["min"], "counter.disagree.min")
+    high = _integer(disagree["max"], "counter.disagree.max", minimum=low)
+    if low % step or high % step:
+        raise ValueError("counter.disagree: min and max must be multiples of step")
+    for table in ("offer", "general"):
+        for mood in MOODS:
+            where = f"counter.{table}.{mood}"
+            for i, cut in enumerate(_list(counter[table][mood], where)):
+                _number(cut, f"{where}[{i}]", minimum=0)
+    return merged
+
+
+class PricingPolicy:
+    """Validated pricing rules compiled into lookup tables and two closures
+
+    quote(distance, hour, traffic, weather, mood) -> (quoted, minimum) and
+    acceptance(rounds, mood, traffic, weather, price_ratio) -> chance do the
+    same float operations, in the same order, as the arithmetic they
+    replaced in game.py, so a policy built from DEFAULT_RULES reproduces
+    logged sessions exactly. Immutable; sessions share one instance through
+    their city model.
+    """
+
+    __slots__ = ('rules', 'digest', 'base_fare', 'rate_per_km', 'haggling_factor', 'night_multiplier', 'night',
+                 'traffic_multipliers', 'weather_multipliers', 'mood_multipliers', 'min_rounds', 'too_low_ratio',
+                 'disagree', 'offer_reductions', 'general_reductions', 'quote', 'acceptance')
+
+    def __init__(self, rules=None):
+        rules = validate(rules)
+        fare, night, multipliers = rules["fare"], rules["night"], rules["multipliers"]
+        acceptance, counter = rules["acceptance"], rules["counter"]
+
+        start, end = night["from_hour"], night["until_hour"]
+        is_night = [(hour >= start or hour < end) if start > end else start <= hour < end for hour in range(24)]
+        fields = {
+            'rules': rules,
+            'digest': hashlib.sha256(json.dumps(rules, sort_keys=True).encode()).hexdigest()[:12],
+            'base_fare': fare["base"],
+            'rate_per_km': fare["per_km"],
+            'haggling_factor': fare["haggling_factor"],
+            'night_multiplier': night["multiplier"],
+            # Night factor by hour of day, 1.0 outside night hours
+            'night': tuple(night["multiplier"] if flag else 1.0 for flag in is_night),
+            'traffic_multipliers': MappingProxyType({level: multipliers["traffic"][level] for level in TRAFFIC_LEVELS}),
+            'weather_multipliers': MappingProxyType({level: multipliers["weather"][level] for level in WEATHER}),
+            'mood_multipliers': MappingProxyType({level: multipliers["mood"][level] for level in MOODS}),
+            'min_rounds': acceptance["min_rounds"],
+            'too_low_ratio': counter["too_low_ratio"],
+            # randint bounds and step: the cut is randint(low, high) * step
+            'disagree': (counter["disagree"]["min"] // counter["disagree"]["step"],
+                         counter["disagree"]["max"] // counter["disagree"]["step"],
+                         counter["disagree"]["step"]),
+            'offer_reductions': MappingProxyType({mood: tuple(counter["offer"][mood]) for mood in MOODS}),
+            'general_reductions': MappingProxyType({mood: tuple(counter["general"][mood]) for mood in MOODS}),
+        }
+        fields['quote'] = _compile_quote(fields)
+        fields['acceptance'] = _compile_acceptance(acceptance)
+        for key, value in fields.items():
+            object.__setattr__(self, key, value)
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, key):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        # The closures do not pickle; worker processes recompile from the rules
+        return PricingPolicy, (self.rules,)
+
+
+def _compile_quote(fields):
+    # Everything the closure touches is a local of the enclosing scope
+    base, rate, haggling = fields['base_fare'], fields['rate_per_km'], fields['haggling_factor']
+    night, traffic, weather, mood = (fields['night'], dict(fields['traffic_multipliers']),
+                                     dict(fields['weather_multipliers']), dict(fields['mood_multipliers']))
+
+    def quote(distance, hour, traffic_level, weather_now, driver_mood):
+        """(quoted, minimum) price for a trip; both multiples of 10, the quote marked up for haggling"""
+        # Multiplied one factor at a time, left to right: float rounding depends on the order
+        raw_price = (base + distance * rate) * night[hour] * traffic[traffic_level] * weather[weather_now] \
+            * mood[driver_mood]
+        return int(round(raw_price * haggling / 10) * 10), int(max(base, round(raw_price / 10) * 10))
+
+    return quote
+
+
+def _compile_acceptance(rules):
+    by_round = [float(chance) for chance in rules["by_round"]]
+    after_rounds = [(rule["rounds"], rule["add"]) for rule in rules["after_rounds"]]
+    ratios = [("at_least" in rule, rule.get("at_least", rule.get("at_most")), rule["add"])
+              for rule in rules["price_ratio"]]
+    # Past this round nothing changes any more
+    last = max([len(by_round) - 1] + [after for after, _ in after_rounds])
+
+    # Every chance the rules can produce, summed up front in the same order the
+    # arithmetic always used (levels without an adjustment add 0.0, which leaves
+    # the sum bit-identical): table[round][mood][traffic][weather] holds one
+    # chance per price-ratio rule, then the one for an offer no rule matched
+    table = []
+    for rounds in range(last + 1):
+        row = {mood: {traffic: {} for traffic in TRAFFIC_LEVELS} for mood in MOODS}
+        for mood, traffic, weather in ((m, t, w) for m in MOODS for t in TRAFFIC_LEVELS for w in WEATHER):
+            chance = by_round[min(rounds, len(by_round) - 1)] + float(rules["mood"].get(mood, 0)) \
+                + float(rules["traffic"].get(traffic, 0)) + float(rules["weather"].get(weather, 0))
+            chances = []
+            for add in [add for _, _, add in ratios] + [None]:
+                total = chance if add is None else chance + add
+                for after, bonus in after_rounds:
+                    if rounds >= after:
+                        total += bonus
+                chances.append(total)
+            row[mood][traffic][weather] = tuple(chances)
+        table.append(row)
+
+    # The price-ratio rules become an if chain with the thresholds inlined
+    # (repr round-trips floats exactly), compiled once like namedtuple does
+    lines = ["def acceptance(rounds, driver_mood, traffic_level, weather_now, price_ratio):",
+             "    chances = table[rounds if rounds < last else last][driver_mood][traffic_level][weather_now]"]
+    for i, (at_least, threshold, _) in enumerate(ratios):
+        lines.append(f"    if price_ratio {'>=' if at_least else '<='} {float(threshold)!r}: return chances[{i}]")
+    lines.append(f"    return chances[{len(ratios)}]")
+    namespace = {"table": tuple(table), "last": last}
+    exec("\n".join(lines), namespace)
+    acceptance = namespace["acceptance"]
+    acceptance.__doc__ = "Chance the driver takes an acceptable offer in this round"
+    return acceptance
+
+
+def read_rules(path) -> dict:
+    """Rules from a JSON file, or YAML (.yaml/.yml) when PyYAML is installed"""
+    with open(path, encoding="utf-8") as f:
+        if os.path.splitext(path)[1].lower() not in (".yaml", ".yml"):
+            try:
+                return json.load(f)
+            except ValueError as e:
+                raise ValueError(f"{path}: {e}")
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError(f"{path}: YAML rules need PyYAML (pip install pyyaml), or use JSON")
+        try:
+            return yaml.safe_load(f) or {}
+        except yaml.YAMLError as e:
+            raise ValueError(f"{path}: {e}")
+
+
+def load_policy(path) -> PricingPolicy:
+    """Read, validate and compile a rules file; errors name the file and the setting"""
+    try:
+        return PricingPolicy(read_rules(path))
+    except ValueError as e:
+        message = str(e)
+        raise ValueError(message if message.startswith(f"{path}:") else f"{path}: {message}")
+
+
+# Hot reload: long-running servers ask for current() whenever they start a
+# session. The file is stat'ed at most once per interval and recompiled only
+# when it changed; a file that no longer validates is reported and the last
+# good policy stays in force. Sessions already running keep the policy they
+# started with (their city model holds it), so nothing is dropped.
+class PolicyFile:
+    def __init__(self, path, interval=1.0):
+        self.path = path
+        self.interval = interval
+        self._stamp = self._stat()
+        self.policy = load_policy(path)
+        self.error: Optional[str] = None
+        self._checked = time.monotonic()
+
+    def _stat(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def current(self) -> PricingPolicy:
+        now = time.monotonic()
+        if now - self._checked >= self.interval:
+            self._checked = now
+            self.reload()
+        return self.policy
+
+    def reload(self) -> bool:
+        """Recompile if the file changed; True when a new policy took effect"""
+        try:
+            stamp = self._stat()
+            if stamp == self._stamp:
+                return False
+            self._stamp = stamp
+            policy = load_policy(self.path)
+        except (OSError, ValueError) as e:
+            if str(e) != self.error:
+                print(f"⚠️ Keeping pricing policy {self.policy.digest}: {e}", file=sys.stderr)
+            self.error = str(e)
+            return False
+        self.policy, self.error = policy, None
+        print(f"💰 Pricing policy {policy.digest} loaded from {self.path}", file=sys.stderr)
+        return True
+
+
+DEFAULT_POLICY = PricingPolicy()
+
+
+def _check(args):
+    policy = load_policy(args.rules)
+    print(f"{args.rules}: valid, policy {policy.digest}"
+          + (" (same as the defaults)" if policy.digest == DEFAULT_POLICY.digest else ""))
+    for km in (2, 5, 10, 20):
+        quoted, minimum = policy.quote(km, 12, "medium", "clear", "neutral")
+        print(f"  {km:>2} km, noon, medium traffic, clear, neutral driver: quotes ₹{quoted}, takes ₹{minimum}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate pricing rules files")
+    commands = parser.add_subparsers(dest="command", required=True)
+    check = commands.add_parser("check", help="validate and compile a rules file, show sample quotes")
+    check.add_argument("rules")
+    commands.add_parser("defaults", help="print the built-in rules as JSON, a starting point for a file")
+    args = parser.parse_args()
+    if args.command == "check":
+        try:
+            _check(args)
+        except (OSError, ValueError) as e:
+            sys.exit(f"❌ {e}")
+    else:
+        print(json.dumps(DEFAULT_RULES, indent=2))
@@ -0,0 +1,120 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import List
+
+import profiling
+
+# Profiles the negotiation hot path on a scripted workload: the recorded
+# dialogue corpus replayed turn by turn. By default under cProfile; with
+# --collapsed its stacks are sampled into the collapsed format flamegraph.pl
+# and speedscope read, and with --counters the @timed functions of game.py
+# (profiling.py) are counted instead. game.py is only imported once the mode
+# is known, since @timed decides at import whether to instrument.
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "data", "dialogues.jsonl")
+
+
+# Samples another thread's stack at a fixed interval and counts each
+# distinct stack, root first, as "frame;frame;frame count" lines
+class StackSampler:
+    def __init__(self, interval=0.001, thread_id=None):
+        self.interval = interval
+        self.thread_id = threading.get_ident() if thread_id is None else thread_id
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._switch = None
+
+    def __enter__(self):
+        # The sampler only runs when it gets the GIL, so ask the interpreter to
+        # hand it over about as often as we want samples
+        self._switch = sys.getswitchinterval()
+        sys.setswitchinterval(min(self._switch, self.interval / 2))
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        sys.setswitchinterval(self._switch)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{getattr(code, 'co_qualname', code.co_name)} ({os.path.basename(code.co_filename)})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+
+def read_corpus(path) -> List[dict]:
+    """Logged sessions (replay.py's transcript format), one JSON object per line"""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def replay_corpus(records, repeat=1):
+    """The scripted workload: replay every logged session `repeat` times; returns the sessions that diverged"""
+    from replay import replay  # Not at the top: --counters has to enable profiling before game.py loads
+    return sum(replay(record) is not None for _ in range(repeat) for record in records)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Profile the negotiation hot path on the recorded dialogue corpus")
+    parser.add_argument("corpus", nargs="?", default=DEFAULT_CORPUS, help="transcripts to replay (JSONL)")
+    parser.add_argument("--repeat", type=int, default=20, help="times the corpus is replayed")
+    parser.add_argument("--pstats", metavar="PATH", help="also save the cProfile data here (for snakeviz, pstats)")
+    parser.add_argument("--collapsed", metavar="PATH",
+                        help="sample stacks instead and write collapsed stacks here (flamegraph.pl, speedscope)")
+    parser.add_argument("--interval", type=float, default=0.0005, help="seconds between stack samples")
+    parser.add_argument("--counters", action="store_true", help="count and time the hot path instead of profiling it")
+    parser.add_argument("--top", type=int, default=25, help="functions shown from the profile")
+    args = parser.parse_args()
+
+    if args.counters:
+        profiling.enable()
+    try:
+        records = read_corpus(args.corpus)
+    except (OSError, ValueError) as e:
+        sys.exit(f"❌ {e}")
+    replay_corpus(records[:1])  # Imports and first-call set-up stay out of the measurements
+    profiling.reset()
+    turns = sum(len(record["turns"]) + 1 for record in records) * args.repeat
+
+    start = time.perf_counter()
+    if args.collapsed:
+        with StackSampler(args.interval) as sampler:
+            diverged = replay_corpus(records, args.repeat)
+        sampler.write(args.collapsed)
+        print(f"🔥 {sum(sampler.stacks.values()):,} samples, {len(sampler.stacks):,} distinct stacks "
+              f"-> {args.collapsed}")
+    elif args.counters:
+        diverged = replay_corpus(records, args.repeat)
+    else:
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        diverged = profiler.runcall(replay_corpus, records, args.repeat)
+        stats = pstats.Stats(profiler).strip_dirs().sort_stats("cumulative")
+        stats.print_stats(args.top)
+        if args.pstats:
+            stats.dump_stats(args.pstats)
+            print(f"💾 profile saved to {args.pstats}")
+    elapsed = time.perf_counter() - start
+    print(f"⏱️ {len(records) * args.repeat:,} sessions / {turns:,} turns in {elapsed:.2f} s"
+          f"{'' if args.collapsed or args.counters else ' (profiled)'}")
+    if diverged:
+        print(f"⚠️ {diverged} replayed sessions diverged from the corpus")
@@ -0,0 +1,75 @@
+import atexit
+import functools
+import os
+import sys
+import time
+from typing import Dict, List, Tuple
+
+# Opt-in instrumentation of the negotiation hot path.
+#
+# Functions decorated with @timed count their calls and add up their wall
+# time, but only when NEGOTIATE_PROFILE is set (to anything but 0) before
+# game.py is imported, or enable() was called before that: otherwise the
+# decorator hands the function back untouched, so the hot path pays
+# nothing at all. Times are inclusive (a turn's time includes the replies
+# it renders), and counts kept from several threads are approximate. Once
+# enabled, the totals are printed to stderr when the process exits.
+#
+# game.py imports this module, so it stays small: every game, server and
+# replay start pays for its imports. Profiling a workload (cProfile, stack
+# sampling) lives in profile_corpus.py.
+
+ENV = "NEGOTIATE_PROFILE"
+ENABLED = False
+
+# Qualified name -> [calls, total ns]
+_stats: Dict[str, List[int]] = {}
+
+
+def enable():
+    """Instrument every function decorated from now on, and report the counters at exit"""
+    global ENABLED
+    if not ENABLED:
+        ENABLED = True
+        atexit.register(lambda: print("\n".join(["⏱️ " + ENV] + report()), file=sys.stderr))
+
+
+def timed(func):
+    """Count and time calls to `func` when profiling is enabled; return it unchanged otherwise"""
+    if not ENABLED:
+        return func
+    stats = _stats.setdefault(func.__qualname__, [0, 0])
+    clock = time.perf_counter_ns
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = clock()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats[0] += 1
+            stats[1] += clock() - start
+    return wrapper
+
+
+def counters() -> Dict[str, Tuple[int, int]]:
+    """(calls, total ns) per instrumented function so far"""
+    return {name: (calls, ns) for name, (calls, ns) in _stats.items()}
+
+
+def reset():
+    for stats in _stats.values():
+        stats[0] = stats[1] = 0
+
+
+def report() -> List[str]:
+    """One line per instrumented function that was called, most total time first"""
+    rows = sorted(((ns, calls, name) for name, (calls, ns) in counters().items() if calls), reverse=True)
+    lines = [f"{'function':<40}{'calls':>10}{'total ms':>11}{'per call':>11}"]
+    for ns, calls, name in rows:
+        lines.append(f"{name:<40}{calls:>10,}{ns / 1e6:>11.1f}{ns / calls / 1e3:>9.2f}µs")
+    return lines
+
+
+if os.environ.get(ENV, "0") not in ("", "0"):
+    enable()
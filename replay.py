@@ -0,0 +1,159 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, NamedTuple, Optional
+
+from game import BANGALORE, BangaloreAutoGame, fixed_clock, greet, step
+from pricing_policy import DEFAULT_POLICY, load_policy
+from responses import LANGUAGES
+from road_matrix import RoadMatrix
+from strategies import DEFAULT_TABLE, LEGACY, load_strategy
+
+# Logged sessions handed to a worker at a time
+CHUNK_LINES = 2000
+
+# Cities the logs are replayed against, one per pricing policy digest (logs
+# from before policies were recorded used the default), and the driver
+# strategies they may name (logs from before strategies, the legacy one);
+# workers get theirs through _use_city
+_cities = {DEFAULT_POLICY.digest: BANGALORE}
+_strategies = {LEGACY.name: LEGACY}
+
+
+class Mismatch(NamedTuple):
+    """First point where a replayed session diverged from its log (turn 0 is the greeting)"""
+    seed: int
+    turn: int
+    user_text: str
+    expected: str
+    actual: str
+
+
+def replay(record, city=BANGALORE) -> Optional[Mismatch]:
+    """Replay one logged session offline; None means every reply matched"""
+    session = BangaloreAutoGame(city, seed=record["seed"], clock=fixed_clock(record["hour"]),
+                                language=record.get("language"))
+    actual = greet(session).text
+    if actual != record["greeting"]:
+        return Mismatch(record["seed"], 0, "", record["greeting"], actual)
+
+    for turn, (user_text, expected) in enumerate(record["turns"], 1):
+        actual = step(session, user_text).text
+        if actual != expected:
+            return Mismatch(record["seed"], turn, user_text, expected, actual)
+    return None
+
+
+def replay_lines(lines):
+    """Worker entry point: replay a chunk of JSON lines, return (sessions, turns, mismatches)"""
+    sessions = turns = 0
+    mismatches: List[Mismatch] = []
+    for line in lines:
+        record = json.loads(line)
+        sessions += 1
+        turns += len(record["turns"]) + 1
+        digest = record.get("pricing", DEFAULT_POLICY.digest)
+        name = record.get("strategy", LEGACY.name)
+        city, strategy = _cities.get(digest), _strategies.get(name)
+        if city is None:
+            mismatch = Mismatch(record["seed"], 0, "", f"pricing policy {digest}",
+                                "no such policy given with --pricing")
+        elif strategy is None:
+            mismatch = Mismatch(record["seed"], 0, "", f"strategy {name}", "no such table given with --strategy")
+        elif record.get("language", city.locale.language) not in LANGUAGES + (city.locale.language,):
+            mismatch = Mismatch(record["seed"], 0, "", f"language {record['language']}", "no such message file")
+        else:
+            if strategy is not city.strategy:
+                city = _cities[digest] = city.with_strategy(strategy)
+            mismatch = replay(record, city)
+        if mismatch is not None:
+            mismatches.append(mismatch)
+    return sessions, turns, mismatches
+
+
+def chunk_lines(paths, size=CHUNK_LINES):
+    """Non-blank lines of the files in order, in lists of `size` (the last may be shorter)"""
+    chunk = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    chunk.append(line)
+                    if len(chunk) == size:
+                        yield chunk
+                        chunk = []
+    if chunk:
+        yield chunk
+
+
+def _collect(results):
+    sessions = turns = 0
+    mismatches: List[Mismatch] = []
+    for chunk_sessions, chunk_turns, chunk_mismatches in results:
+        sessions += chunk_sessions
+        turns += chunk_turns
+        mismatches.extend(chunk_mismatches)
+    return sessions, turns, mismatches
+
+
+def _use_city(roads_path, pricing_paths=(), strategy_paths=()):
+    global _cities, _strategies
+    city = BANGALORE.with_roads(RoadMatrix(roads_path)) if roads_path else BANGALORE
+    _cities = {city.policy.digest: city}
+    for path in pricing_paths:
+        policy = load_policy(path)
+        _cities[policy.digest] = city.with_policy(policy)
+    tables = ([DEFAULT_TABLE] if os.path.exists(DEFAULT_TABLE) else []) + list(strategy_paths)
+    _strategies = {LEGACY.name: LEGACY}
+    for strategy in map(load_strategy, tables):
+        # The server re-solved the table for every policy it reloaded; so does the replay
+        for fitted in {strategy} | {strategy.for_policy(city.policy) for city in _cities.values()}:
+            _strategies[fitted.name] = fitted
+
+
+def replay_files(paths, workers=None, roads=None, pricing=(), strategies=()):
+    """Replay every session in the given transcript logs across a process pool
+
+    `roads` is the road matrix the server priced with, if it ran with --roads;
+    `pricing` lists the rules files it ran with (every version, if it reloaded)
+    and `strategies` the decision tables other than the shipped one.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        _use_city(roads, pricing, strategies)
+        return _collect(map(replay_lines, chunk_lines(paths)))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_use_city,
+                             initargs=(roads, pricing, strategies)) as pool:
+        return _collect(pool.map(replay_lines, chunk_lines(paths)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay logged negotiations and report any divergence")
+    parser.add_argument("logs", nargs="+", help="transcript JSONL files (negotiation_server.py --transcripts)")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--show", type=int, default=5, help="mismatches to print")
+    parser.add_argument("--roads", metavar="MATRIX", help="road matrix the sessions were priced with")
+    parser.add_argument("--pricing", metavar="RULES", action="append", default=[],
+                        help="pricing rules file the sessions were priced with (repeat for several)")
+    parser.add_argument("--strategy", metavar="TABLE", action="append", default=[],
+                        help="decision table the driver played, if not the shipped one (repeat for several)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    sessions, turns, mismatches = replay_files(args.logs, args.workers, args.roads, args.pricing,
+                                                 args.strategy)
+    elapsed = time.perf_counter() - start
+
+    print(f"🔁 Replayed {sessions:,} sessions / {turns:,} turns in {elapsed:.2f} s "
+          f"({sessions / elapsed:,.0f} sessions/s)")
+    for mismatch in mismatches[:args.show]:
+        print(f"❌ seed {mismatch.seed} turn {mismatch.turn} ({mismatch.user_text!r}):\n"
+              f"   logged:   {mismatch.expected}\n"
+              f"   replayed: {mismatch.actual}")
+    if mismatches:
+        print(f"{len(mismatches):,} sessions diverged")
+        sys.exit(1)
+    print("✅ Every session matched its log")
@@ -0,0 +1,153 @@
+import itertools
+import json
+import os
+from functools import lru_cache
+from string import Formatter
+from types import MappingProxyType
+from typing import Dict, List, Tuple
+
+from pricing_policy import TRAFFIC_LEVELS, WEATHER
+
+# How many of the most recent replies of a type may not be repeated
+RECENT_HISTORY = 3
+
+# Placeholders a reply may use; a reply is rendered from one value per slot, in this order
+SLOTS = ("price", "condition", "traffic", "weather")
+SLOT_INDEX = {slot: i for i, slot in enumerate(SLOTS)}
+
+# Reply types a message file must provide, with the slots each may use
+# (there is no price before the rider has named a destination)
+REPLY_SLOTS = {
+    "ask_destination": frozenset(("condition", "traffic", "weather")),
+    "unknown_place": frozenset(("condition", "traffic", "weather")),
+    **{reply_type: frozenset(SLOTS) for reply_type in ("price_high", "price_medium", "price_low", "too_low",
+                                                        "agreement", "close_distance", "far_distance")},
+}
+
+MESSAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "messages")
+DEFAULT_LANGUAGE = "hinglish"
+# Languages with a message file; session records store a language as its index here, so only append
+LANGUAGES = ("hinglish", "en", "kn", "ta")
+
+
+# A reply template split once into literal text and slot indexes
+class Template:
+    __slots__ = ('text', 'fields', 'segments')
+
+    def __init__(self, text, allowed=frozenset(SLOTS)):
+        self.text = text
+        # (literal, slot index or None) pairs, e.g. "₹{price} final" -> ("₹", 0), (" final", None)
+        segments = []
+        for literal, field, spec, conversion in Formatter().parse(text):
+            if field is not None and (field not in allowed or spec or conversion):
+                raise ValueError(f"unsupported placeholder {{{field}}} in {text!r}; "
+                                 f"expected one of {', '.join(sorted(allowed))}")
+            segments.append((literal, None if field is None else SLOT_INDEX[field]))
+        self.segments: Tuple[Tuple[str, int], ...] = tuple(segments)
+        self.fields = frozenset(SLOTS[slot] for _, slot in segments if slot is not None)
+
+    def render(self, values):
+        """Join the literals with `values` (one string per SLOTS entry); nothing is parsed or looked up by name"""
+        return "".join([literal if slot is None else literal + values[slot] for literal, slot in self.segments])
+
+
+# Non-repeating picker for one reply type, compiled into a transition table.
+# A state is the recent-history window (as template indices); for every state
+# the table holds the templates that may be picked next (in template order)
+# and the state each pick leads to, so a pick is two lookups and one draw.
+class ResponsePicker:
+    __slots__ = ('templates', 'options', 'transitions')
+
+    def __init__(self, texts, allowed=frozenset(SLOTS)):
+        self.templates = tuple(Template(text, allowed) for text in texts)
+        count = len(self.templates)
+        max_history = min(RECENT_HISTORY, count - 1)
+
+        states: Dict[Tuple[int, ...], int] = {(): 0}
+        pending: List[Tuple[int, ...]] = [()]
+        options: List[Tuple[int, ...]] = []
+        transitions: List[Tuple[int, ...]] = []
+        while pending:
+            history = pending.pop(0)
+            # Same rules as the list-based history it replaces: forget everything
+            # once (almost) all templates were used, never repeat anything still
+            # remembered, and remember only the last max_history picks
+            if len(history) >= count - 1:
+                history = ()
+            allowed = tuple(i for i in range(count) if i not in history) or tuple(range(count))
+            targets = [0] * count
+            for index in allowed:
+                following = history + (index,)
+                if max_history > 0 and len(following) > max_history:
+                    following = following[-max_history:]
+                if following not in states:
+                    states[following] = len(states)
+                    pending.append(following)
+                targets[index] = states[following]
+            options.append(allowed)
+            transitions.append(tuple(targets))
+
+        self.options = tuple(options)
+        self.transitions = tuple(transitions)
+
+
+def compile_catalog(responses) -> Dict[str, ResponsePicker]:
+    """Compile every reply type of a response table once, at load time
+
+    Raises ValueError for a placeholder that is not one of the reply type's slots.
+    """
+    return {response_type: ResponsePicker(texts, REPLY_SLOTS.get(response_type, frozenset(SLOTS)))
+            for response_type, texts in responses.items() if texts}
+
+
+# Everything a session needs to talk in one language: the compiled replies,
+# the words for traffic levels and weather, and the two ways the driver
+# mentions conditions ("traffic {traffic}", "weather {weather}"). Locales
+# are immutable and shared by every session speaking the language.
+class Locale:
+    __slots__ = ('language', 'name', 'responses', 'catalog', 'words', 'conditions', '_said')
+
+    def __init__(self, language, responses, words=None, conditions=None, name=None):
+        self.language = language
+        self.name = name or language
+        self.responses = MappingProxyType({k: tuple(v) for k, v in responses.items()})
+        self.catalog = MappingProxyType(compile_catalog(responses))
+        # Traffic levels and weather as pricing_policy names them -> as the replies say them
+        self.words = MappingProxyType(dict(words or {}))
+        conditions = conditions or {"traffic": "traffic {traffic}", "weather": "weather {weather}"}
+        self.conditions = MappingProxyType({kind: Template(conditions[kind], frozenset((kind,)))
+                                            for kind in ("traffic", "weather")})
+        # Every slot but the price, per (condition, traffic, weather), made up front
+        self._said = {key: self._say(*key) for key in itertools.product(self.conditions, TRAFFIC_LEVELS, WEATHER)}
+
+    def _say(self, condition, traffic, weather):
+        traffic, weather = self.words.get(traffic, traffic), self.words.get(weather, weather)
+        return self.conditions[condition].render(("", "", traffic, weather)), traffic, weather
+
+    def values(self, price, condition, traffic, weather) -> Tuple[str, str, str, str]:
+        """Slot values for a reply; `condition` says which of "traffic" and "weather" the driver brings up"""
+        said = self._said.get((condition, traffic, weather)) or self._say(condition, traffic, weather)
+        return ("" if price is None else str(price),) + said
+
+
+def read_messages(path, language=None) -> Locale:
+    """A Locale from a message file: {"name", "words", "conditions", "replies": {type: [template, ...]}}"""
+    language = language or os.path.splitext(os.path.basename(path))[0]
+    with open(path, encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+            replies = data["replies"]
+            missing = [reply_type for reply_type in REPLY_SLOTS if not replies.get(reply_type)]
+            if missing:
+                raise ValueError(f"no replies for {', '.join(missing)}")
+            return Locale(language, replies, data.get("words"), data.get("conditions"), data.get("name"))
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"{path}: not a message file ({e})")
+
+
+@lru_cache(maxsize=None)
+def load_locale(language=DEFAULT_LANGUAGE) -> Locale:
+    """The shipped catalogue for a language, read and compiled the first time a session asks for it"""
+    if language not in LANGUAGES:
+        raise ValueError(f"unknown language {language!r}; expected one of {', '.join(LANGUAGES)}")
+    return read_messages(os.path.join(MESSAGES_DIR, f"{language}.json"), language)
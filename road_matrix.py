@@ -0,0 +1,166 @@
+import argparse
+import csv
+import heapq
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Sequence, Tuple
+
+# File layout, little endian:
+#   header  magic "RDMX", version u16, reserved u16, area count u32, names length u32
+#   names   the area names, UTF-8, newline separated, padded with zeros to 4 bytes
+#   matrix  count × count float32, row-major: matrix[i * count + j] is i -> j in km
+MAGIC = b"RDMX"
+VERSION = 1
+HEADER = struct.Struct("<4sHHII")
+
+Graph = Dict[str, List[Tuple[str, float]]]
+
+
+def load_graph(path) -> Graph:
+    """Adjacency lists from an edge CSV: from,to,km[,oneway]; lines starting with # are comments"""
+    graph: Graph = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(line for line in f if line.strip() and not line.startswith("#"))
+        for record in reader:
+            start = " ".join(record["from"].lower().split())
+            end = " ".join(record["to"].lower().split())
+            km = float(record["km"])
+            if km < 0:
+                raise ValueError(f"{path}: negative length on {start} -> {end}")
+            graph.setdefault(start, []).append((end, km))
+            graph.setdefault(end, [])
+            if (record.get("oneway") or "").strip().lower() not in ("yes", "true", "1"):
+                graph[end].append((start, km))
+    return graph
+
+
+def shortest_paths(graph: Graph, source) -> Dict[str, float]:
+    """Dijkstra from one node; nodes it cannot reach are missing from the result"""
+    done: Dict[str, float] = {}
+    frontier = [(0.0, source)]
+    while frontier:
+        distance, node = heapq.heappop(frontier)
+        if node in done:
+            continue
+        done[node] = distance
+        for neighbour, km in graph[node]:
+            if neighbour not in done:
+                heapq.heappush(frontier, (distance + km, neighbour))
+    return done
+
+
+# Set once per worker process, so the graph is not pickled with every row
+_graph: Graph = {}
+_areas: Sequence[str] = ()
+
+
+def _init(graph, areas):
+    global _graph, _areas
+    _graph, _areas = graph, areas
+
+
+def _row(source):
+    # Worker entry point: one source area's row of the matrix
+    reached = shortest_paths(_graph, source)
+    return [reached.get(area, math.inf) for area in _areas]
+
+
+def build_matrix(graph: Graph, areas: Sequence[str], workers=None) -> List[List[float]]:
+    """All-pairs road distances between the given areas (one Dijkstra per area, in parallel)"""
+    missing = [area for area in areas if area not in graph]
+    if missing:
+        raise ValueError(f"areas not in the road graph: {', '.join(missing)}")
+    if workers == 1:
+        _init(graph, areas)
+        rows = list(map(_row, areas))
+    else:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init, initargs=(graph, areas)) as pool:
+            rows = list(pool.map(_row, areas, chunksize=max(1, len(areas) // (4 * workers))))
+    unreachable = [(a, b) for a, row in zip(areas, rows) for b, km in zip(areas, row) if km == math.inf]
+    if unreachable:
+        raise ValueError(f"{len(unreachable)} area pairs have no road between them, e.g. {unreachable[0]}")
+    return rows
+
+
+def write_matrix(path, areas: Sequence[str], rows):
+    names = "\n".join(areas).encode("utf-8")
+    names += b"\0" * (-len(names) % 4)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(areas), len(names)))
+        f.write(names)
+        for row in rows:
+            f.write(struct.pack(f"<{len(row)}f", *row))
+
+
+# Read side: the file is mapped, not read, so every process that opens it
+# shares the same page-cache pages and opening it costs only the name table
+class RoadMatrix:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count, names_length = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a version {VERSION} road matrix")
+        self.offset = HEADER.size + names_length
+        if len(self._map) != self.offset + 4 * count * count:
+            raise ValueError(f"{path}: truncated road matrix")
+        self.names = tuple(bytes(self._map[HEADER.size:self.offset]).rstrip(b"\0").decode("utf-8").split("\n"))
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.count = count
+        self.values = memoryview(self._map)[self.offset:].cast("f")
+
+    def distance(self, origin, destination):
+        """Road km from origin to destination (not always the same both ways)"""
+        return self.values[self.index[origin] * self.count + self.index[destination]]
+
+    def array(self):
+        """The matrix as a read-only count × count float32 NumPy view over the mapping"""
+        import numpy as np
+        return np.frombuffer(self._map, dtype=np.float32, count=self.count * self.count,
+                             offset=self.offset).reshape(self.count, self.count)
+
+    def __reduce__(self):
+        # Worker processes reopen (and so share) the file instead of pickling its contents
+        return RoadMatrix, (self.path,)
+
+
+def _build(args):
+    from game import BANGALORE, load_city
+    city = load_city(args.city) if args.city else BANGALORE
+    areas = list(city.areas)
+    start = time.perf_counter()
+    graph = load_graph(args.graph)
+    rows = build_matrix(graph, areas, args.workers)
+    write_matrix(args.out, areas, rows)
+    print(f"🛣  {len(areas):,} areas over {len(graph):,} road nodes in {time.perf_counter() - start:.2f} s "
+          f"-> {args.out} ({os.path.getsize(args.out):,} bytes)")
+
+
+def _show(args):
+    matrix = RoadMatrix(args.matrix)
+    print(f"{args.matrix}: {matrix.count:,} areas")
+    if args.origin and args.destination:
+        print(f"{args.origin} -> {args.destination}: {matrix.distance(args.origin, args.destination):.1f} km")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute and inspect road-distance matrices")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="all-pairs road distances between a city's areas")
+    build.add_argument("graph", help="edge CSV: from,to,km[,oneway]")
+    build.add_argument("--out", required=True)
+    build.add_argument("--city", default=None, help="locality CSV/GeoJSON (default: built-in Bangalore)")
+    build.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    show = commands.add_parser("show", help="summarise a matrix or look up one trip")
+    show.add_argument("matrix")
+    show.add_argument("origin", nargs="?")
+    show.add_argument("destination", nargs="?")
+    args = parser.parse_args()
+    sys.exit(_build(args) if args.command == "build" else _show(args))
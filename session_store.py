@@ -0,0 +1,271 @@
+import os
+import sqlite3
+import struct
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, Optional
+
+from game import BANGALORE, BangaloreAutoGame, SessionRandom
+from responses import LANGUAGES, load_locale
+
+# Session record layout, little endian, no padding:
+#   B version  B flags  B status  B hour  B traffic  B weather  B mood
+#   I negotiation_rounds  Q rng state  Q seed  I current_location  I destination
+#   d distance  q base_price  q min_price  q current_price  q last_offer
+#   B language (index into responses.LANGUAGES, CITY_LANGUAGE for the city's own replies)
+#   6s pricing policy digest (its 12 hex digits as bytes)
+#   B reply types, then one H picker state per reply type of the city's catalogue
+# Areas, conditions and reply types are stored as indexes into the city model,
+# so a record is only meaningful together with the city it was saved from.
+VERSION = 4
+RECORD = struct.Struct("<BBBBBBBIQQIIdqqqqB6sB")
+DIGEST_OFFSET = RECORD.size - 7
+
+HAS_SEED = 1
+HAS_TRIP = 2
+HAS_OFFER = 4
+STATUSES = ("continue", "done", "exit")
+CITY_LANGUAGE = 255
+
+
+class _CityTables:
+    __slots__ = ('areas', 'area_index', 'reply_types', 'states', 'traffic', 'weather', 'mood')
+
+    def __init__(self, city):
+        self.areas = tuple(city.areas)
+        self.area_index = city.geo.index if city.geo is not None else {name: i for i, name in enumerate(self.areas)}
+        self.reply_types = tuple(city.catalog)
+        self.states = struct.Struct(f"<{len(self.reply_types)}H")
+        self.traffic = tuple(city.traffic_multipliers)
+        self.weather = tuple(city.weather_multipliers)
+        self.mood = tuple(city.mood_multipliers)
+
+
+def _tables(city) -> _CityTables:
+    # Kept in city.derived, so a city's policy and strategy clones share one copy
+    tables = city.derived.get("session_tables")
+    if tables is None:
+        tables = city.derived["session_tables"] = _CityTables(city)
+    return tables
+
+
+def dump_session(session: BangaloreAutoGame) -> bytes:
+    """Serialise a session's state into a small fixed-layout record (about 100 bytes)
+
+    Raises ValueError for state that does not fit the record: a generator
+    other than SessionRandom, a seed or price outside 64 bits, or replies in
+    a language that is neither the city's nor one of responses.LANGUAGES.
+    """
+    if type(session.rng) is not SessionRandom:
+        raise ValueError("only sessions on a SessionRandom generator can be saved")
+    if session.locale is session.city.locale:
+        language = CITY_LANGUAGE
+    elif session.locale.language in LANGUAGES:
+        language = LANGUAGES.index(session.locale.language)
+    else:
+        raise ValueError(f"sessions in language {session.locale.language!r} cannot be saved")
+    tables = _tables(session.city)
+    flags = 0
+    if session.seed is not None:
+        flags |= HAS_SEED
+    if session.destination is not None:
+        flags |= HAS_TRIP
+    if session.last_offer is not None:
+        flags |= HAS_OFFER
+    try:
+        head = RECORD.pack(
+            VERSION, flags, STATUSES.index(session.status), session.time,
+            tables.traffic.index(session.traffic_level), tables.weather.index(session.weather),
+            tables.mood.index(session.driver_mood), session.negotiation_rounds, session.rng.state,
+            session.seed or 0, tables.area_index[session.current_location],
+            tables.area_index[session.destination] if flags & HAS_TRIP else 0,
+            session.distance if flags & HAS_TRIP else 0.0,
+            session.base_price if flags & HAS_TRIP else 0,
+            session.min_price if flags & HAS_TRIP else 0,
+            session.current_price if flags & HAS_TRIP else 0,
+            session.last_offer or 0,
+            language, bytes.fromhex(session.city.policy.digest), len(tables.reply_types))
+    except struct.error as e:
+        raise ValueError(f"session does not fit the record: {e}")
+    states = session.response_states
+    return head + tables.states.pack(*[states.get(reply_type, 0) for reply_type in tables.reply_types])
+
+
+def policy_digest(data) -> str:
+    """Digest of the pricing policy a record was saved under"""
+    if data[0] != VERSION:
+        raise ValueError(f"session record version {data[0]}, expected {VERSION}")
+    return data[DIGEST_OFFSET:DIGEST_OFFSET + 6].hex()
+
+
+def load_session(data, city=BANGALORE) -> BangaloreAutoGame:
+    """Rebuild a session from dump_session output, against the same city model"""
+    (version, flags, status, hour, traffic, weather, mood, rounds, rng_state, seed, location, destination,
+     distance, base_price, min_price, current_price, last_offer, language, _, reply_types) = RECORD.unpack_from(data)
+    tables = _tables(city)
+    if version != VERSION:
+        raise ValueError(f"session record version {version}, expected {VERSION}")
+    if reply_types != len(tables.reply_types) or len(data) != RECORD.size + tables.states.size:
+        raise ValueError("session record was saved from a different city model")
+
+    # Bypass __init__: it would draw fresh conditions from a new generator
+    session = object.__new__(BangaloreAutoGame)
+    session.city = city
+    session.locale = city.locale if language == CITY_LANGUAGE else load_locale(LANGUAGES[language])
+    session.rng = rng = SessionRandom()
+    rng.state = rng_state
+    session.seed = seed if flags & HAS_SEED else None
+    session.response_states = {reply_type: state for reply_type, state
+                               in zip(tables.reply_types, tables.states.unpack_from(data, RECORD.size)) if state}
+    session.current_location = tables.areas[location]
+    trip = flags & HAS_TRIP
+    session.destination = tables.areas[destination] if trip else None
+    session.distance = distance if trip else None
+    session.base_price = base_price if trip else None
+    session.min_price = min_price if trip else None
+    session.current_price = current_price if trip else None
+    session.last_offer = last_offer if flags & HAS_OFFER else None
+    session.time = hour
+    session.traffic_level = tables.traffic[traffic]
+    session.weather = tables.weather[weather]
+    session.driver_mood = tables.mood[mood]
+    session.negotiation_rounds = rounds
+    session.status = STATUSES[status]
+    return session
+
+
+# Stores share one small interface: save/load/delete by integer session id.
+# Records are opaque bytes to them; (de)serialisation happens here. A store
+# missing any of the byte-level methods cannot be created.
+class SessionStore(ABC):
+    def save(self, session_id, session):
+        self.put(session_id, dump_session(session))
+
+    def load(self, session_id, city=BANGALORE, cities=None) -> Optional[BangaloreAutoGame]:
+        """The stored session, or None
+
+        `cities` maps pricing policy digests to city models: a session is
+        loaded against the one it was saved under, so it finishes on the
+        policy it started with, and against `city` if none matches.
+        """
+        data = self.get(session_id)
+        if data is None:
+            return None
+        if cities:
+            city = cities.get(policy_digest(data), city)
+        return load_session(data, city)
+
+    @abstractmethod
+    def put(self, session_id, data):
+        """Store a record, replacing any earlier one for this id"""
+
+    @abstractmethod
+    def get(self, session_id) -> Optional[bytes]:
+        """The stored record, or None"""
+
+    @abstractmethod
+    def delete(self, session_id):
+        """Drop the record; no-op if there is none"""
+
+    @abstractmethod
+    def ids(self) -> Iterator[int]:
+        """Ids of every stored session"""
+
+    def close(self):
+        pass
+
+
+# Within one process: survives nothing, but lets sessions move between hubs
+class MemorySessionStore(SessionStore):
+    def __init__(self):
+        self.records: Dict[int, bytes] = {}
+
+    def put(self, session_id, data):
+        self.records[session_id] = data
+
+    def get(self, session_id):
+        return self.records.get(session_id)
+
+    def delete(self, session_id):
+        self.records.pop(session_id, None)
+
+    def ids(self):
+        return iter(list(self.records))
+
+
+# One SQLite file shared by every worker on the host. WAL lets readers and the
+# writer overlap, and synchronous=NORMAL skips the fsync per commit: a power
+# cut may lose the last turns, a crashed or redeployed worker loses nothing.
+class SqliteSessionStore(SessionStore):
+    def __init__(self, path):
+        self.path = path
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS sessions (id INTEGER PRIMARY KEY, state BLOB NOT NULL)")
+
+    def put(self, session_id, data):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO sessions (id, state) VALUES (?, ?)", (session_id, data))
+
+    def get(self, session_id):
+        with self._lock:
+            row = self._db.execute("SELECT state FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return None if row is None else row[0]
+
+    def delete(self, session_id):
+        with self._lock:
+            self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def ids(self):
+        with self._lock:
+            return iter([row[0] for row in self._db.execute("SELECT id FROM sessions")])
+
+    def close(self):
+        self._db.close()
+
+
+# One file per session in a directory, replaced atomically on every save
+class FileSessionStore(SessionStore):
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, session_id):
+        return os.path.join(self.directory, f"{session_id}.session")
+
+    def put(self, session_id, data):
+        handle, temp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(handle, "wb") as f:
+            f.write(data)
+        os.replace(temp, self._path(session_id))
+
+    def get(self, session_id):
+        try:
+            with open(self._path(session_id), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def delete(self, session_id):
+        try:
+            os.remove(self._path(session_id))
+        except FileNotFoundError:
+            pass
+
+    def ids(self):
+        return iter([int(name[:-8]) for name in os.listdir(self.directory) if name.endswith(".session")])
+
+
+def open_store(spec) -> SessionStore:
+    """Store from a command-line spec: "memory", "sqlite:PATH" or "files:DIRECTORY" """
+    kind, _, location = spec.partition(":")
+    if kind == "memory":
+        return MemorySessionStore()
+    if kind == "sqlite" and location:
+        return SqliteSessionStore(location)
+    if kind == "files" and location:
+        return FileSessionStore(location)
+    raise ValueError(f"unknown session store {spec!r}; use memory, sqlite:PATH or files:DIRECTORY")
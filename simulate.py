@@ -0,0 +1,237 @@
+import argparse
+import os
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple
+
+from events import EventLog
+from game import BANGALORE, BangaloreAutoGame, fixed_clock, step
+from strategies import load_strategy
+
+# Ratio of final price to the driver's minimum is bucketed at this resolution
+RATIO_BUCKET = 0.01
+
+# Rider turns after which an unfinished haggle is counted as no deal
+MAX_TURNS = 30
+
+
+# Rider that follows a fixed script and accepts whatever is on the table at the end
+class ScriptedRider:
+    def __init__(self, lines):
+        self.lines = tuple(lines)
+
+    def respond(self, session, turn):
+        """Next rider utterance for this negotiation turn (0-based)"""
+        return self.lines[turn] if turn < len(self.lines) else "ok"
+
+
+# Rider that anchors low and concedes a fixed step of the opening quote each turn
+class AnchoringRider:
+    def __init__(self, opening_ratio, step_ratio, patience):
+        self.opening_ratio = opening_ratio
+        self.step_ratio = step_ratio
+        self.patience = patience
+
+    def respond(self, session, turn):
+        """Next rider utterance for this negotiation turn (0-based)"""
+        ratio = min(1.0, self.opening_ratio + self.step_ratio * turn)
+        offer = int(round(session.base_price * ratio / 5) * 5)
+        # Take the driver's price once it is within reach, or when out of patience
+        if session.current_price <= offer or turn >= self.patience:
+            return "ok"
+        return str(offer)
+
+
+# Rider with a private reservation price (a fraction of the quote, fixed per
+# session seed) who closes part of the gap to it every turn, takes the
+# driver's price once it is within the reservation and walks away when out
+# of patience. The reservation is drawn on an episode's first turn and kept
+# until the next episode starts.
+class ConcedingRider:
+    def __init__(self, opening_ratio, concession, low, high, patience):
+        self.opening_ratio = opening_ratio
+        self.concession = concession
+        self.low = low
+        self.high = high
+        self.patience = patience
+        self._seed = None
+        self._reservation = None
+
+    def respond(self, session, turn):
+        """Next rider utterance for this negotiation turn (0-based)"""
+        if turn == 0 or session.seed != self._seed:
+            self._seed = session.seed
+            self._reservation = random.Random(session.seed).uniform(self.low, self.high)
+        reservation = self._reservation
+        if session.current_price <= session.base_price * reservation:
+            return "ok"
+        if turn >= self.patience:
+            return "bye"
+        ratio = reservation - (reservation - self.opening_ratio) * (1 - self.concession) ** turn
+        return str(int(round(session.base_price * ratio / 5) * 5))
+
+
+RIDER_POLICIES = {
+    "anchor": AnchoringRider(opening_ratio=0.6, step_ratio=0.08, patience=6),
+    "hardball": AnchoringRider(opening_ratio=0.45, step_ratio=0.05, patience=10),
+    "pushover": AnchoringRider(opening_ratio=0.85, step_ratio=0.05, patience=2),
+    "conceder": ConcedingRider(opening_ratio=0.5, concession=0.35, low=0.65, high=0.95, patience=8),
+    "script": ScriptedRider(["100", "nahi", "120", "bahut zyada", "130", "140", "150"]),
+}
+
+
+class ChunkResult(NamedTuple):
+    """Aggregated outcome of a batch of episodes (small enough to ship between processes)"""
+    episodes: int
+    deals: int
+    rounds: Counter
+    ratio_buckets: Counter
+    scores: Counter
+
+
+def play_episode(rider, rng, events=None, city=BANGALORE):
+    """Play one negotiation and return (turns, final/min ratio, score) or None without a deal
+
+    With an events.EventLog every turn is logged, under the session's seed.
+    """
+    session = BangaloreAutoGame(city, seed=rng.getrandbits(64), clock=fixed_clock(rng.randrange(24)))
+    destination = rng.choice([area for area in city.areas if area != session.current_location])
+    if events is not None:
+        events.turn(session.seed, session)
+    user_text = f"{destination} jana hai"
+    reply = step(session, user_text)
+    if events is not None:
+        events.turn(session.seed, session, user_text, reply.status)
+
+    for turn in range(MAX_TURNS):
+        user_text = rider.respond(session, turn)
+        reply = step(session, user_text)
+        if events is not None:
+            events.turn(session.seed, session, user_text, reply.status)
+        if reply.status == "done":
+            return turn + 1, session.current_price / session.min_price, session.negotiation_score()
+        if reply.status == "exit":
+            return None
+    return None
+
+
+def run_chunk(args):
+    """Worker entry point: play `episodes` games from one seed"""
+    policy, episodes, seed, events_path, strategy = args
+    rider = RIDER_POLICIES[policy]
+    city = BANGALORE if strategy == "legacy" else BANGALORE.with_strategy(load_strategy(strategy))
+    # Every session seed is drawn from the chunk's generator, so each chunk is
+    # reproducible on its own no matter which worker runs it
+    rng = random.Random(seed)
+    events = EventLog(events_path) if events_path else None
+
+    rounds, ratio_buckets, scores = Counter(), Counter(), Counter()
+    deals = 0
+    for _ in range(episodes):
+        outcome = play_episode(rider, rng, events, city)
+        if outcome is None:
+            continue
+        turns, ratio, score = outcome
+        deals += 1
+        rounds[turns] += 1
+        ratio_buckets[int(ratio / RATIO_BUCKET)] += 1
+        scores[score] += 1
+    if events is not None:
+        events.close()
+    return ChunkResult(episodes, deals, rounds, ratio_buckets, scores)
+
+
+def chunk_plan(episodes, chunk_size, seed, policy, events=None, strategy="legacy"):
+    """Split the run into chunks whose seeds depend only on the master seed"""
+    master = random.Random(seed)
+    plan = []
+    remaining = episodes
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        plan.append((policy, size, master.getrandbits(64), events, strategy))
+        remaining -= size
+    return plan
+
+
+def merge(results):
+    """Combine chunk results into one"""
+    total = ChunkResult(0, 0, Counter(), Counter(), Counter())
+    for result in results:
+        total.rounds.update(result.rounds)
+        total.ratio_buckets.update(result.ratio_buckets)
+        total.scores.update(result.scores)
+        total = total._replace(episodes=total.episodes + result.episodes, deals=total.deals + result.deals)
+    return total
+
+
+def simulate(episodes, policy="anchor", workers=None, seed=0, chunk_size=10000, events=None, strategy="legacy"):
+    """Run episodes across a process pool; results depend on the seed, not the worker count
+
+    `events` is a path every worker appends its turn events to (events.py).
+    `strategy` is the driver's, as strategies.load_strategy takes it.
+    """
+    plan = chunk_plan(episodes, chunk_size, seed, policy, events, strategy)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return merge(map(run_chunk, plan))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return merge(pool.map(run_chunk, plan))
+
+
+def quantile(histogram: Dict[int, int], q):
+    """Quantile of a bucket → count histogram, as a bucket key"""
+    target = q * (sum(histogram.values()) - 1)
+    seen = 0
+    for key in sorted(histogram):
+        seen += histogram[key]
+        if seen > target:
+            return key
+    return None
+
+
+def report(result: ChunkResult) -> List[str]:
+    lines = [f"episodes:          {result.episodes:,}",
+             f"deals:             {result.deals:,} ({result.deals / max(1, result.episodes):.1%})"]
+    if not result.deals:
+        return lines
+
+    lines.append("\nrounds to deal:")
+    for turns in sorted(result.rounds):
+        share = result.rounds[turns] / result.deals
+        lines.append(f"  {turns:>3}  {share:6.1%}  {'█' * int(share * 50)}")
+
+    lines.append("\nfinal price / driver minimum:")
+    for q in (0.1, 0.25, 0.5, 0.75, 0.9):
+        lines.append(f"  p{int(q * 100):<3} {quantile(result.ratio_buckets, q) * RATIO_BUCKET:.2f}")
+
+    lines.append("\nnegotiation score:")
+    for score in range(11):
+        share = result.scores.get(score, 0) / result.deals
+        lines.append(f"  {score:>3}  {share:6.1%}  {'█' * int(share * 50)}")
+    return lines
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo simulation of riders haggling with the driver")
+    parser.add_argument("--episodes", type=int, default=100000)
+    parser.add_argument("--policy", choices=sorted(RIDER_POLICIES), default="anchor")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--events", metavar="PATH", help="append one JSON event per turn here (events.py)")
+    parser.add_argument("--strategy", default="legacy",
+                        help="driver strategy: legacy, opponent, or a table built with strategies.py build")
+    args = parser.parse_args()
+    try:
+        load_strategy(args.strategy)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    start = time.perf_counter()
+    result = simulate(args.episodes, args.policy, args.workers, args.seed, args.chunk_size, args.events,
+                      args.strategy)
+    elapsed = time.perf_counter() - start
+    print("\n".join(report(result)))
+    print(f"\n⏱️ {elapsed:.1f} s ({result.episodes / elapsed:,.0f} episodes/s)")
@@ -1,44 +1,242 @@
-import whisper
-import os
-import subprocess
-
-
-audio_path_raw = r"C:\Users\t3j4s\OneDrive\Desktop\Teju\Flutter\my_new_project\lib\test.mp3"
-converted_audio = "test_fixed.wav"  
-
-
-print(f"Current working directory: {os.getcwd()}")
-
-
-if not os.path.exists(audio_path_raw):
-    print(f"Error: Audio file not found at {audio_path_raw}")
-    exit(1)
-
-
-print("Converting audio to a supported format...")
-try:
-    subprocess.run(
-        ["ffmpeg", "-i", audio_path_raw, "-ar", "16000", "-ac", "1", "-c:a", "pcm_s16le", converted_audio],
-        check=True,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE
-    )
-    print("Conversion successful!")
-except subprocess.CalledProcessError as e:
-    print(f"FFmpeg error: {e}")
-    exit(1)
-
-
-try:
-    print("Loading Whisper model...")
-    model = whisper.load_model("base")  
-    result = model.transcribe(converted_audio, language="en")  
-    print("\nTranscription result:")
-    print(result["text"])
-
-except Exception as e:
-    print(f"\nTranscription error: {e}")
-    exit(1)
-
-
-os.remove(converted_audio)
+import argparse
+import importlib.util
+import os
+import shutil
+import subprocess
+import sys
+from typing import List, NamedTuple, Optional
+
+# whisper (and with it torch) and numpy are imported inside the functions
+# that need them: tools that import this module, or runs that stop at a
+# missing file or --check, never pay their import time
+
+
+audio_path_raw = r"C:\Users\t3j4s\OneDrive\Desktop\Teju\Flutter\my_new_project\lib\test.mp3"
+
+MODEL_NAME = "base"
+LANGUAGE = "en"
+SAMPLE_RATE = 16000  # What Whisper expects
+N_FRAMES = 3000  # Mel frames in the 30 s window the encoder always sees
+
+# How the model runs, chosen with one option, "KIND[:THREADS[:INTEROP]]":
+#   fp32    Whisper as released (on the GPU when there is one)
+#   int8    on the CPU, linear layers quantised to int8 as the model loads
+#   traced  on the CPU, the audio encoder traced to TorchScript, frozen and
+#           optimised for inference; it runs locally like any other module
+# THREADS pins torch's intra-op pool and INTEROP its inter-op pool; both
+# default to torch's own choice. Examples: "int8:8", "traced:4:1".
+BACKENDS = ("fp32", "int8", "traced")
+DEFAULT_BACKEND = "fp32"
+
+
+def decode_audio(source):
+    """Decode a file path or raw audio bytes to 16 kHz mono float32 samples, without temp files"""
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        # Encoded bytes go in on stdin, PCM comes out on stdout
+        command = ["ffmpeg", "-i", "pipe:0"]
+        data = bytes(source)
+    else:
+        command = ["ffmpeg", "-nostdin", "-i", source]
+        data = None
+    command += ["-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(SAMPLE_RATE), "pipe:1"]
+
+    output = subprocess.run(command, input=data, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE).stdout
+    import numpy as np
+    return np.frombuffer(output, np.int16).astype(np.float32) / 32768.0
+
+
+class Backend(NamedTuple):
+    kind: str = DEFAULT_BACKEND
+    threads: Optional[int] = None
+    interop_threads: Optional[int] = None
+
+
+def parse_backend(spec) -> Backend:
+    """A Backend from "KIND[:THREADS[:INTEROP]]" (a Backend is returned as is)"""
+    if isinstance(spec, Backend):
+        return spec
+    kind, *counts = spec.split(":")
+    if kind not in BACKENDS or len(counts) > 2:
+        raise ValueError(f"unknown backend {spec!r}: use KIND[:THREADS[:INTEROP]], KIND one of {', '.join(BACKENDS)}")
+    try:
+        threads = [int(count) if count else None for count in counts]
+    except ValueError:
+        raise ValueError(f"backend {spec!r}: thread counts must be whole numbers")
+    if any(count is not None and count < 1 for count in threads):
+        raise ValueError(f"backend {spec!r}: thread counts must be at least 1")
+    return Backend(kind, *threads)
+
+
+def model_label(name=MODEL_NAME, backend=DEFAULT_BACKEND):
+    """The model as cache keys and logs name it: a backend that can change the text gets its own label"""
+    kind = parse_backend(backend).kind
+    return name if kind == "fp32" else f"{name}+{kind}"
+
+
+def pin_threads(backend: Backend):
+    """Apply the backend's thread counts to torch (process-wide)"""
+    import torch
+    if backend.threads:
+        torch.set_num_threads(backend.threads)
+    if backend.interop_threads and torch.get_num_interop_threads() != backend.interop_threads:
+        try:
+            torch.set_num_interop_threads(backend.interop_threads)
+        except RuntimeError:
+            # Only possible before the first parallel op of the process
+            print(f"⚠️ inter-op threads already fixed at {torch.get_num_interop_threads()}", file=sys.stderr)
+
+
+def quantize_int8(model):
+    """Quantise the model's linear layers to int8 in place (dynamic quantisation, CPU only)"""
+    import torch
+    import whisper.model
+    # Whisper's Linear subclasses nn.Linear only to cast its weights to the
+    # input's dtype, and quantize_dynamic matches exact types: without the
+    # swap nothing would be quantised. The subclass adds no state.
+    for module in model.modules():
+        if type(module) is whisper.model.Linear:
+            module.__class__ = torch.nn.Linear
+    return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+
+
+def trace_encoder(model):
+    """Replace the audio encoder with TorchScript graphs, traced once per input shape"""
+    import torch
+
+    class TracedEncoder(torch.nn.Module):
+        def __init__(self, encoder):
+            super().__init__()
+            self.eager = encoder.eval()
+            self.graphs = {}
+
+        def forward(self, mel):
+            # A trace fixes the batch size, so batched decoding gets one graph per size
+            graph = self.graphs.get(mel.shape)
+            if graph is None:
+                with torch.no_grad():
+                    graph = torch.jit.freeze(torch.jit.trace(self.eager, mel, check_trace=False))
+                    graph = torch.jit.optimize_for_inference(graph)
+                self.graphs[mel.shape] = graph
+            return graph(mel)
+
+    model.encoder = TracedEncoder(model.encoder)
+    # Trace the single-window shape now rather than on the first request
+    with torch.no_grad():
+        model.encoder(torch.zeros(1, model.dims.n_mels, N_FRAMES))
+    return model
+
+
+def load_model(name=MODEL_NAME, backend=DEFAULT_BACKEND):
+    """Load a Whisper model (the slow part: torch is imported, weights are read and moved to the device)"""
+    backend = parse_backend(backend)
+    pin_threads(backend)
+    import whisper
+    if backend.kind == "fp32":
+        return whisper.load_model(name)
+    model = whisper.load_model(name, device="cpu")
+    return quantize_int8(model) if backend.kind == "int8" else trace_encoder(model)
+
+
+def transcribe_audio(model, samples, language=LANGUAGE):
+    """Transcribe decoded samples; Whisper takes the array as is and does not run ffmpeg again"""
+    # fp16 only exists on the GPU; asking for it on the CPU just prints a warning per call
+    return model.transcribe(samples, language=language, fp16=model.device.type == "cuda")
+
+
+def transcribe_file(model, source, language=LANGUAGE):
+    """Decode one audio file (or bytes) and transcribe it with an already loaded model"""
+    return transcribe_audio(model, decode_audio(source), language)
+
+
+def model_path(name=MODEL_NAME):
+    """Where Whisper keeps a downloaded model (a name can also be a path to a checkpoint)"""
+    if os.path.isfile(name):
+        return name
+    cache = os.getenv("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+    return os.path.join(cache, "whisper", f"{name}.pt")
+
+
+def check(sources=(), model_name=MODEL_NAME) -> List[str]:
+    """Everything that would stop a transcription, found without importing torch or Whisper
+
+    Prints one line per check and returns the problems. A model that is not
+    downloaded yet is reported but is not a problem: it downloads on first load.
+    """
+    problems = []
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        problems.append("ffmpeg not found on PATH")
+    else:
+        version = subprocess.run([ffmpeg, "-version"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        print(f"✅ {(version.stdout.splitlines() or ['ffmpeg'])[0]} ({ffmpeg})")
+
+    if importlib.util.find_spec("whisper") is None:
+        problems.append("whisper is not installed (pip install openai-whisper)")
+    elif os.path.exists(model_path(model_name)):
+        print(f"✅ Whisper model {model_name!r} at {model_path(model_name)}")
+    else:
+        print(f"ℹ️ Whisper model {model_name!r} is not downloaded yet; the first load fetches it")
+
+    for source in sources:
+        if not os.path.isfile(source):
+            problems.append(f"audio file not found: {source}")
+        elif ffmpeg is not None:
+            # Decode the first second and throw it away
+            probe = subprocess.run([ffmpeg, "-v", "error", "-nostdin", "-i", source, "-t", "1", "-f", "null", "-"],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+            if probe.returncode != 0:
+                problems.append(f"ffmpeg cannot decode {source}: "
+                                f"{(probe.stderr.strip().splitlines() or ['unknown error'])[-1]}")
+            else:
+                print(f"✅ {source}")
+
+    for problem in problems:
+        print(f"❌ {problem}")
+    return problems
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Transcribe one audio file with Whisper")
+    parser.add_argument("audio", nargs="?", default=audio_path_raw)
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--language", default=LANGUAGE)
+    parser.add_argument("--backend", type=parse_backend, default=DEFAULT_BACKEND,
+                        help=f"KIND[:THREADS[:INTEROP]], KIND one of {', '.join(BACKENDS)}")
+    parser.add_argument("--check", action="store_true",
+                        help="check the file, ffmpeg and Whisper without loading the model, then exit")
+    args = parser.parse_args(argv)
+    source = args.audio
+
+    if args.check:
+        return 1 if check([source], args.model) else 0
+
+    print(f"Current working directory: {os.getcwd()}")
+
+    if not os.path.exists(source):
+        print(f"Error: Audio file not found at {source}")
+        return 1
+
+    print("Decoding audio...")
+    try:
+        samples = decode_audio(source)
+        print(f"Decoded {len(samples) / SAMPLE_RATE:.1f} s of audio")
+    except subprocess.CalledProcessError as e:
+        print(f"FFmpeg error: {e}")
+        return 1
+
+    try:
+        print("Loading Whisper model...")
+        model = load_model(args.model, args.backend)
+        result = transcribe_audio(model, samples, args.language)
+        print("\nTranscription result:")
+        print(result["text"])
+
+    except Exception as e:
+        print(f"\nTranscription error: {e}")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
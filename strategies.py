@@ -0,0 +1,304 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from functools import lru_cache
+from typing import Optional
+
+from pricing_policy import DEFAULT_POLICY, load_policy
+
+# A strategy decides what the driver does with a rider's counted offer:
+# counter(session, offer, price_ratio) returns None to take the offer, or
+# the driver's next price. The session is the game after the offer was
+# counted (negotiation_rounds already includes it; last_offer is still the
+# rider's previous offer). Everything else about a turn (too-low offers,
+# "ok", "nahi", replies) stays in game.py. Strategies are shared by every
+# session of a city model (CityModel.with_strategy) and keep no state of
+# their own; `name` is what transcripts record and replay looks up.
+# for_policy(policy) gives the strategy fitted to another pricing policy;
+# CityModel calls it whenever a city's policy or strategy changes.
+
+DEFAULT_TABLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "negotiation_table.json")
+
+
+class LegacyStrategy:
+    """The original driver: an acceptance roll, then a random step down from his current price"""
+
+    name = "legacy"
+
+    def counter(self, session, offer, price_ratio) -> Optional[int]:
+        policy = session.city.policy
+        # Only accept if price is above minimum, after multiple rounds, and the
+        # probability check passes. The chance grows with rounds and offers
+        # close to the quote, and shrinks with a bad mood, traffic and rain
+        # (auto drivers NEVER accept the first offer)
+        if (offer >= session.min_price and session.negotiation_rounds >= policy.min_rounds
+                and session.rng.random() < policy.acceptance(session.negotiation_rounds, session.driver_mood,
+                                                             session.traffic_level, session.weather, price_ratio)):
+            return None
+
+        # Make reductions in multiples of 5 or 10
+        reduction = session.rng.choice(policy.offer_reductions[session.driver_mood])
+        # Never go below what the user offered
+        if session.current_price - reduction < offer:
+            # Take the rider's price if it clears the minimum, otherwise hold at the minimum
+            price = offer if offer >= session.min_price else session.min_price
+        else:
+            price = max(session.min_price, session.current_price - reduction)
+        # Round to nearest 5
+        return round(price / 5) * 5
+
+    def for_policy(self, policy):
+        # Reads everything it needs off the session's policy on every call
+        return self
+
+
+LEGACY = LegacyStrategy()
+
+
+# Decisions solved offline by dynamic programming (build_table) and looked
+# up live. Prices are fractions of the opening quote, in `levels`.
+#
+# Rider model: the rider has a private reservation price (the most they
+# will pay), somewhere between `prior_low` and `prior_high` of the quote,
+# and closes `concession` of the gap between their last offer and it every
+# round. Two rising offers o1 < o2 therefore give the estimate
+# o1 + (o2 - o1) / concession, taken to be off by a few levels either way
+# (`noise`); with a single offer the driver only knows the prior. A rider
+# takes any counter at or under their reservation, and walks away after a
+# rejected counter with probability `walk_away`.
+#
+# opening[round][offer level] is the decision on a first (or non-rising)
+# offer, decisions[round][offer level][estimate level] the one once the
+# reservation has been estimated: -1 to take the offer, otherwise the level
+# to counter at. Both maximise the expected price over the driver's minimum
+# (a rider who walks away earns him nothing).
+class NegotiationTable:
+    __slots__ = ('params', 'opening', 'decisions', 'digest', 'levels', 'low', 'step')
+
+    def __init__(self, params, opening, decisions):
+        self.params = params
+        self.opening = tuple(tuple(layer) for layer in opening)
+        self.decisions = tuple(tuple(tuple(row) for row in layer) for layer in decisions)
+        self.digest = hashlib.sha256(json.dumps(self.to_json(), sort_keys=True).encode()).hexdigest()[:12]
+        self.low, self.step = params["low"], params["step"]
+        self.levels = tuple(self.low + self.step * i for i in range(params["levels"]))
+        count = len(self.levels)
+        if (len(self.opening) != params["rounds"] or len(self.decisions) != params["rounds"]
+                or any(len(layer) != count for layer in self.opening)
+                or any(len(layer) != count or any(len(row) != count for row in layer) for layer in self.decisions)):
+            raise ValueError("decision tables do not match their rounds × levels parameters")
+
+    def fits(self, policy) -> bool:
+        """Whether the tables were solved for this policy's minimum and rounds (the only parts they use)"""
+        return (self.params["minimum"] == round(1 / policy.haggling_factor, 6)
+                and self.params["min_rounds"] == policy.min_rounds)
+
+    def level(self, ratio):
+        """Nearest level index for a fraction of the quote"""
+        index = int(round((ratio - self.low) / self.step))
+        return 0 if index < 0 else min(index, len(self.levels) - 1)
+
+    def to_json(self):
+        return {"params": self.params, "opening": [list(layer) for layer in self.opening],
+                "decisions": [[list(row) for row in layer] for layer in self.decisions]}
+
+
+TABLE_PARAMS = {
+    "rounds": 10,  # negotiation rounds planned for; later rounds reuse the last one
+    "low": 0.3,  # levels: low, low + step, ... as fractions of the quote
+    "step": 0.025,
+    "levels": 37,
+    "concession": 0.15,
+    "prior_low": 0.6,
+    "prior_high": 1.0,
+    "noise": [0.1, 0.2, 0.4, 0.2, 0.1],  # weights of the estimate being off by -2..+2 levels
+    "walk_away": 0.04,
+}
+
+
+def build_table(policy=DEFAULT_POLICY, **overrides) -> NegotiationTable:
+    """Solve the decision tables for a pricing policy by backward induction over rounds"""
+    import numpy as np
+
+    unknown = set(overrides) - set(TABLE_PARAMS)
+    if unknown:
+        raise ValueError(f"unknown table parameters: {', '.join(sorted(unknown))}")
+    params = dict(TABLE_PARAMS, **overrides)
+    # The minimum is the unmarked-up fare, so it sits at 1 / haggling_factor of the quote
+    params["minimum"] = round(1 / policy.haggling_factor, 6)
+    params["min_rounds"] = policy.min_rounds
+    count, step, low = params["levels"], params["step"], params["low"]
+    levels = low + step * np.arange(count)
+    surplus = levels - params["minimum"]
+    stay = 1 - params["walk_away"]
+    spread = len(params["noise"]) // 2
+
+    def following(offer, reservation):
+        # The rider's next offer, never under the last one
+        moved = levels[offer] + params["concession"] * (levels[reservation] - levels[offer])
+        return np.maximum(np.clip(np.rint((moved - low) / step).astype(int), 0, count - 1), offer)
+
+    # Estimated states: (offer, estimate) -> weighted (reservation, next offer) outcomes
+    offer, estimate = np.meshgrid(np.arange(count), np.arange(count), indexing="ij")
+    outcomes = []
+    for shift, weight in enumerate(params["noise"]):
+        # The true reservation, never under what the rider already offered
+        reservation = np.maximum(np.clip(estimate + shift - spread, 0, count - 1), offer)
+        outcomes.append((weight, reservation, following(offer, reservation)))
+
+    # Opening states: offer -> the prior over reservations at or above it
+    prior = ((levels >= params["prior_low"] - 1e-9) & (levels <= params["prior_high"] + 1e-9))[None, :] \
+        & (np.arange(count)[None, :] >= np.arange(count)[:, None])
+    prior = prior.astype(float)
+    empty = prior.sum(axis=1) == 0
+    prior[empty, np.flatnonzero(empty)] = 1.0  # an offer above the prior: the reservation is the offer
+    prior /= prior.sum(axis=1, keepdims=True)
+    reserve = np.broadcast_to(np.arange(count)[None, :], (count, count))
+    opening_next = following(reserve.T, reserve)
+
+    def solve(rounds, expected_for, offers):
+        best = np.full(offers.shape, -np.inf)
+        choice = np.full(offers.shape, -1)
+        for level in np.flatnonzero(surplus >= 0):
+            expected = expected_for(level)
+            better = expected > best
+            best = np.where(better, expected, best)
+            choice = np.where(better, level, choice)
+        if rounds >= params["min_rounds"]:
+            # Ties go to taking the offer (the weights need not sum to exactly 1.0)
+            take = (surplus[offers] >= 0) & (surplus[offers] >= best - 1e-9)
+            best = np.where(take, surplus[offers], best)
+            choice = np.where(take, -1, choice)
+        return best, choice.tolist()
+
+    value = np.zeros((count, count))
+    opening, decisions = [], []
+    for rounds in range(params["rounds"], 0, -1):
+        later = value
+        value, estimated = solve(rounds, lambda level: sum(
+            weight * np.where(levels[level] <= levels[reservation], surplus[level], stay * later[nxt, reservation])
+            for weight, reservation, nxt in outcomes), offer)
+        _, first = solve(rounds, lambda level: (prior * np.where(
+            levels[level] <= levels[reserve], surplus[level], stay * later[opening_next, reserve])).sum(axis=1),
+            np.arange(count))
+        decisions.append(estimated)
+        opening.append(first)
+    decisions.reverse()
+    opening.reverse()
+    return NegotiationTable(params, opening, decisions)
+
+
+# A decision costs two table lookups and a little arithmetic on top of what
+# game.py does for every offer; benchmarks/bench_strategies.py times it next
+# to the legacy strategy's acceptance roll. The tables only hold for the
+# driver's minimum and min_rounds of the policy they were solved for, so a
+# city whose policy changes either gets a re-solved table, about 0.1 s of
+# numpy done once per policy digest (the first session after a hot-reload
+# that moves haggling_factor or min_rounds pays it), or this same strategy
+# when the change leaves the tables valid.
+class OpponentModelStrategy:
+    """Estimates the rider's reservation price from their offers and plays the precomputed tables"""
+
+    def __init__(self, table: NegotiationTable, fitted=None):
+        self.table = table
+        self.name = f"opponent:{table.digest}"
+        self._last_round = table.params["rounds"] - 1
+        self._concession = table.params["concession"]
+        # Policy digest -> the strategy for it, shared by every strategy re-solved from this one
+        self._fitted = {} if fitted is None else fitted
+
+    def for_policy(self, policy):
+        """This strategy with its tables solved for `policy`: itself when they already fit"""
+        fitted = self._fitted.get(policy.digest)
+        if fitted is None:
+            if self.table.fits(policy):
+                fitted = self
+            else:
+                rider = {key: value for key, value in self.table.params.items() if key in TABLE_PARAMS}
+                fitted = OpponentModelStrategy(build_table(policy, **rider), self._fitted)
+            self._fitted[policy.digest] = fitted
+        return fitted
+
+    def counter(self, session, offer, price_ratio) -> Optional[int]:
+        table = self.table
+        quote, previous = session.base_price, session.last_offer
+        rounds = session.negotiation_rounds
+        layer = min(rounds - 1, self._last_round)
+        if previous is None or offer <= previous:
+            decision = table.opening[layer][table.level(price_ratio)]
+        else:
+            estimate = (previous + (offer - previous) / self._concession) / quote
+            # Another offer means the price on the table was turned down: the reservation is under
+            # it, and the table's allowance for a misjudged estimate no longer applies above it
+            turned_down = table.level(min(estimate, session.current_price / quote - table.step))
+            decision = table.decisions[layer][table.level(price_ratio)][turned_down]
+            if decision > turned_down:
+                decision = turned_down
+        can_take = offer >= session.min_price and rounds >= session.city.policy.min_rounds
+        if decision < 0 and can_take:
+            return None
+        # Rounded down to a multiple of 5, so a counter never lands just over the level it aims at
+        price = session.min_price if decision < 0 else int(quote * table.levels[decision] // 5 * 5)
+        # Never above the price already on the table, never below the minimum
+        price = min(session.current_price, max(session.min_price, price))
+        if price <= offer and offer >= session.min_price:
+            # Countering under the rider's own offer would only lose money
+            return None if can_take else offer
+        return price
+
+
+def read_table(path) -> NegotiationTable:
+    with open(path, encoding="utf-8") as f:
+        try:
+            data = json.load(f)
+            return NegotiationTable(data["params"], data["opening"], data["decisions"])
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError(f"{path}: not a negotiation table ({e})")
+
+
+@lru_cache(maxsize=None)
+def load_strategy(spec="legacy"):
+    """"legacy", "opponent" (the shipped table) or the path of a table built with `strategies.py build`"""
+    if spec == "legacy":
+        return LEGACY
+    return OpponentModelStrategy(read_table(DEFAULT_TABLE if spec == "opponent" else spec))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild or inspect the driver's negotiation decision table")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="solve the table and write it out")
+    build.add_argument("--out", default=DEFAULT_TABLE)
+    build.add_argument("--pricing", metavar="RULES", help="pricing rules the table is solved for (default: built-in)")
+    for key, value in TABLE_PARAMS.items():
+        if not isinstance(value, list):
+            build.add_argument(f"--{key.replace('_', '-')}", type=type(value), default=value)
+    show = commands.add_parser("show", help="print a table's parameters and its opening moves")
+    show.add_argument("table", nargs="?", default=DEFAULT_TABLE)
+    args = parser.parse_args()
+
+    try:
+        if args.command == "build":
+            policy = load_policy(args.pricing) if args.pricing else DEFAULT_POLICY
+            start = time.perf_counter()
+            table = build_table(policy, **{key: getattr(args, key) for key, value in TABLE_PARAMS.items()
+                                           if not isinstance(value, list)})
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump(table.to_json(), f, separators=(",", ":"))
+                f.write("\n")
+            print(f"🧮 {table.params['rounds']} rounds × {len(table.levels)} × {len(table.levels)} decisions solved "
+                  f"in {time.perf_counter() - start:.2f} s -> {args.out} (opponent:{table.digest})")
+        else:
+            table = read_table(args.table)
+            print(f"opponent:{table.digest}  {json.dumps(table.params)}")
+            for rounds in range(1, len(table.decisions) + 1):
+                moves = []
+                for ratio in (0.4, 0.5, 0.6, 0.7, 0.8):
+                    decision = table.opening[rounds - 1][table.level(ratio)]
+                    moves.append(f"{ratio:.0%}→{'take' if decision < 0 else f'{table.levels[decision]:.0%}'}")
+                print(f"  round {rounds:>2}: " + "  ".join(moves))
+    except (OSError, ValueError) as e:
+        sys.exit(f"❌ {e}")
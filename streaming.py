@@ -0,0 +1,175 @@
+import argparse
+import sys
+import time
+from typing import List, NamedTuple
+
+import numpy as np
+
+from speech_to_text import BACKENDS, DEFAULT_BACKEND, LANGUAGE, MODEL_NAME, SAMPLE_RATE, check, decode_audio, \
+    load_model, parse_backend, transcribe_audio
+
+FRAME_MS = 20
+
+
+class Transcript(NamedTuple):
+    """A partial (utterance still going) or final transcript; start/end are seconds into the stream"""
+    kind: str
+    text: str
+    start: float
+    end: float
+
+
+# Frame-level speech/silence decision from short-term energy against an
+# adaptive noise floor, with a hangover so short pauses inside an utterance
+# ("theek hai ... 150") do not end it
+class EnergyVAD:
+    def __init__(self, margin_db=12.0, min_db=-50.0, hangover_ms=400, frame_ms=FRAME_MS):
+        self.margin_db = margin_db
+        self.min_db = min_db
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.noise_db = min_db
+        self.silent_frames = self.hangover_frames
+        self.in_speech = False
+
+    def is_speech(self, frame) -> bool:
+        energy_db = 10 * np.log10(float(np.dot(frame, frame)) / len(frame) + 1e-10)
+        loud = energy_db > max(self.min_db, self.noise_db + self.margin_db)
+        if loud:
+            self.silent_frames = 0
+        else:
+            self.silent_frames += 1
+            # Follow the background level only while nobody is talking; fall fast, rise slowly
+            rate = 0.5 if energy_db < self.noise_db else 0.02
+            self.noise_db += rate * (energy_db - self.noise_db)
+        self.in_speech = self.silent_frames < self.hangover_frames
+        return self.in_speech
+
+
+# Takes PCM as it arrives, cuts it into utterances with the VAD and
+# transcribes each utterance on its own, so a reply is ready a moment after
+# the rider stops talking rather than after the whole recording
+class StreamingTranscriber:
+    def __init__(self, model, language=LANGUAGE, vad=None, partial_every=1.0, preroll_ms=200,
+                 min_utterance_ms=250, max_utterance_s=25.0):
+        self.model = model
+        self.language = language
+        self.vad = vad or EnergyVAD()
+        self.frame = SAMPLE_RATE * FRAME_MS // 1000
+        self.partial_every = int(partial_every * SAMPLE_RATE)
+        self.preroll = preroll_ms // FRAME_MS
+        self.min_utterance = min_utterance_ms * SAMPLE_RATE // 1000
+        self.max_utterance = int(max_utterance_s * SAMPLE_RATE)
+        self.pending = np.zeros(0, dtype=np.float32)
+        self.recent: List[np.ndarray] = []
+        self.utterance: List[np.ndarray] = []
+        self.utterance_length = 0
+        self.utterance_start = 0
+        self.last_partial = 0
+        self.position = 0
+
+    def feed(self, samples) -> List[Transcript]:
+        """Add float32 samples (any chunk size); returns transcripts completed by them"""
+        self.pending = np.concatenate([self.pending, np.asarray(samples, dtype=np.float32)])
+        out: List[Transcript] = []
+        usable = len(self.pending) - len(self.pending) % self.frame
+        for offset in range(0, usable, self.frame):
+            self._frame(self.pending[offset:offset + self.frame], out)
+        self.pending = self.pending[usable:]
+        return out
+
+    def flush(self) -> List[Transcript]:
+        """End of stream: finish the utterance in progress, if any"""
+        out: List[Transcript] = []
+        if self.utterance:
+            self._final(out)
+        return out
+
+    def _frame(self, frame, out):
+        speech = self.vad.is_speech(frame)
+        self.position += len(frame)
+        if not self.utterance:
+            if speech:
+                # Keep a little audio from before the trigger; energy rises after the first phoneme
+                self.utterance = self.recent + [frame]
+                self.utterance_length = sum(len(f) for f in self.utterance)
+                self.utterance_start = self.position - self.utterance_length
+                self.last_partial = self.utterance_length
+                self.recent = []
+            else:
+                self.recent = (self.recent + [frame])[-self.preroll:] if self.preroll else []
+            return
+
+        self.utterance.append(frame)
+        self.utterance_length += len(frame)
+        if not speech:
+            # The VAD only lets go after its hangover of silence; speech ended before that
+            self._final(out, self.position - self.vad.silent_frames * self.frame)
+        elif self.utterance_length >= self.max_utterance:
+            self._final(out)
+        elif self.partial_every and self.utterance_length - self.last_partial >= self.partial_every:
+            self.last_partial = self.utterance_length
+            out.append(self._transcript("partial"))
+
+    def _final(self, out, end=None):
+        if self.utterance_length >= self.min_utterance:
+            out.append(self._transcript("final", end))
+        self.utterance = []
+        self.utterance_length = 0
+
+    def _transcript(self, kind, end=None):
+        audio = np.concatenate(self.utterance)
+        text = transcribe_audio(self.model, audio, self.language)["text"].strip()
+        end = self.position if end is None else end
+        return Transcript(kind, text, self.utterance_start / SAMPLE_RATE, end / SAMPLE_RATE)
+
+
+def pcm_chunks(stream, chunk_ms=FRAME_MS):
+    """Read 16 kHz mono s16le from a binary stream (e.g. ffmpeg ... -f s16le -) as float32 chunks"""
+    size = SAMPLE_RATE * chunk_ms // 1000 * 2
+    while True:
+        data = stream.read(size)
+        if not data:
+            return
+        yield np.frombuffer(data[:len(data) - len(data) % 2], np.int16).astype(np.float32) / 32768.0
+
+
+def file_chunks(path, chunk_ms=FRAME_MS, realtime=False):
+    """Decode a file and hand it out in chunks, optionally at the speed it would be spoken"""
+    samples = decode_audio(path)
+    size = SAMPLE_RATE * chunk_ms // 1000
+    start = time.perf_counter()
+    for offset in range(0, len(samples), size):
+        if realtime:
+            time.sleep(max(0.0, start + offset / SAMPLE_RATE - time.perf_counter()))
+        yield samples[offset:offset + size]
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Transcribe speech utterance by utterance as it arrives")
+    parser.add_argument("source", help="audio file, or - for 16 kHz mono s16le PCM on stdin")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--language", default=LANGUAGE)
+    parser.add_argument("--backend", type=parse_backend, default=DEFAULT_BACKEND,
+                        help=f"KIND[:THREADS[:INTEROP]], KIND one of {', '.join(BACKENDS)}")
+    parser.add_argument("--realtime", action="store_true", help="feed a file at speaking speed")
+    parser.add_argument("--no-partials", action="store_true")
+    parser.add_argument("--check", action="store_true",
+                        help="check the file, ffmpeg and Whisper without loading the model, then exit")
+    args = parser.parse_args(argv)
+    if args.check:
+        return 1 if check([] if args.source == "-" else [args.source], args.model) else 0
+
+    print("Loading Whisper model...")
+    transcriber = StreamingTranscriber(load_model(args.model, args.backend), args.language,
+                                       partial_every=0 if args.no_partials else 1.0)
+    chunks = pcm_chunks(sys.stdin.buffer) if args.source == "-" else file_chunks(args.source, realtime=args.realtime)
+    for chunk in chunks:
+        for transcript in transcriber.feed(chunk):
+            print(f"[{transcript.start:6.2f}-{transcript.end:6.2f}] {transcript.kind:<7} {transcript.text}")
+    for transcript in transcriber.flush():
+        print(f"[{transcript.start:6.2f}-{transcript.end:6.2f}] {transcript.kind:<7} {transcript.text}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
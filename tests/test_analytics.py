@@ -0,0 +1,41 @@
+import itertools
+
+import numpy as np
+
+from analytics import scores
+from game import BangaloreAutoGame, fixed_clock
+from pricing_policy import MOODS, TRAFFIC_LEVELS, WEATHER
+
+# (quote, minimum, price): a normal haggle, paying the quote, paying the
+# minimum, paying over the quote, and a quote rounded onto the minimum,
+# paid at it and over it
+PRICES = [(200, 120, 150), (200, 120, 200), (200, 120, 120), (200, 120, 230), (40, 40, 40), (40, 40, 50)]
+HOURS = [3, 12, 22]
+
+
+def test_vectorised_scores_match_the_scalar_method():
+    rows = list(itertools.product(PRICES, TRAFFIC_LEVELS, WEATHER, MOODS, HOURS))
+    expected = []
+    for (quote, minimum, price), traffic, weather, mood, hour in rows:
+        session = BangaloreAutoGame(seed=1, clock=fixed_clock(hour))
+        session.base_price, session.min_price, session.current_price = quote, minimum, price
+        session.traffic_level, session.weather, session.driver_mood = traffic, weather, mood
+        expected.append(session.negotiation_score())
+
+    table = {
+        "quote": np.array([row[0][0] for row in rows], dtype=np.int64),
+        "minimum": np.array([row[0][1] for row in rows], dtype=np.int64),
+        "price": np.array([row[0][2] for row in rows], dtype=np.int64),
+        "traffic": np.array([TRAFFIC_LEVELS.index(row[1]) for row in rows], dtype=np.int8),
+        "weather": np.array([WEATHER.index(row[2]) for row in rows], dtype=np.int8),
+        "mood": np.array([MOODS.index(row[3]) for row in rows], dtype=np.int8),
+        "hour": np.array([row[4] for row in rows], dtype=np.int8),
+    }
+    assert scores(table).tolist() == expected
+
+
+def test_zero_spread_paid_at_the_minimum_scores_full_marks():
+    table = {"quote": np.array([40]), "minimum": np.array([40]), "price": np.array([40]),
+             "traffic": np.array([0], dtype=np.int8), "weather": np.array([0], dtype=np.int8),
+             "mood": np.array([0], dtype=np.int8), "hour": np.array([12], dtype=np.int8)}
+    assert scores(table).tolist() == [10]
@@ -0,0 +1,28 @@
+import random
+from itertools import product
+
+import pytest
+
+from fares import FareConditions, quote_batch
+from game import BANGALORE, BangaloreAutoGame, fixed_clock
+from pricing_policy import MOODS, TRAFFIC_LEVELS, WEATHER
+
+SEED = 20240611
+
+
+@pytest.mark.parametrize("hour", range(24))
+def test_quote_batch_matches_calculate_price(hour):
+    areas = list(BANGALORE.areas)
+    sample = random.Random(SEED)
+    origins, destinations = sample.sample(areas, 8), sample.sample(areas, 8)
+    combos = list(product(TRAFFIC_LEVELS, WEATHER, MOODS))
+    night = hour >= 22 or hour < 6
+    quoted, minimum = quote_batch(origins, destinations, [FareConditions(*combo, night=night) for combo in combos])
+
+    game = BangaloreAutoGame(seed=SEED, clock=fixed_clock(hour))
+    for k, (traffic, weather, mood) in enumerate(combos):
+        game.traffic_level, game.weather, game.driver_mood = traffic, weather, mood
+        for i, origin in enumerate(origins):
+            for j, destination in enumerate(destinations):
+                expected = game.calculate_price(BANGALORE.distance(origin, destination))
+                assert (quoted[i, j, k], minimum[i, j, k]) == expected, (origin, destination, hour, traffic, weather, mood)
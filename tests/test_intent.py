@@ -0,0 +1,37 @@
+import pytest
+
+from intent import Intent, classify
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("2 hundred", Intent("price", 200)),
+    ("3 sau", Intent("price", 300)),
+    ("2k", Intent("price", 2000)),
+    ("₹250", Intent("price", 250)),
+    ("rs. 180", Intent("price", 180)),
+    ("Rs180", Intent("price", 180)),
+    ("250/-", Intent("price", 250)),
+    ("₹ 1,500/-", Intent("price", 1500)),
+    ("12,500", Intent("price", 12500)),
+    ("1,50,000", Intent("price", 150000)),
+    ("1,500,000", Intent("price", 1500000)),
+    ("ok 150", Intent("agree", 150)),
+    ("nahi 2 hundred", Intent("disagree", 200)),
+    ("ok but too much", Intent("disagree")),
+    ("indiranagar jana hai", Intent("none")),
+])
+def test_amounts_and_kinds(text, intent):
+    assert classify(text) == intent
+
+
+@pytest.mark.parametrize("text, intent", [
+    # Neither Indian nor Western grouping: two numbers, the first one counts
+    ("150,200", Intent("price", 150)),
+    ("150, 200", Intent("price", 150)),
+    ("1,5000", Intent("price", 1)),
+    # Digits glued to a word are not an offer
+    ("ok2", Intent("none")),
+    ("x200", Intent("none")),
+])
+def test_ambiguous_amounts(text, intent):
+    assert classify(text) == intent
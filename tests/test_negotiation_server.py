@@ -0,0 +1,75 @@
+import asyncio
+import json
+
+import pytest
+
+from negotiation_server import NegotiationHub
+from pricing_policy import PolicyFile
+from session_store import MemorySessionStore
+
+
+def write_rules(path, too_low_ratio):
+    path.write_text(json.dumps({"counter": {"too_low_ratio": too_low_ratio}}), encoding="utf-8")
+
+
+def test_resumed_session_keeps_the_policy_it_started_on(tmp_path):
+    rules = tmp_path / "pricing.json"
+    write_rules(rules, 0.85)
+    hub = NegotiationHub(store=MemorySessionStore(), pricing=PolicyFile(str(rules), interval=0))
+    session_id, _ = hub.open()
+    hub.turn(session_id, "indiranagar jana hai")
+    started_on = hub.sessions[session_id].city.policy
+
+    # The rules change while the session sits in the store only
+    hub.close(session_id)
+    write_rules(rules, 0.99)
+    later_id, _ = hub.open()
+    assert hub.sessions[later_id].city.policy.too_low_ratio == 0.99
+
+    resumed = hub.resume(session_id)
+    assert resumed.city.policy is started_on
+    assert resumed.city.policy.too_low_ratio == 0.85
+
+
+def test_resume_falls_back_to_the_current_city_for_an_unknown_policy(tmp_path):
+    rules = tmp_path / "pricing.json"
+    write_rules(rules, 0.8)
+    store = MemorySessionStore()
+    first = NegotiationHub(store=store, pricing=PolicyFile(str(rules), interval=0))
+    session_id, _ = first.open()
+    first.close(session_id)
+
+    # Another worker that never loaded the policy the session started on
+    write_rules(rules, 0.99)
+    second = NegotiationHub(store=store, pricing=PolicyFile(str(rules), interval=0))
+    second.open()
+    assert second.resume(session_id).city is second.city
+
+
+class _Writer:
+    def __init__(self):
+        self.lines = []
+
+    def write(self, data):
+        self.lines.extend(json.loads(line) for line in data.decode().splitlines())
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize("message", ['{"text": 5}', '{"text": null}', '{"text": ["hi"]}', '[]', 'hello'])
+def test_text_that_is_not_a_string_gets_the_malformed_input_error(message):
+    async def talk():
+        reader = asyncio.StreamReader()
+        reader.feed_data(message.encode() + b"\n")
+        reader.feed_eof()
+        writer = _Writer()
+        await NegotiationHub(store=MemorySessionStore()).handle_client(reader, writer)
+        return writer.lines
+
+    greeting, answer = asyncio.run(talk())
+    assert greeting["status"] == "continue"
+    assert answer == {"error": 'expected {"text": ...}'}
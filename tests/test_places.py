@@ -0,0 +1,25 @@
+import pytest
+
+from game import BANGALORE_AREAS
+from places import BANGALORE_ALIASES, PlaceIndex
+
+INDEX = PlaceIndex(BANGALORE_AREAS, BANGALORE_ALIASES)
+
+
+@pytest.mark.parametrize("text, place", [
+    ("koramangla jana hai", "koramangala"),
+    ("whitefeild", "whitefield"),
+    ("majestc bus stand", "majestic"),
+    ("indira", "indiranagar"),
+    ("marathalli", "marathahalli"),
+    ("yeshwantpur", "yeshwanthpur"),
+    ("kia jana hai", "airport"),
+    ("btm se", "btm layout"),
+])
+def test_typos_and_aliases_resolve(text, place):
+    assert INDEX.best(text) == place
+
+
+@pytest.mark.parametrize("text", ["kya kiya", "kiya", "bhi", "haan theek hai", "btw", "hsrr", "nahi bhai"])
+def test_everyday_words_near_short_keys_do_not_match(text):
+    assert INDEX.resolve(text) == []
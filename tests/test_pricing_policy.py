@@ -0,0 +1,20 @@
+import pytest
+
+from game import BangaloreAutoGame, fixed_clock
+from pricing_policy import PricingPolicy, validate
+
+
+@pytest.mark.parametrize("factor", [1, 1.0, 0.5, 0])
+def test_haggling_factor_must_leave_room_to_haggle(factor):
+    with pytest.raises(ValueError, match="fare.haggling_factor: must be greater than 1"):
+        validate({"fare": {"haggling_factor": factor}})
+
+
+def test_haggling_factor_above_one_is_accepted():
+    assert PricingPolicy({"fare": {"haggling_factor": 1.05}}).haggling_factor == 1.05
+
+
+def test_score_when_the_quote_rounds_onto_the_minimum():
+    session = BangaloreAutoGame(seed=1, clock=fixed_clock(12))
+    session.base_price = session.min_price = session.current_price = 40
+    assert 0 <= session.negotiation_score() <= 10
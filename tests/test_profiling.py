@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import profiling
+
+
+def test_timed_returns_the_function_itself_when_disabled(monkeypatch):
+    monkeypatch.setattr(profiling, "ENABLED", False)
+
+    def turn():
+        pass
+    assert profiling.timed(turn) is turn
+
+
+def test_timed_counts_calls_and_time_when_enabled(monkeypatch):
+    monkeypatch.setattr(profiling, "ENABLED", True)
+    monkeypatch.setattr(profiling, "_stats", {})
+
+    @profiling.timed
+    def turn(x):
+        return x * 2
+    assert turn(21) == 42
+    assert turn(1) == 2
+    calls, ns = profiling.counters()[turn.__qualname__]
+    assert calls == 2 and ns > 0
+    assert turn.__name__ == "turn"
+    assert any(line.startswith(turn.__qualname__) for line in profiling.report()[1:])
+
+    profiling.reset()
+    assert profiling.counters()[turn.__qualname__] == (0, 0)
+
+
+def test_timed_counts_calls_that_raise(monkeypatch):
+    monkeypatch.setattr(profiling, "ENABLED", True)
+    monkeypatch.setattr(profiling, "_stats", {})
+
+    @profiling.timed
+    def turn():
+        raise KeyError
+    with pytest.raises(KeyError):
+        turn()
+    assert profiling.counters()[turn.__qualname__][0] == 1
+
+
+@pytest.mark.parametrize("value, enabled", [(None, False), ("", False), ("0", False), ("1", True), ("yes", True)])
+def test_environment_variable_decides_at_import(value, enabled):
+    env = {key: val for key, val in os.environ.items() if key != profiling.ENV}
+    if value is not None:
+        env[profiling.ENV] = value
+    code = "import game, profiling; print(profiling.ENABLED, hasattr(game.step, '__wrapped__'))"
+    run = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env,
+                         cwd=os.path.dirname(os.path.abspath(profiling.__file__)))
+    assert run.returncode == 0, run.stderr
+    assert run.stdout.split() == [str(enabled), str(enabled)]
+    # The counters are printed at exit only when enabled
+    assert (profiling.ENV in run.stderr) == enabled
@@ -0,0 +1,55 @@
+import os
+
+import pytest
+
+from benchmarks.regress import BASELINES, compare, main
+
+RESULTS = {"session": 105.0, "session_peak_bytes": 1000.0}
+
+
+def test_within_threshold_passes():
+    lines, failed = compare(RESULTS, {"session": 100, "session_peak_bytes": 1000}, 0.1, 0.05)
+    assert failed == []
+    assert len(lines) == 1 + len(RESULTS)
+
+
+def test_slower_than_threshold_fails():
+    _, failed = compare({"session": 111.0}, {"session": 100}, 0.1, 0.05)
+    assert failed == ["session"]
+
+
+def test_memory_has_its_own_threshold():
+    _, failed = compare({"session": 108.0, "session_peak_bytes": 1060.0},
+                        {"session": 100, "session_peak_bytes": 1000}, 0.1, 0.05)
+    assert failed == ["session_peak_bytes"]
+
+
+def test_faster_than_baseline_passes():
+    _, failed = compare({"session": 50.0}, {"session": 100}, 0.1, 0.05)
+    assert failed == []
+
+
+def test_case_without_a_baseline_fails():
+    lines, failed = compare(RESULTS, {"session": 100}, 0.1, 0.05)
+    assert failed == ["session_peak_bytes"]
+    assert "no baseline" in lines[-1]
+
+
+def test_no_baselines_only_lists_results():
+    lines, failed = compare(RESULTS, None, 0.1, 0.05)
+    assert failed == []
+    assert "❌" not in "".join(lines)
+
+
+def test_missing_baselines_file_fails_without_update(tmp_path):
+    with pytest.raises(SystemExit, match="--update"):
+        main(["--baselines", str(tmp_path / "baselines.json")])
+
+
+def test_baselines_are_committed():
+    assert os.path.exists(BASELINES)
+
+
+@pytest.mark.skipif(not os.environ.get("NEGOTIATE_REGRESS"), reason="set NEGOTIATE_REGRESS=1 to run the latency gate")
+def test_latency_gate():
+    main([])
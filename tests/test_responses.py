@@ -0,0 +1,66 @@
+import json
+import os
+
+import pytest
+
+from game import BangaloreAutoGame
+from responses import LANGUAGES, MESSAGES_DIR, RECENT_HISTORY, SLOTS, ResponsePicker, load_locale
+
+VALUES = {"price": "180", "condition": "traffic heavy", "traffic": "heavy", "weather": "rainy"}
+
+
+def read_replies(language):
+    with open(os.path.join(MESSAGES_DIR, f"{language}.json"), encoding="utf-8") as f:
+        return json.load(f)["replies"]
+
+
+# Fewer templates than this hit the old list picker's reset, which the table
+# reproduces (benchmarks/bench_responses.py): the last pick may then come again
+NO_REPEAT = RECENT_HISTORY + 2
+
+
+@pytest.mark.parametrize("count", range(NO_REPEAT, NO_REPEAT + 4))
+def test_picker_table_never_repeats_a_recent_pick(count):
+    picker = ResponsePicker([f"reply {i}" for i in range(count)])
+    for state, allowed in enumerate(picker.options):
+        for index in allowed:
+            following = picker.options[picker.transitions[state][index]]
+            assert following and index not in following
+
+
+@pytest.mark.parametrize("language", LANGUAGES)
+def test_shipped_catalogues_are_large_enough_to_never_repeat(language):
+    assert all(len(picker.templates) >= NO_REPEAT for picker in load_locale(language).catalog.values())
+
+
+@pytest.mark.parametrize("language", LANGUAGES)
+def test_sessions_never_repeat_a_reply_back_to_back(language):
+    session = BangaloreAutoGame(seed=3, language=language)
+    for reply_type in session.locale.catalog:
+        picks = [session.pick_template(reply_type) for _ in range(200)]
+        assert all(a is not b for a, b in zip(picks, picks[1:])), reply_type
+
+
+def test_picks_are_deterministic_for_a_seed():
+    def picks(seed):
+        session = BangaloreAutoGame(seed=seed)
+        return [session.pick_template(reply_type).text
+                for _ in range(30) for reply_type in session.locale.catalog]
+    assert picks(11) == picks(11)
+    assert picks(11) != picks(12)
+
+
+@pytest.mark.parametrize("language", LANGUAGES)
+def test_every_locale_has_the_reply_types_of_the_default_one(language):
+    assert set(read_replies(language)) == set(read_replies("hinglish"))
+
+
+@pytest.mark.parametrize("language", LANGUAGES)
+def test_every_template_formats(language):
+    locale = load_locale(language)
+    for reply_type, texts in read_replies(language).items():
+        for text, template in zip(texts, locale.catalog[reply_type].templates):
+            # str.format raises for any placeholder outside {price}, {traffic}, {weather}, {condition}
+            assert template.render(tuple(VALUES[slot] for slot in SLOTS)) == text.format(**VALUES)
+    for kind, template in locale.conditions.items():
+        assert template.render(("", "", "heavy", "rainy")) == template.text.format(traffic="heavy", weather="rainy")
@@ -0,0 +1,39 @@
+import pytest
+
+from game import BANGALORE, BangaloreAutoGame, fixed_clock, step
+from session_store import RECORD, VERSION, MemorySessionStore, dump_session, load_session, policy_digest
+
+TURNS = ["koramangala jana hai", "nahi bahut zyada", "150", "ok"]
+
+
+def test_round_trip_continues_exactly_like_the_original():
+    store = MemorySessionStore()
+    original = BangaloreAutoGame(seed=42, clock=fixed_clock(23))
+    step(original, TURNS[0])
+    store.save(7, original)
+
+    data = store.get(7)
+    assert data[0] == VERSION and len(data) >= RECORD.size
+    assert policy_digest(data) == BANGALORE.policy.digest
+    resumed = store.load(7)
+    assert dump_session(resumed) == data
+    for text in TURNS[1:]:
+        assert step(resumed, text) == step(original, text)
+        assert dump_session(resumed) == dump_session(original)
+
+
+def test_tables_are_shared_with_policy_clones():
+    session = BangaloreAutoGame(seed=1)
+    dump_session(session)
+    assert "session_tables" in BANGALORE.derived
+    clone = BANGALORE.with_policy(BANGALORE.policy)
+    assert clone.derived["session_tables"] is BANGALORE.derived["session_tables"]
+
+
+def test_record_of_another_version_is_rejected():
+    data = bytearray(dump_session(BangaloreAutoGame(seed=1)))
+    data[0] = VERSION - 1
+    with pytest.raises(ValueError, match="version"):
+        load_session(bytes(data))
+    with pytest.raises(ValueError, match="version"):
+        policy_digest(bytes(data))
@@ -0,0 +1,18 @@
+from game import BANGALORE
+from pricing_policy import PricingPolicy
+from strategies import load_strategy
+
+
+def test_opponent_table_is_refitted_when_the_policy_moves_the_minimum():
+    city = BANGALORE.with_strategy(load_strategy("opponent"))
+    reloaded = city.with_policy(PricingPolicy({"fare": {"haggling_factor": 1.4}}))
+    assert reloaded.strategy is not city.strategy
+    assert reloaded.strategy.table.fits(reloaded.policy)
+    # One table per policy digest, and going back finds the original again
+    assert city.with_policy(reloaded.policy).strategy is reloaded.strategy
+    assert reloaded.with_policy(city.policy).strategy is city.strategy
+
+
+def test_opponent_table_is_kept_when_the_policy_change_does_not_touch_it():
+    city = BANGALORE.with_strategy(load_strategy("opponent"))
+    assert city.with_policy(PricingPolicy({"counter": {"too_low_ratio": 0.9}})).strategy is city.strategy
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from speech_to_text import LANGUAGE, MODEL_NAME, transcribe_audio
+
+
+def cache_key(data, model_name=MODEL_NAME, language=LANGUAGE, kind="pcm"):
+    """sha256 over the audio plus everything that changes the transcript.
+
+    `data` is decoded samples (kind "pcm") or the encoded upload as received
+    (kind "upload"): an exact retry then hits without running ffmpeg, and the
+    same audio in another container or bitrate still hits on its samples.
+    """
+    digest = hashlib.sha256(f"{kind}\0{model_name}\0{language}\0".encode())
+    digest.update(memoryview(data).cast("B"))
+    return digest.hexdigest()
+
+
+# Two-tier cache of transcription results. The memory tier is an LRU of
+# parsed results; the disk tier is one small JSON file per key, evicted
+# oldest-used first once the directory grows past disk_bytes. Worker threads
+# share one instance, so every operation takes the lock.
+class TranscriptionCache:
+    def __init__(self, directory=None, memory_entries=1024, disk_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.memory_entries = memory_entries
+        self.disk_bytes = disk_bytes
+        self.memory: "OrderedDict[str, dict]" = OrderedDict()
+        self.disk: "OrderedDict[str, int]" = OrderedDict()  # key -> file size, least recently used first
+        self.disk_used = 0
+        self.memory_hits = self.disk_hits = self.misses = self.evictions = 0
+        self._lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self._scan()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def _scan(self):
+        # Rebuild the LRU order from what a previous run left behind; hits touch the mtime
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".json"):
+                    stat = os.stat(os.path.join(root, name))
+                    entries.append((stat.st_mtime, name[:-5], stat.st_size))
+        for _, key, size in sorted(entries):
+            self.disk[key] = size
+            self.disk_used += size
+
+    def get(self, key, count_miss=True) -> Optional[dict]:
+        """The cached result or None; count_miss=False for a first-chance lookup that may fall through"""
+        with self._lock:
+            result = self.memory.get(key)
+            if result is not None:
+                self.memory.move_to_end(key)
+                self.memory_hits += 1
+                return result
+            if key in self.disk:
+                try:
+                    with open(self._path(key), encoding="utf-8") as f:
+                        result = json.load(f)
+                    os.utime(self._path(key))
+                except (OSError, ValueError):
+                    # Removed or half-written behind our back: forget it and treat as a miss
+                    self.disk_used -= self.disk.pop(key)
+                else:
+                    self.disk.move_to_end(key)
+                    self.disk_hits += 1
+                    self._remember(key, result)
+                    return result
+            if count_miss:
+                self.misses += 1
+            return None
+
+    def put(self, key, result):
+        with self._lock:
+            self._remember(key, result)
+            if self.directory is not None and key not in self.disk:
+                self._write(key, result)
+
+    def _remember(self, key, result):
+        self.memory[key] = result
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def _write(self, key, result):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so a reader never sees half a file
+        handle, temp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(handle, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False)
+        os.replace(temp, path)
+        size = os.path.getsize(path)
+        self.disk[key] = size
+        self.disk_used += size
+        while self.disk_used > self.disk_bytes and len(self.disk) > 1:
+            old, old_size = self.disk.popitem(last=False)
+            self.disk_used -= old_size
+            self.evictions += 1
+            try:
+                os.remove(self._path(old))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"memory_hits": self.memory_hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                    "evictions": self.evictions, "memory_entries": len(self.memory),
+                    "disk_entries": len(self.disk), "disk_bytes": self.disk_used}
+
+
+def transcribe_cached(cache, model, samples, model_name=MODEL_NAME, language=LANGUAGE):
+    """transcribe_audio with the cache in front; returns (result, key, hit)"""
+    key = cache_key(samples, model_name, language)
+    result = cache.get(key)
+    if result is not None:
+        return result, key, True
+    full = transcribe_audio(model, samples, language)
+    # Only what callers read is kept; segments and tokens would make every entry many times larger
+    result = {"text": full["text"], "language": full.get("language", language)}
+    cache.put(key, result)
+    return result, key, False
@@ -0,0 +1,214 @@
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from speech_to_text import BACKENDS, DEFAULT_BACKEND, LANGUAGE, MODEL_NAME, check, decode_audio, load_model, \
+    model_label, parse_backend, transcribe_audio
+from transcription_cache import TranscriptionCache, cache_key, transcribe_cached
+
+
+class QueueFull(Exception):
+    """Raised when a request arrives while the bounded queue is full"""
+
+
+# One transcription request travelling from the HTTP thread to a worker and back
+class Job:
+    __slots__ = ('audio', 'language', 'submitted', 'done', 'result', 'error')
+
+    def __init__(self, audio, language):
+        self.audio = audio
+        self.language = language
+        self.submitted = time.perf_counter()
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+# Keeps Whisper models loaded and warm, and feeds them from a bounded queue
+class TranscriptionService:
+    def __init__(self, model_name=MODEL_NAME, workers=1, queue_size=16, cache: Optional[TranscriptionCache] = None,
+                 backend=DEFAULT_BACKEND):
+        self.model_name = model_name
+        self.backend = parse_backend(backend)
+        # int8 or traced models may word things differently, so they cache apart
+        self.label = model_label(model_name, self.backend)
+        self.workers = workers
+        self.cache = cache
+        self.jobs = queue.Queue(maxsize=queue_size)
+        self.ready = threading.Event()
+        self.load_seconds = None
+        self.load_error = None
+        self._loaded = 0
+        self._lock = threading.Lock()
+        self._threads = [threading.Thread(target=self._work, name=f"whisper-{i}", daemon=True)
+                         for i in range(workers)]
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, audio, language=LANGUAGE) -> Job:
+        """Queue raw audio bytes (any format ffmpeg reads); raises QueueFull instead of waiting"""
+        job = Job(audio, language)
+        try:
+            self.jobs.put_nowait(job)
+        except queue.Full:
+            raise QueueFull(f"{self.jobs.maxsize} requests already waiting")
+        return job
+
+    def _work(self):
+        # Each worker owns a model: Whisper installs kv-cache hooks on the model
+        # during decoding, so two threads must not transcribe on the same one
+        start = time.perf_counter()
+        try:
+            model = load_model(self.model_name, self.backend)
+            # The first inference pays for lazy kernel/allocator setup; do it now
+            transcribe_audio(model, np.zeros(16000, dtype=np.float32))
+        except Exception as e:
+            self.load_error = f"{type(e).__name__}: {e}"
+            self.ready.set()
+            return
+        with self._lock:
+            self._loaded += 1
+            if self._loaded == self.workers:
+                self.load_seconds = time.perf_counter() - start
+                self.ready.set()
+
+        while True:
+            job = self.jobs.get()
+            try:
+                job.result = self._transcribe(model, job)
+            except Exception as e:
+                job.error = str(e)
+            finally:
+                job.done.set()
+
+    def _transcribe(self, model, job):
+        started = time.perf_counter()
+        if self.cache is None:
+            samples = decode_audio(job.audio)
+            decoded = time.perf_counter()
+            result, cached = transcribe_audio(model, samples, job.language), False
+        else:
+            # A retried upload matches byte for byte and skips ffmpeg as well
+            upload = cache_key(job.audio, self.label, job.language, kind="upload")
+            result = self.cache.get(upload, count_miss=False)
+            cached = result is not None
+            if not cached:
+                samples = decode_audio(job.audio)
+                decoded = time.perf_counter()
+                result, _, cached = transcribe_cached(self.cache, model, samples, self.label, job.language)
+                self.cache.put(upload, result)
+            else:
+                decoded = time.perf_counter()
+        finished = time.perf_counter()
+        return {
+            "text": result["text"],
+            "language": job.language,
+            "cached": cached,
+            "timings_ms": {
+                "queue": round((started - job.submitted) * 1000, 2),
+                "decode": round((decoded - started) * 1000, 2),
+                "transcribe": round((finished - decoded) * 1000, 2),
+                "total": round((finished - job.submitted) * 1000, 2),
+            },
+        }
+
+
+class TranscriptionHandler(BaseHTTPRequestHandler):
+    service: Optional[TranscriptionService] = None
+    timeout_seconds = 60.0
+
+    def _send(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if urlparse(self.path).path != "/health":
+            return self._send(404, {"error": "not found"})
+        service = self.service
+        self._send(200, {"ready": service.ready.is_set(), "model": service.label,
+                         "workers": service.workers, "queued": service.jobs.qsize(),
+                         "load_seconds": service.load_seconds,
+                         "cache": service.cache.stats() if service.cache is not None else None})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/transcribe":
+            return self._send(404, {"error": "not found"})
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0:
+            return self._send(400, {"error": "POST the audio bytes as the request body"})
+        audio = self.rfile.read(length)
+        language = parse_qs(url.query).get("language", [LANGUAGE])[0]
+
+        try:
+            job = self.service.submit(audio, language)
+        except QueueFull as e:
+            return self._send(503, {"error": f"busy: {e}"})
+        if not job.done.wait(self.timeout_seconds):
+            return self._send(504, {"error": "timed out waiting for a worker"})
+        if job.error is not None:
+            return self._send(500, {"error": job.error})
+        self._send(200, job.result)
+
+    def log_message(self, format, *args):
+        # Per-request access logs would dominate the output of a busy server
+        pass
+
+
+def serve(host="127.0.0.1", port=8766, model_name=MODEL_NAME, workers=1, queue_size=16, timeout=60.0,
+          cache=None, backend=DEFAULT_BACKEND):
+    """Load the models, then serve POST /transcribe and GET /health until interrupted"""
+    service = TranscriptionService(model_name, workers, queue_size, cache, backend)
+    service.start()
+    print(f"Loading {workers} × Whisper '{service.label}'...")
+    service.ready.wait()
+    if service.load_error is not None:
+        raise SystemExit(f"Could not load Whisper: {service.load_error}")
+    print(f"Models ready in {service.load_seconds:.1f} s")
+
+    handler = type("Handler", (TranscriptionHandler,), {"service": service, "timeout_seconds": timeout})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"Listening on http://{host}:{server.server_address[1]}/transcribe")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep Whisper loaded and transcribe audio over localhost HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--backend", type=parse_backend, default=DEFAULT_BACKEND,
+                        help=f"KIND[:THREADS[:INTEROP]], KIND one of {', '.join(BACKENDS)}")
+    parser.add_argument("--workers", type=int, default=1, help="model instances transcribing in parallel")
+    parser.add_argument("--queue-size", type=int, default=16, help="requests allowed to wait; more get HTTP 503")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds a request may wait for its result")
+    parser.add_argument("--no-cache", action="store_true", help="transcribe every request, even repeats")
+    parser.add_argument("--cache-dir", default=None, help="also keep results on disk here, across restarts")
+    parser.add_argument("--cache-entries", type=int, default=1024, help="results kept in memory")
+    parser.add_argument("--cache-disk-mb", type=int, default=256)
+    parser.add_argument("--check", action="store_true", help="check ffmpeg and Whisper without loading the model")
+    args = parser.parse_args()
+    if args.check:
+        sys.exit(1 if check((), args.model) else 0)
+    cache = None if args.no_cache else TranscriptionCache(args.cache_dir, args.cache_entries,
+                                                          args.cache_disk_mb * 1024 * 1024)
+    serve(args.host, args.port, args.model, args.workers, args.queue_size, args.timeout, cache, args.backend)
@@ -0,0 +1,146 @@
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from typing import Dict, List, NamedTuple
+
+from game import BANGALORE, BangaloreAutoGame, Reply, fixed_clock, greet, step
+from intent import classify
+from speech_to_text import BACKENDS, DEFAULT_BACKEND, LANGUAGE, MODEL_NAME, check, decode_audio, load_model, \
+    parse_backend, transcribe_audio
+
+STAGES = ("decode", "transcribe", "intent", "game", "turn")
+
+
+class Span(NamedTuple):
+    """One timed stage of one turn, in perf_counter_ns nanoseconds"""
+    stage: str
+    turn: int
+    start: int
+    end: int
+
+
+# Collects spans from every turn and summarises them per stage
+class StageTrace:
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def add(self, stage, turn, start, end):
+        self.spans.append(Span(stage, turn, start, end))
+
+    def durations(self) -> Dict[str, List[float]]:
+        """Sorted milliseconds per stage"""
+        by_stage: Dict[str, List[float]] = {}
+        for span in self.spans:
+            by_stage.setdefault(span.stage, []).append((span.end - span.start) / 1e6)
+        return {stage: sorted(values) for stage, values in by_stage.items()}
+
+    def histogram(self) -> List[str]:
+        lines = [f"{'stage':<12}{'turns':>7}{'p50 ms':>11}{'p95 ms':>11}{'p99 ms':>11}{'max ms':>11}"]
+        durations = self.durations()
+        for stage in STAGES:
+            values = durations.get(stage)
+            if values:
+                lines.append(f"{stage:<12}{len(values):>7}{percentile(values, 0.50):>11.2f}"
+                             f"{percentile(values, 0.95):>11.2f}{percentile(values, 0.99):>11.2f}{values[-1]:>11.2f}")
+        return lines
+
+    def chrome_trace(self):
+        """Trace Event Format, for chrome://tracing or ui.perfetto.dev; stages nest inside their turn"""
+        origin = min((span.start for span in self.spans), default=0)
+        return {"traceEvents": [
+            {"name": span.stage, "cat": "voice", "ph": "X", "pid": 1, "tid": 1,
+             "ts": (span.start - origin) / 1000, "dur": (span.end - span.start) / 1000,
+             "args": {"turn": span.turn}}
+            for span in self.spans]}
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+# Audio in, driver reply out: decode -> transcribe -> intent -> game, every
+# stage timed with the monotonic nanosecond clock
+class VoiceNegotiation:
+    def __init__(self, model, session, trace=None, language=LANGUAGE):
+        self.model = model
+        self.session = session
+        self.trace = trace if trace is not None else StageTrace()
+        self.language = language
+        self.turns = 0
+
+    def turn(self, audio):
+        """One rider utterance (a file path or encoded bytes); returns (transcript, Reply)"""
+        self.turns += 1
+        clock = time.perf_counter_ns
+        started = clock()
+        samples = decode_audio(audio)
+        decoded = clock()
+        text = transcribe_audio(self.model, samples, self.language)["text"].strip()
+        transcribed = clock()
+        # Classified here, where its cost shows up, and handed to step() so the
+        # game does not classify it again. The destination turn has no use
+        # for an intent, so it has no intent span.
+        intent = classify(text.lower()) if self.session.destination else None
+        classified = clock()
+        reply: Reply = step(self.session, text, intent)
+        finished = clock()
+
+        stages = [("decode", started, decoded), ("transcribe", decoded, transcribed)]
+        if intent is not None:
+            stages.append(("intent", transcribed, classified))
+        stages += [("game", classified, finished), ("turn", started, finished)]
+        for stage, start, end in stages:
+            self.trace.add(stage, self.turns, start, end)
+        return text, reply
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Negotiate from recorded rider clips and time every stage")
+    parser.add_argument("clips", nargs="+", help="one audio file per rider turn, in order")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--language", default=LANGUAGE)
+    parser.add_argument("--backend", type=parse_backend, default=DEFAULT_BACKEND,
+                        help=f"KIND[:THREADS[:INTEROP]], KIND one of {', '.join(BACKENDS)}")
+    parser.add_argument("--repeat", type=int, default=1, help="play the clips this many times (new session each)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--hour", type=int, default=None, help="fixed hour of day for the sessions")
+    parser.add_argument("--trace", default=None, help="write a Chrome trace JSON here")
+    parser.add_argument("--quiet", action="store_true", help="print only the summary")
+    parser.add_argument("--check", action="store_true",
+                        help="check the clips, ffmpeg and Whisper without loading the model, then exit")
+    args = parser.parse_args(argv)
+    if args.check:
+        return 1 if check(args.clips, args.model) else 0
+
+    print("Loading Whisper model...")
+    model = load_model(args.model, args.backend)
+    clock = fixed_clock(args.hour) if args.hour is not None else datetime.now
+    trace = StageTrace()
+
+    for round_number in range(args.repeat):
+        seed = None if args.seed is None else args.seed + round_number
+        session = BangaloreAutoGame(BANGALORE, seed=seed, clock=clock)
+        pipeline = VoiceNegotiation(model, session, trace, args.language)
+        if not args.quiet:
+            print(f"\n🎲 seed {session.seed}\n🛺 Driver: {greet(session).text}")
+        for clip in args.clips:
+            text, reply = pipeline.turn(clip)
+            if not args.quiet:
+                print(f"🎙 You: {text}\n🛺 Driver: {reply.text}")
+            if reply.status != "continue":
+                break
+
+    print()
+    print("\n".join(trace.histogram()))
+    if args.trace:
+        with open(args.trace, "w", encoding="utf-8") as f:
+            json.dump(trace.chrome_trace(), f)
+        print(f"Chrome trace written to {args.trace}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))